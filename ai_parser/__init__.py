@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預約訊息解析套件
+
+子模組之間以相對導入互相引用，不修改 sys.path。
+import ai_parser 本身不載入任何子模組，也不讀檔、不連線；
+下列常用函數在第一次存取時才導入所屬子模組，
+正則規則、師傅/店家名稱比對器、時間正則資源等也都在第一次使用時才建立。
+"""
+
+import importlib
+
+# 公開名稱 -> 所屬子模組
+_LAZY_EXPORTS = {
+    'parser_date_time': 'handle_time2025',
+    'parse_datetime_phrases': 'handle_time',
+    'tokenize_booking_message': 'booking_lexer',
+    'NameMatcher': 'name_matcher',
+    'get_name_matcher': 'name_matcher',
+    'getStaffNames': 'handle_staff',
+    'getCustomerCount': 'handle_customer',
+    'extract_duration': 'handle_duration',
+    'isReservation': 'handle_isReserv',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預約訊息詞法分析模組
+
+一次處理訊息，產生帶位置的 token，供 appointment_analysis 的各項分析共用：
+- DATE / TIME：handle_time2025 的日期、時間字串（value 為格式化後的日期/時間）
+- STAFF / BRANCH：名稱比對器一次掃描的師傅、分店（value 為中文名 / 分店名稱）
+- DURATION：handle_duration 的療程時長（value 為分鐘數）
+- COUNT：handle_customer 的客人數量（value 為 (人數, 來源)）
+- RESERVATION_CUE：預約、不指定師傅、猶豫、班表等關鍵詞（value 為關鍵詞類別）
+
+中文數字在每種規則需要的地方只正規化一次，關鍵詞以單一 Aho-Corasick 自動機比對，
+各分析不再各自掃描整則訊息。
+"""
+
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from ai_parser.name_matcher import AhoCorasick, KIND_BRANCH, KIND_STAFF, KIND_STAFF_EN, get_name_matcher
+from ai_parser.handle_time2025 import parser_date_time_details
+from ai_parser.handle_duration import normalize_duration_text, find_duration
+from ai_parser.handle_customer import (
+    SELECT_COUNT_PATTERN, STAFF_CONNECT_WORDS,
+    find_explicit_person_count, find_pattern_person_count, find_companion_phrase
+)
+from ai_parser.handle_staff import NO_PREFERENCE_KEYWORDS
+
+# token 種類
+DATE = 'DATE'
+TIME = 'TIME'
+STAFF = 'STAFF'
+BRANCH = 'BRANCH'
+DURATION = 'DURATION'
+COUNT = 'COUNT'
+RESERVATION_CUE = 'RESERVATION_CUE'
+
+# RESERVATION_CUE 的關鍵詞類別
+CUE_RESERVATION = 'reservation'        # 明確表達預約意圖
+CUE_NO_PREFERENCE = 'no_preference'    # 不指定師傅
+CUE_HESITATION = 'hesitation'          # 猶豫/不確定，直接判定為非預約
+CUE_FORCE_CLEAR = 'force_clear'        # 查詢班表，清除時間
+
+# COUNT 的來源，依判斷優先順序排列（與 getCustomerCount 相同）
+COUNT_EXPLICIT = 'explicit'        # "三位"、"2個人"
+COUNT_STAFF_PAIR = 'staff_pair'    # "鞋和豪"
+COUNT_PATTERN = 'pattern'          # handle_reserv.php 的人數模式
+COUNT_COMPANION = 'companion'      # "我和朋友"
+_COUNT_PRIORITY = (COUNT_EXPLICIT, COUNT_STAFF_PAIR, COUNT_PATTERN, COUNT_COMPANION)
+
+RESERVATION_KEYWORDS = [
+    '預約', '約', '訂', '排', '安排', '登記',
+    '預訂', '預定', '預排', '空位', '時段',
+    '幾點', '什麼時候', '哪個時間', '幾號',
+    '可以來', '要來', '想來', '安排時間', '還有時間', '分鐘可以', '分可以',
+    '不指定', '都可以', '都可', '任何師', '會按', '按比較', '比較會'
+]
+HESITATION_KEYWORDS = ['不確定', '再決定', '再約', '先看看','先不用','先不要','再說','再看看','之後再說','改天','想一下','考慮','暫時不用','不需要','暫緩','等下','等一下','聯絡','不確定','先不']
+FORCE_CLEAR_KEYWORDS = ['班表', '師傅表', '排班表','排表']
+
+# start/end 為原文中的位置（半開區間）；經中文數字轉換後才比對到、無法對應回原文時為 -1
+Token = namedtuple('Token', ['kind', 'start', 'end', 'text', 'value'])
+
+
+def _build_cue_automaton() -> Tuple[AhoCorasick, List[Tuple[str, str]]]:
+    automaton = AhoCorasick()
+    cues: List[Tuple[str, str]] = []
+    for category, keywords in ((CUE_RESERVATION, RESERVATION_KEYWORDS),
+                               (CUE_NO_PREFERENCE, NO_PREFERENCE_KEYWORDS),
+                               (CUE_HESITATION, HESITATION_KEYWORDS),
+                               (CUE_FORCE_CLEAR, FORCE_CLEAR_KEYWORDS)):
+        for keyword in dict.fromkeys(keywords):
+            automaton.add(keyword, len(cues))
+            cues.append((keyword, category))
+    automaton.build()
+    return automaton, cues
+
+
+_CUE_AUTOMATON, _CUES = _build_cue_automaton()
+
+
+def _locate(message: str, text: str) -> Tuple[int, int]:
+    start = message.find(text) if text else -1
+    return (start, start + len(text)) if start >= 0 else (-1, -1)
+
+
+def _replace_with_offsets(text: str, pattern, replacement: str) -> Tuple[str, List[int]]:
+    """re.sub，同時記錄每個輸出字元在原文中的位置（替換字串對應到比對起點）"""
+    parts = []
+    offsets: List[int] = []
+    cursor = 0
+    for match in pattern.finditer(text):
+        parts.append(text[cursor:match.start()])
+        offsets.extend(range(cursor, match.start()))
+        parts.append(replacement)
+        offsets.extend([match.start()] * len(replacement))
+        cursor = match.end()
+    parts.append(text[cursor:])
+    offsets.extend(range(cursor, len(text)))
+    return ''.join(parts), offsets
+
+
+def _span(offsets: List[int], start: int, end: int) -> Tuple[int, int]:
+    """標準化文字中的 [start, end) 對應回原文位置"""
+    return offsets[start], offsets[end - 1] + 1
+
+
+class BookingTokens:
+    """
+    一則訊息的 token 列表（依 start 排序）與各項分析結果
+
+    各分析（handle_staff.getStaffNamesFromTokens、handle_customer.getCustomerCountFromTokens ...）
+    由這裡的 token 取得結果，規則與原本逐一解析訊息相同。
+    """
+
+    def __init__(self, message: str, tokens: List[Token], matcher=None, name_matches=None):
+        self.message = message
+        self.tokens = sorted(tokens, key=lambda token: (token.start, token.end))
+        self.matcher = matcher
+        self.name_matches = name_matches or []
+
+    def of_kind(self, kind: str) -> List[Token]:
+        return [token for token in self.tokens if token.kind == kind]
+
+    def first(self, kind: str) -> Optional[Token]:
+        for token in self.tokens:
+            if token.kind == kind:
+                return token
+        return None
+
+    def has_cue(self, category: str) -> bool:
+        return any(token.kind == RESERVATION_CUE and token.value == category for token in self.tokens)
+
+    @property
+    def date(self) -> str:
+        token = self.first(DATE)
+        return token.value if token else ''
+
+    @property
+    def time(self) -> str:
+        token = self.first(TIME)
+        return token.value if token else ''
+
+    @property
+    def staff_names(self) -> List[str]:
+        """師傅中文名（英文名轉為中文名，同一人只回傳一次，依出現順序）"""
+        found = []
+        for token in self.of_kind(STAFF):
+            if token.value not in found:
+                found.append(token.value)
+        return found
+
+    @property
+    def no_preference_keyword(self) -> str:
+        """第一個出現在 NO_PREFERENCE_KEYWORDS 順序中的「不指定師傅」關鍵詞"""
+        found = {token.text for token in self.tokens
+                 if token.kind == RESERVATION_CUE and token.value == CUE_NO_PREFERENCE}
+        for keyword in NO_PREFERENCE_KEYWORDS:
+            if keyword in found:
+                return keyword
+        return ''
+
+    @property
+    def branch(self) -> str:
+        """最長的分店別名所對應的分店（同長度時依 BRANCH_MAPPING 順序）"""
+        if self.matcher is None:
+            return ''
+        return self.matcher.find_branch(self.message, self.name_matches)
+
+    @property
+    def duration(self) -> Optional[int]:
+        token = self.first(DURATION)
+        return token.value if token else None
+
+    @property
+    def customer_count(self) -> Optional[int]:
+        counts = {token.value[1]: token.value[0] for token in self.of_kind(COUNT)}
+        for source in _COUNT_PRIORITY:
+            if source in counts:
+                return counts[source]
+        return None
+
+
+def _date_time_tokens(message: str) -> List[Token]:
+    try:
+        date_str, time_str, raw_date, raw_time = parser_date_time_details(message, 2)
+    except Exception as e:
+        print(f"警告：日期時間解析失敗：{e}")
+        return []
+    tokens = []
+    if raw_date:
+        tokens.append(Token(DATE, *_locate(message, raw_date), raw_date, date_str))
+    if raw_time:
+        tokens.append(Token(TIME, *_locate(message, raw_time), raw_time, time_str))
+    return tokens
+
+
+def _cue_tokens(message: str) -> List[Token]:
+    tokens = []
+    for end_index, cue_id in _CUE_AUTOMATON.iter_matches(message):
+        keyword, category = _CUES[cue_id]
+        start = end_index - len(keyword) + 1
+        tokens.append(Token(RESERVATION_CUE, start, end_index + 1, keyword, category))
+    return tokens
+
+
+def _name_tokens(message: str, matcher, name_matches) -> List[Token]:
+    tokens = []
+    staff_name_set = set(matcher.staff_names)
+    for match in matcher.select_english_bounded(message, name_matches):
+        if match.kind == KIND_BRANCH:
+            tokens.append(Token(BRANCH, match.start, match.end, match.key, match.value))
+        elif match.kind == KIND_STAFF_EN or (match.kind == KIND_STAFF and match.value in staff_name_set):
+            tokens.append(Token(STAFF, match.start, match.end, message[match.start:match.end], match.value))
+    return tokens
+
+
+def _duration_tokens(message: str) -> List[Token]:
+    normalized_text, offsets = normalize_duration_text(message)
+    found = find_duration(normalized_text)
+    if found is None:
+        return []
+    duration, match = found
+    print(f"[handle_duration] ✓ 找到時長: {duration}分鐘 (matched: {match.group()})")
+    start, end = _span(offsets, match.start(), match.end())
+    return [Token(DURATION, start, end, message[start:end], duration)]
+
+
+def _count_tokens(message: str, matcher, name_matches) -> List[Token]:
+    # 原始句子中的 "選三位" 取代為 "選"（與 getCustomerCount 相同：
+    # 入口取代一次，明確數字/其他模式判斷前再取代一次，"選三位兩位" 不視為人數）
+    count_text, offsets = _replace_with_offsets(message, SELECT_COUNT_PATTERN, "選")
+    count_text, second_offsets = _replace_with_offsets(count_text, SELECT_COUNT_PATTERN, "選")
+    offsets = [offsets[index] for index in second_offsets]
+    tokens = []
+
+    for source, finder in ((COUNT_EXPLICIT, find_explicit_person_count), (COUNT_PATTERN, find_pattern_person_count)):
+        found = finder(count_text)
+        if found:
+            count, start, end = found
+            start, end = _span(offsets, start, end)
+            tokens.append(Token(COUNT, start, end, message[start:end], (count, source)))
+
+    if matcher is not None:
+        pair = matcher.find_connected_staff(message, STAFF_CONNECT_WORDS, name_matches)
+        if pair:
+            start, end = pair
+            tokens.append(Token(COUNT, start, end, message[start:end], (2, COUNT_STAFF_PAIR)))
+
+    companion = find_companion_phrase(count_text)
+    if companion:
+        start, end = _span(offsets, *companion)
+        tokens.append(Token(COUNT, start, end, message[start:end], (2, COUNT_COMPANION)))
+    return tokens
+
+
+def tokenize_booking_message(message: str, matcher=None, timings: Optional[Dict[str, float]] = None) -> BookingTokens:
+    """
+    將預約訊息轉為 token
+
+    Args:
+        message: 用戶訊息
+        matcher: 名稱比對器（可選，預設使用共用比對器）
+        timings: 傳入 dict 時記錄各階段耗時（秒）：names、date_time、cues、duration、count
+
+    Returns:
+        BookingTokens
+    """
+    message = message or ''
+    tokens: List[Token] = []
+    clock = time.perf_counter
+
+    # 師傅/分店：名稱比對器掃描一次（英文名先不檢查前後字母，供 "camper&simon" 人數判斷使用）
+    started = clock()
+    name_matches = []
+    try:
+        matcher = matcher or get_name_matcher()
+        name_matches = matcher.find_all(message, english_boundary=False)
+        tokens.extend(_name_tokens(message, matcher, name_matches))
+    except Exception as e:
+        matcher = None
+        print(f"警告：師傅/分店判斷失敗：{e}")
+    stages = [('names', clock() - started)]
+
+    for stage, produce in (('date_time', lambda: _date_time_tokens(message)),
+                           ('cues', lambda: _cue_tokens(message)),
+                           ('duration', lambda: _duration_tokens(message)),
+                           ('count', lambda: _count_tokens(message, matcher, name_matches))):
+        started = clock()
+        tokens.extend(produce())
+        stages.append((stage, clock() - started))
+
+    if timings is not None:
+        for stage, elapsed in stages:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+    result = BookingTokens(message, tokens, matcher, name_matches)
+    print(f"DEBUG [Lexer]: {len(result.tokens)} 個 token: "
+          f"{[(token.kind, token.text) for token in result.tokens]}")
+    return result
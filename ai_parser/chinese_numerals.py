@@ -0,0 +1,180 @@
+# chinese_numerals.py
+# 中文數字標準化（ai_parser 共用）
+#
+# 將訊息中的中文數字轉換為阿拉伯數字、全形字元轉換為半形，單次掃描完成，
+# 同時記錄每個輸出字元在原文中的位置；同一則訊息會被多個分析（時間、時長、人數）
+# 標準化，結果以訊息為鍵快取。
+#
+# 轉換規則：
+# - 沒有單位的連續數字逐字轉換："二〇二五" → "2025"、"三" → "3"
+# - 有單位時依位值計算："十五" → "15"、"二十三" → "23"、"廿五" → "25"、"一百零五" → "105"
+# - 單位後省略的位數："兩百五" → "250"、"一千二" → "1200"
+# - 百/千/萬/億不作為數字的開頭（"百貨"、"千萬不要" 不轉換）
+# - "半" 不轉換（"十點半" → "10點半"、"兩個半小時" → "2個半小時"）
+# - 緊接阿拉伯數字的中文數字不轉換，避免兩個數字相連（"廿60分" 不轉為 "2060分"）
+# - 位值不再遞減時為下一個數字，以空白分隔："十點十五二十人" → "10點15 20人"
+#   （單位後的零為佔位，不分隔："一千零五十" → "1050"）
+
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+
+_DIGITS = {
+    '零': 0, '〇': 0,
+    '一': 1, '壹': 1,
+    '二': 2, '貳': 2, '貮': 2, '兩': 2, '两': 2,
+    '三': 3, '參': 3, '叁': 3,
+    '四': 4, '肆': 4,
+    '五': 5, '伍': 5,
+    '六': 6, '陸': 6,
+    '七': 7, '柒': 7,
+    '八': 8, '捌': 8,
+    '九': 9, '玖': 9,
+}
+# 十位的縮寫（"廿五" = 25）
+_TENS = {'廿': 20, '卅': 30}
+_UNITS = {
+    '十': 10, '拾': 10,
+    '百': 100, '佰': 100,
+    '千': 1000, '仟': 1000,
+}
+# 分節單位（"三萬五千" = 35000）
+_SECTION_UNITS = {'萬': 10000, '万': 10000, '億': 100000000, '亿': 100000000}
+# 可作為數字開頭的字
+_LEADING = set(_DIGITS) | set(_TENS) | {'十', '拾'}
+_NUMERAL_CHARS = set(_DIGITS) | set(_TENS) | set(_UNITS) | set(_SECTION_UNITS)
+_ARABIC_DIGITS = frozenset('0123456789０１２３４５６７８９')
+
+# 全形字元 → 半形字元
+_FULLWIDTH = {chr(code): chr(code - 0xFEE0) for code in range(0xFF01, 0xFF5F)}
+_FULLWIDTH.update({
+    '　': ' ', '。': '.', '「': '"', '」': '"', '『': "'", '』': "'", '【': '[', '】': ']',
+})
+
+
+class NormalizedText(NamedTuple):
+    """標準化後的文字，offsets[i] 為 text[i] 在原文中的位置"""
+    text: str
+    offsets: Tuple[int, ...]
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """標準化文字中的 [start, end) 對應回原文位置"""
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+
+def chinese_numeral_value(numeral: str) -> Optional[int]:
+    """
+    中文數字字串的數值，如 "三" → 3、"十二" → 12、"兩百五" → 250；
+    含有非中文數字的字元時返回 None
+    """
+    if not numeral or any(ch not in _NUMERAL_CHARS for ch in numeral):
+        return None
+    if not any(ch in _UNITS or ch in _SECTION_UNITS or ch in _TENS for ch in numeral):
+        return int(''.join(str(_DIGITS[ch]) for ch in numeral))
+
+    total = 0       # 已完成的分節（萬、億）
+    section = 0     # 目前分節內已計算的值
+    number = 0      # 尚未乘上單位的數字
+    last_unit = 0   # 最後一個單位（決定省略的位數）
+    for ch in numeral:
+        if ch in _DIGITS:
+            number = _DIGITS[ch]
+        elif ch in _TENS:
+            section += _TENS[ch]
+            number, last_unit = 0, 10
+        elif ch in _UNITS:
+            section += (number or 1) * _UNITS[ch]
+            number, last_unit = 0, _UNITS[ch]
+        else:
+            total += (section + number or 1) * _SECTION_UNITS[ch]
+            section, number, last_unit = 0, 0, _SECTION_UNITS[ch]
+    if number and last_unit > 10 and numeral[-2] not in _DIGITS:
+        # "兩百五" 的 "五" 是十位，"一萬五" 的 "五" 是千位
+        number *= last_unit // 10
+    return total + section + number
+
+
+def _number_end(text: str, start: int, end: int) -> int:
+    """
+    連續的中文數字中第一個數字的結尾：位值不再遞減時為下一個數字的開頭
+    （"十五二十" → "十五"、"二十"，"十五六十" → "十五"、"六十"）
+    """
+    last_unit = None    # 目前分節內最後一個單位（十位縮寫視為十）
+    pending = False     # 是否有尚未乘上單位的數字
+    for index in range(start, end):
+        ch = text[index]
+        if ch in _DIGITS:
+            if _DIGITS[ch] == 0 and last_unit is not None and not pending:
+                # 單位後的零只是佔位（"一百零五"、"一千零五十"），數字繼續
+                continue
+            if pending and last_unit is not None:
+                return index
+            pending = True
+        elif ch in _TENS or ch in _UNITS:
+            unit = _UNITS.get(ch, 10)
+            if last_unit is not None and unit >= last_unit:
+                return index - 1 if pending else index
+            if ch in _TENS and pending:
+                return index
+            last_unit, pending = unit, False
+        else:
+            last_unit, pending = None, False
+    return end
+
+
+def _numeral_runs(text: str):
+    """找出可轉換的中文數字區段 (start, end)，相連的多個數字各自為一個區段"""
+    index = 0
+    text_len = len(text)
+    while index < text_len:
+        if text[index] in _LEADING:
+            end = index + 1
+            while end < text_len and text[end] in _NUMERAL_CHARS:
+                end += 1
+            while index < end:
+                number_end = _number_end(text, index, end)
+                yield index, number_end
+                index = number_end
+        else:
+            index += 1
+
+
+@lru_cache(maxsize=2048)
+def normalize_numerals(text: str) -> NormalizedText:
+    """
+    中文數字轉為阿拉伯數字、全形字元轉為半形（單次掃描，依訊息快取）
+
+    Returns:
+        NormalizedText(標準化後的文字, 每個字元在原文中的位置)
+    """
+    parts: List[str] = []
+    offsets: List[int] = []
+    cursor = 0
+    for start, end in _numeral_runs(text):
+        if text[start] not in _LEADING or (end < len(text) and text[end] in _ARABIC_DIGITS):
+            continue
+        if start == cursor and start > 0 and parts and parts[-1][-1].isdigit():
+            # 相連的兩個數字以空白分隔（"十五二十人" → "15 20人"）
+            parts.append(' ')
+            offsets.append(start)
+        for index in range(cursor, start):
+            parts.append(_FULLWIDTH.get(text[index], text[index]))
+            offsets.append(index)
+        converted = str(chinese_numeral_value(text[start:end]))
+        parts.append(converted)
+        if len(converted) == end - start:
+            offsets.extend(range(start, end))
+        else:
+            # 區段開頭對應到第一個字，結尾對應到最後一個字
+            offsets.extend([start] * (len(converted) - 1))
+            offsets.append(end - 1 if len(converted) > 1 else start)
+        cursor = end
+    for index in range(cursor, len(text)):
+        parts.append(_FULLWIDTH.get(text[index], text[index]))
+        offsets.append(index)
+    return NormalizedText(''.join(parts), tuple(offsets))
+
+
+def convert_numerals(text: str) -> str:
+    """中文數字轉為阿拉伯數字、全形字元轉為半形，只返回文字"""
+    return normalize_numerals(text).text
@@ -8,13 +8,30 @@
 """
 
 import re
-import sys
-import os
-from typing import Optional
+from typing import Optional, Tuple
 
-# 添加當前目錄到路徑以便導入 staff_utils
-sys.path.append(os.path.dirname(__file__))
-from staff_utils import getNameMapping
+from .chinese_numerals import chinese_numeral_value
+from .staff_utils import getNameMapping
+
+
+# 原始句子中的 "選三位" 不是人數，比對前取代為 "選"
+SELECT_COUNT_PATTERN = re.compile(r"選[一二兩三四五六七八九十]位")
+
+# 中文數字 + 人/位/個人 等的模式
+_CHINESE_PERSON_RE = re.compile(r"([一二兩两三四五六七八九十壹貳參叁肆伍陸柒捌玖拾]+)\s*(?:个人|個人|人|位|客人|客戶)")
+# 數字+人的模式（來自 main.py extract_person_count 函數）
+_PERSON_RE = re.compile(r"(\d+)\s*(?:个人|個人|人|位)")
+# 來自 handle_reserv.php 的人數模式
+_PERSON_PATTERNS = (
+    re.compile(r'\d+\s*(?:个人|個人|人|位)'),
+    re.compile(r'\d+人'),
+)
+_DIGITS_RE = re.compile(r'\d+')
+# 「我和...」「我跟...」「我與...」這種連詞表達方式（明確表示2人）
+_COMPANION_RE = re.compile(r"我[和跟與](?:朋友|家人|同事|伙伴|親友|同學|同窗|夫人|先生|老公|老婆|女友|男友)")
+
+# 師傅名字之間的連接詞（來自 handle_customer.py 和 main.py）
+STAFF_CONNECT_WORDS = ["和", "跟", "與", "and", "&"]
 
 
 def getCustomerCount(text: str, return_details: bool = False):
@@ -30,7 +47,7 @@ def getCustomerCount(text: str, return_details: bool = False):
         如果 return_details=True: tuple[int, bool] - (客人數量, 是否明确表达)
     """
     #原始句字中的 "選三位"取代為"選"
-    text = re.sub(r"選[一二兩三四五六七八九十]位", "選", text)
+    text = SELECT_COUNT_PATTERN.sub("選", text)
 
     # 嘗試提取明確的數字表達
     person_count = _extract_explicit_person_count(text)
@@ -51,90 +68,105 @@ def getCustomerCount(text: str, return_details: bool = False):
     return (None, False) if return_details else None
 
 
-def _extract_explicit_person_count(text: str) -> Optional[int]:
+def getCustomerCountFromTokens(tokens, return_details: bool = False):
     """
-    從文本中提取明確的數字表達客人數量
-    
-    此函數整合自 main.py 的 extract_person_count 函數的數字匹配部分
-    
+    由 booking_lexer 產生的 COUNT token 取得客人數量（判斷順序與 getCustomerCount 相同）
+
     Args:
-        text (str): 用戶輸入的文本
-        
-    Returns:
-        Optional[int]: 提取到的客人數量，如果沒有找到則返回None
+        tokens: booking_lexer.BookingTokens
+        return_details (bool): 是否返回详细信息（包括是否明确表达）
     """
+    person_count = tokens.customer_count
+    if person_count is not None:
+        return (person_count, True) if return_details else person_count
+    return (None, False) if return_details else None
 
-    #原始句字中的 "選三位"取代為"選"
-    text = re.sub(r"選[一二兩三四五六七八九十]位", "選", text)
 
+def find_explicit_person_count(text: str) -> Optional[Tuple[int, int, int]]:
+    """
+    找出明確的數字表達客人數量（"三位"、"2個人"）
+
+    Returns:
+        (客人數量, start, end)，如果沒有找到則返回 None
+    """
     # 先檢查中文數字+人的模式（避免被後續阿拉伯數字規則干擾）
-    chinese_number_map = {
-        '一': 1, '二': 2, '兩': 2, '两': 2, '三': 3, '四': 4, 
-        '五': 5, '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-        '壹': 1, '貳': 2, '參': 3, '叁': 3, '肆': 4, '伍': 5,
-        '陸': 6, '柒': 7, '捌': 8, '玖': 9, '拾': 10
-    }
-    
-    # 中文數字 + 人/位/個人 等的模式
-    chinese_person_pattern = r"([一二兩两三四五六七八九十壹貳參叁肆伍陸柒捌玖拾]+)\s*(?:个人|個人|人|位|客人|客戶)"
-    match = re.search(chinese_person_pattern, text)
-    
+    match = _CHINESE_PERSON_RE.search(text)
     if match:
-        chinese_num = match.group(1)
-        # 轉換中文數字為阿拉伯數字
-        count = _convert_chinese_to_number(chinese_num, chinese_number_map)
+        count = _convert_chinese_to_number(match.group(1))
         if count and 1 <= count <= 20:
-            return count
-    
-    # 數字+人的模式（來自 main.py extract_person_count 函數）
-    person_pattern = r"(\d+)\s*(?:个人|個人|人|位)"
-    match = re.search(person_pattern, text)
-    
+            return count, match.start(), match.end()
+
+    match = _PERSON_RE.search(text)
     if match:
         try:
             count = int(match.group(1))
             # 基本合理性檢查，避免過大的數字
             if 1 <= count <= 20:  # 假設最多20人的預約
-                return count
+                return count, match.start(), match.end()
         except ValueError:
             pass
-    
     return None
 
 
-def _convert_chinese_to_number(chinese_str: str, number_map: dict) -> Optional[int]:
+def find_pattern_person_count(text: str) -> Optional[Tuple[int, int, int]]:
+    """
+    以 handle_reserv.php 的人數模式找出客人數量
+
+    Returns:
+        (客人數量, start, end)，如果沒有找到則返回 None
+    """
+    for pattern in _PERSON_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            # 提取數字
+            number_match = _DIGITS_RE.search(match.group())
+            if number_match:
+                try:
+                    count = int(number_match.group())
+                    if 1 <= count <= 20:  # 基本合理性檢查
+                        return count, match.start(), match.end()
+                except ValueError:
+                    continue
+    return None
+
+
+def find_companion_phrase(text: str) -> Optional[Tuple[int, int]]:
+    """找出「我和朋友」「我跟家人」等表示 2 人的表達，返回 (start, end)"""
+    match = _COMPANION_RE.search(text)
+    return (match.start(), match.end()) if match else None
+
+
+def _extract_explicit_person_count(text: str) -> Optional[int]:
+    """
+    從文本中提取明確的數字表達客人數量
+    
+    此函數整合自 main.py 的 extract_person_count 函數的數字匹配部分
+    
+    Args:
+        text (str): 用戶輸入的文本
+        
+    Returns:
+        Optional[int]: 提取到的客人數量，如果沒有找到則返回None
     """
-    將中文數字字符串轉換為阿拉伯數字
+
+    #原始句字中的 "選三位"取代為"選"
+    text = SELECT_COUNT_PATTERN.sub("選", text)
+
+    found = find_explicit_person_count(text)
+    return found[0] if found else None
+
+
+def _convert_chinese_to_number(chinese_str: str) -> Optional[int]:
+    """
+    將中文數字字符串轉換為阿拉伯數字（共用的 chinese_numerals.chinese_numeral_value）
     
     Args:
         chinese_str: 中文數字字符串（如 "三"、"十"、"二十"）
-        number_map: 中文數字到阿拉伯數字的映射
         
     Returns:
         Optional[int]: 轉換後的數字，如果無法轉換則返回None
     """
-    # 處理單個中文數字
-    if len(chinese_str) == 1:
-        return number_map.get(chinese_str)
-    
-    # 處理 "十X" 的情況（如 "十一" = 11, "十二" = 12）
-    if chinese_str.startswith('十') or chinese_str.startswith('拾'):
-        if len(chinese_str) == 1:
-            return 10
-        second_char = chinese_str[1]
-        second_num = number_map.get(second_char, 0)
-        return 10 + second_num
-    
-    # 處理 "X十" 或 "X十Y" 的情況（如 "二十" = 20, "二十三" = 23）
-    if '十' in chinese_str or '拾' in chinese_str:
-        parts = chinese_str.replace('拾', '十').split('十')
-        if len(parts) == 2:
-            tens = number_map.get(parts[0], 0) if parts[0] else 1  # "十" = "一十"
-            ones = number_map.get(parts[1], 0) if parts[1] else 0
-            return tens * 10 + ones
-    
-    # 如果無法處理，嘗試直接查表
-    return number_map.get(chinese_str)
+    return chinese_numeral_value(chinese_str)
 
 
 def _extract_person_count_by_staff_names(text: str) -> Optional[int]:
@@ -152,30 +184,9 @@ def _extract_person_count_by_staff_names(text: str) -> Optional[int]:
         Optional[int]: 提取到的客人數量，如果沒有找到則返回None
     """
     try:
-        # 獲取師傅名字列表
-        staff_names, english_names = getNameMapping()
-        
-        # 中文師傅名字模式
-        staff_pattern_cn = "|".join(staff_names)
-        
-        # 英文師傅名字模式 (包括小寫和首字母大寫)
-        staff_pattern_en = "|".join(
-            [name.lower() for name in english_names]
-            + [name.capitalize() for name in english_names]
-        )
-        
-        # 完整師傅名字模式
-        staff_pattern = f"({staff_pattern_cn}|{staff_pattern_en})"
-        
-        # 連接詞
-        connect_words = ["和", "跟", "與", "and", "&"]
-        connect_pattern = "|".join(connect_words)
-        
-        # 組合模式：師傅名1 + 連接詞 + 師傅名2
-        pattern = f"{staff_pattern}(?:{connect_pattern}){staff_pattern}"
-        
-        # 檢查是否有師傅名字通過連接詞連接
-        if re.search(pattern, text, re.IGNORECASE):
+        # 共用的名稱比對器：師傅名1 + 連接詞 + 師傅名2
+        from .name_matcher import get_name_matcher
+        if get_name_matcher().find_connected_staff(text, STAFF_CONNECT_WORDS) is not None:
             return 2
         
         # 不再使用師傅數量來推斷客人數量
@@ -200,37 +211,15 @@ def _extract_person_count_by_patterns(text: str) -> Optional[int]:
         Optional[int]: 提取到的客人數量，如果沒有找到則返回None
     """
     #原始句字中的 "選三位"取代為"選"
-    text = re.sub(r"選[一二兩三四五六七八九十]位", "選", text)
+    text = SELECT_COUNT_PATTERN.sub("選", text)
 
-    # 來自 handle_reserv.php 的人數模式
-    person_patterns = [
-        r'\d+\s*(?:个人|個人|人|位)',
-        r'\d+人'
-    ]
-    
-    for pattern in person_patterns:
-        match = re.search(pattern, text)
-        if match:
-            # 提取數字
-            number_match = re.search(r'\d+', match.group())
-            if number_match:
-                try:
-                    count = int(number_match.group())
-                    if 1 <= count <= 20:  # 基本合理性檢查
-                        return count
-                except ValueError:
-                    continue
+    found = find_pattern_person_count(text)
+    if found:
+        return found[0]
     
     # 檢查「我和...」「我跟...」「我與...」這種連詞表達方式（明確表示2人）
-    connection_patterns = [
-        r"我和(?:朋友|家人|同事|伙伴|親友|同學|同窗|夫人|先生|老公|老婆|女友|男友)",
-        r"我跟(?:朋友|家人|同事|伙伴|親友|同學|同窗|夫人|先生|老公|老婆|女友|男友)",
-        r"我與(?:朋友|家人|同事|伙伴|親友|同學|同窗|夫人|先生|老公|老婆|女友|男友)"
-    ]
-    
-    for pattern in connection_patterns:
-        if re.search(pattern, text):
-            return 2
+    if find_companion_phrase(text):
+        return 2
     
     # 不再使用模糊的複數表達或家庭詞彙來推斷人數
     # 只有明確的數字表達才返回數量
@@ -3,7 +3,72 @@
 # 負責從用戶輸入中判讀並提取療程時長
 
 import re
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from .chinese_numerals import normalize_numerals
+
+# 預設的提示文字，例如 (90/120mins)、(90/120 mins)、(90/120MINS)
+_PROMPT_TEXT_PATTERNS = (
+    re.compile(r'\([^\)]*90[^\)]*120[^\)]*mins?\)', re.IGNORECASE),
+    re.compile(r'\(90/120\s*mins?\)', re.IGNORECASE),
+)
+
+# 所有支持的時長模式，按優先級排序（最特定的放在前面）
+# 值為分鐘數，或由比對結果計算分鐘數的函數
+_DURATION_PATTERNS = [
+    # 特殊格式：冒號後的數字（例如 "project:90", "課程:90", "project:60", "project:120"）
+    # 這個要放在最前面，因為是最明確的格式
+    (r'(?:project|課程|療程|时长|時長|duration)[:：]\s*(\d+)', lambda m: int(m.group(1))),
+
+    # 120 分鐘相關（最長的具體數字，要先匹配以避免被通用模式截取）
+    (r'\b120\s*mins?\b', 120),
+    (r'\b120分鐘\b', 120),
+    (r'\b120分\b', 120),
+    (r'\b兩小時\b', 120),
+    (r'\b2小時\b', 120),
+    # 90 分鐘相關
+    (r'\b90\s*mins?\b', 90),
+    (r'\b90分鐘\b', 90),
+    (r'\b90分\b', 90),
+    (r'\b一個半小時\b', 90),
+    (r'\b1\.5小時\b', 90),
+    # 60 分鐘相關
+    (r'\b60\s*mins?\b', 60),
+    (r'\b60分鐘\b', 60),
+    (r'\b60分\b', 60),
+    (r'\b一小時\b', 60),
+    (r'\b1小時\b', 60),
+    # 其他通用格式（後匹配）
+    (r'\b(\d+(?:\.\d+)?)\s*hours?\b', lambda m: int(float(m.group(1)) * 60)),
+    (r'\b(\d+)\s*mins?\b', lambda m: int(m.group(1))),
+    (r'(\d+)\s*分鐘', lambda m: int(m.group(1))),
+    (r'(\d+)\s*分(?!鐘)', lambda m: int(m.group(1))),
+    (r'(\d+)\s*小時', lambda m: int(m.group(1)) * 60),
+    (r'(\d+)\s*小時\s*半', lambda m: int(m.group(1)) * 60 + 30),
+]
+# 通用的「N分 / N分鐘」模式：緊接在時間之後（"8點45分"、"21:30分"、"10am55分"）且小於 60 時是時間的分鐘數，不是療程時長
+_MINUTE_PATTERNS = (r'(\d+)\s*分鐘', r'(\d+)\s*分(?!鐘)')
+_CLOCK_MINUTE_PREFIX = re.compile(r'(?:[點点:：]|[ap]m)\s*$', re.IGNORECASE)
+
+_COMPILED_DURATION_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), duration_or_converter, pattern in _MINUTE_PATTERNS)
+    for pattern, duration_or_converter in _DURATION_PATTERNS
+]
+
+
+def _is_clock_minutes(text: str, match: re.Match) -> bool:
+    """比對到的數字是否為時間的分鐘數（如 "8點45分" 的 45）"""
+    start = match.start(1)
+    return int(match.group(1)) < 60 and _CLOCK_MINUTE_PREFIX.search(text, max(0, start - 8), start) is not None
+
+
+def _normalize_with_offsets(text: str, offsets: List[int]) -> Tuple[str, List[int]]:
+    """
+    將中文數字轉換為阿拉伯數字（共用的 chinese_numerals.normalize_numerals），
+    同時記錄每個輸出字元在原文中的位置
+    """
+    normalized = normalize_numerals(text)
+    return normalized.text, [offsets[index] for index in normalized.offsets]
 
 
 def _normalize_chinese_numerals(text: str) -> str:
@@ -11,28 +76,60 @@ def _normalize_chinese_numerals(text: str) -> str:
     將中文數字轉換為阿拉伯數字
     例如: "九十分鐘" → "90分鐘"
     """
-    # 中文數字映射
-    chinese_to_arabic = {
-        '零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
-        '五': '5', '六': '6', '七': '7', '八': '8', '九': '9',
-        '十': '10', '兩': '2'
-    }
-    
-    result = text
-    
-    # 處理 "九十"、"六十" 等複合數字
-    for chinese_num in ['一', '二', '三', '四', '五', '六', '七', '八', '九']:
-        # 處理 "X十" 格式（如 "九十" → "90"）
-        result = re.sub(f'{chinese_num}十', f'{chinese_to_arabic[chinese_num]}0', result)
-    
-    # 處理 "兩小時"、"兩小時半" 等
-    result = result.replace('兩', '2')
-    
-    # 處理 "一小時"、"一個半小時" 等單個數字
-    for chinese_num, arabic_num in chinese_to_arabic.items():
-        result = result.replace(chinese_num, arabic_num)
-    
-    return result
+    return normalize_numerals(text).text
+
+
+def normalize_duration_text(text: str) -> Tuple[str, List[int]]:
+    """
+    移除預設的提示文字並標準化中文數字（與 extract_duration 的前處理相同）
+
+    Returns:
+        (標準化後的文字, 每個字元在原文中的位置)
+    """
+    offsets = list(range(len(text)))
+    for pattern in _PROMPT_TEXT_PATTERNS:
+        kept_parts = []
+        kept_offsets = []
+        cursor = 0
+        for match in pattern.finditer(text):
+            kept_parts.append(text[cursor:match.start()])
+            kept_offsets.extend(offsets[cursor:match.start()])
+            cursor = match.end()
+        if cursor:
+            kept_parts.append(text[cursor:])
+            kept_offsets.extend(offsets[cursor:])
+            text, offsets = ''.join(kept_parts), kept_offsets
+    return _normalize_with_offsets(text, offsets)
+
+
+def find_duration(normalized_text: str) -> Optional[Tuple[int, re.Match]]:
+    """
+    在標準化後的文字中找出第一個成立的時長模式
+
+    Returns:
+        (時長分鐘數, 比對結果)，如果未找到則返回 None
+    """
+    for regex, duration_or_converter, is_minute_pattern in _COMPILED_DURATION_PATTERNS:
+        if is_minute_pattern:
+            # 略過時間的分鐘數，繼續找同一模式的下一個比對
+            match = next((m for m in regex.finditer(normalized_text)
+                          if not _is_clock_minutes(normalized_text, m)), None)
+        else:
+            match = regex.search(normalized_text)
+        if not match:
+            continue
+        if not callable(duration_or_converter):
+            # 如果直接是分鐘數
+            return duration_or_converter, match
+        # 如果是 lambda 轉換器
+        try:
+            duration = duration_or_converter(match)
+        except (ValueError, IndexError):
+            continue
+        # 驗證時長在合理範圍內（30-240分鐘）
+        if 30 <= duration <= 240:
+            return duration, match
+    return None
 
 
 def extract_duration(text: str) -> Optional[int]:
@@ -67,76 +164,15 @@ def extract_duration(text: str) -> Optional[int]:
     # Debug: 顯示原始輸入
     print(f"[handle_duration] 原始輸入: {text[:100]}...")
     
-    # 先移除預設的提示文字，避免誤判
-    # 移除各種可能的變體：(90/120mins)、(90/120 mins)、(90/120MINS) 等
-    cleaned_text = re.sub(r'\([^\)]*90[^\)]*120[^\)]*mins?\)', '', text, flags=re.IGNORECASE)
-    # 也移除單獨的 (90/120mins) 格式
-    cleaned_text = re.sub(r'\(90/120\s*mins?\)', '', cleaned_text, flags=re.IGNORECASE)
-    
-    # Debug: 顯示清理後的文字
-    if cleaned_text != text:
-        print(f"[handle_duration] 清理後: {cleaned_text[:100]}...")
-    
-    # 首先標準化中文數字
-    normalized_text = _normalize_chinese_numerals(cleaned_text)
-    
-    # 定義所有支持的時長模式，按優先級排序（最特定的放在前面）
-    # 這些模式與 appointment_analysis.py 中的 _extract_project_duration() 保持一致
-    patterns = [
-        # 特殊格式：冒號後的數字（例如 "project:90", "課程:90", "project:60", "project:120"）
-        # 這個要放在最前面，因為是最明確的格式
-        # 支援 60, 90, 120 以及其他合理的時長
-        (r'(?:project|課程|療程|时长|時長|duration)[:：]\s*(\d+)', lambda m: int(m.group(1))),
-        
-        # 120 分鐘相關（最長的具體數字，要先匹配以避免被通用模式截取）
-        (r'\b120\s*mins?\b', 120),
-        (r'\b120分鐘\b', 120),
-        (r'\b120分\b', 120),
-        (r'\b兩小時\b', 120),
-        (r'\b2小時\b', 120),
-        # 90 分鐘相關
-        (r'\b90\s*mins?\b', 90),
-        (r'\b90分鐘\b', 90),
-        (r'\b90分\b', 90),
-        (r'\b一個半小時\b', 90),
-        (r'\b1\.5小時\b', 90),
-        # 60 分鐘相關
-        (r'\b60\s*mins?\b', 60),
-        (r'\b60分鐘\b', 60),
-        (r'\b60分\b', 60),
-        (r'\b一小時\b', 60),
-        (r'\b1小時\b', 60),
-        # 其他通用格式（後匹配）
-        (r'\b(\d+(?:\.\d+)?)\s*hours?\b', lambda m: int(float(m.group(1)) * 60)),
-        (r'\b(\d+)\s*mins?\b', lambda m: int(m.group(1))),
-        (r'(\d+)\s*分鐘', lambda m: int(m.group(1))),
-        (r'(\d+)\s*分(?!鐘)', lambda m: int(m.group(1))),
-        (r'(\d+)\s*小時', lambda m: int(m.group(1)) * 60),
-        (r'(\d+)\s*小時\s*半', lambda m: int(m.group(1)) * 60 + 30),
-    ]
-    
-    # 逐個嘗試匹配模式，返回第一個找到的
-    for pattern, duration_or_converter in patterns:
-        if callable(duration_or_converter):
-            # 如果是 lambda 轉換器
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                try:
-                    duration = duration_or_converter(match)
-                    # 驗證時長在合理範圍內（30-240分鐘）
-                    if 30 <= duration <= 240:
-                        print(f"[handle_duration] ✓ 找到時長: {duration}分鐘 (pattern: {pattern[:50]}..., matched: {match.group()})")
-                        return duration
-                except (ValueError, IndexError):
-                    continue
-        else:
-            # 如果直接是分鐘數
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                print(f"[handle_duration] ✓ 找到時長: {duration_or_converter}分鐘 (pattern: {pattern[:50]}..., matched: {match.group()})")
-                return duration_or_converter
+    # 先移除預設的提示文字，避免誤判，再標準化中文數字
+    normalized_text, _ = normalize_duration_text(text)
     
-    return None
+    found = find_duration(normalized_text)
+    if found is None:
+        return None
+    duration, match = found
+    print(f"[handle_duration] ✓ 找到時長: {duration}分鐘 (pattern: {match.re.pattern[:50]}..., matched: {match.group()})")
+    return duration
 
 
 def is_duration_mentioned(text: str) -> bool:
@@ -234,6 +270,8 @@ def extract_all_durations(text: str) -> list:
     for pattern, converter in patterns:
         matches = re.finditer(pattern, normalized_text, re.IGNORECASE)
         for match in matches:
+            if pattern in _MINUTE_PATTERNS and _is_clock_minutes(normalized_text, match):
+                continue
             try:
                 duration = converter(match)
                 # 驗證時長在合理範圍內
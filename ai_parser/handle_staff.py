@@ -11,6 +11,8 @@
 import re
 from typing import List, Dict, Any
 
+# 表示「不指定師傅」的關鍵詞，出現時返回所有師傅
+NO_PREFERENCE_KEYWORDS = ['不指定', '那一', '哪一','都可以', '那位師傅','哪位','哪些','那些', '有誰可以', '有那些師父', '誰可以', '其它']
 
 def getStaffNames(text: str) -> List[str]:
     """
@@ -30,80 +32,61 @@ def getStaffNames(text: str) -> List[str]:
     """
     print(f"DEBUG [StaffNames]: 開始提取師傅名稱，輸入文字: {text}")
     
-    # 🔍 優先檢查是否為「不指定師傅」的表達（在查詢資料庫前）
-    no_preference_keywords = ['不指定', '那一', '哪一','都可以', '那位師傅','哪位','哪些','那些', '有誰可以', '有那些師父', '誰可以', '其它']
-    for keyword in no_preference_keywords:
-        if keyword in text:
-            print(f"DEBUG [StaffNames]: ⭐️ 檢測到「{keyword}」關鍵詞")
-            # 只在檢測到關鍵詞時才查詢資料庫
-            try:
-                from .staff_utils import getStaffMapping
-                staff_mapping = getStaffMapping()
-                if staff_mapping:
-                    staff_names = list(set(staff_mapping.values()))
-                    print(f"DEBUG [StaffNames]: 返回所有 {len(staff_names)} 位師傅")
-                    return staff_names
-            except Exception as e:
-                print(f"DEBUG [StaffNames]: ❗ 獲取師傅名單時發生錯誤: {e}")
-            return []
-    
-    # 獲取師傅名字列表及對應的英文名
-    # 來自 staff_utils.py 的 getNameMapping() 函數
+    # 共用的名稱比對器（依 Staffs/Store 表版本建立一次，不再每則訊息查詢完整師傅名單）
     try:
-        from .staff_utils import getStaffMapping
-        
-        # 直接獲取完整的映射字典（英文大寫 -> 中文）
-        staff_mapping = getStaffMapping()
-        if not staff_mapping:
-            print(f"DEBUG [StaffNames]: ❗ 無法獲取師傅名單")
-            return []
-        
-        # 獲取所有中文名稱（去重）
-        staff_names = list(set(staff_mapping.values()))
-        print(f"DEBUG [StaffNames]: 師傅名單總數: {len(staff_names)} 位")
-        print(f"DEBUG [StaffNames]: 中文名: {staff_names}")
+        from .name_matcher import get_name_matcher
+        matcher = get_name_matcher()
     except Exception as e:
         print(f"DEBUG [StaffNames]: ❗ 獲取師傅名單時發生錯誤: {e}")
         return []
     
-    # 使用 set 來儲存找到的中文名稱，自動去重
-    found_chinese_names = set()
-    
-    # 查找中文名（直接字符串匹配）
-    # 來自 main.py extract_staff_name 函數
-    print(f"DEBUG [StaffNames]: Step 1 - 檢查中文名...")
-    for name in staff_names:
-        if name in text:
-            print(f"DEBUG [StaffNames]: ✅ 找到中文名: {name}")
-            found_chinese_names.add(name)
-    
-    # 檢查英文名（統一轉大寫比對）
-    print(f"DEBUG [StaffNames]: Step 2 - 檢查英文名（轉大寫比對）...")
-    upper_text = text.upper()
+    # 🔍 優先檢查是否為「不指定師傅」的表達
+    for keyword in NO_PREFERENCE_KEYWORDS:
+        if keyword in text:
+            print(f"DEBUG [StaffNames]: ⭐️ 檢測到「{keyword}」關鍵詞")
+            staff_names = matcher.staff_names
+            if staff_names:
+                print(f"DEBUG [StaffNames]: 返回所有 {len(staff_names)} 位師傅")
+            return staff_names
     
-    # 來自 main.py extract_staff_name 函數的多種匹配模式
-    for eng_name, chinese_name in staff_mapping.items():
-        # eng_name 已經是大寫，chinese_name 是對應的中文名
-        
-        # 如果這個人的中文名已經被找到了，跳過英文名匹配
-        if chinese_name in found_chinese_names:
-            continue
-            
-        # 使用負向斷言：前後不能是英文字母（避免部分匹配，如 YU 匹配到 YUAN）
-        # 這樣可以正確處理中英文混合（中文字符不會干擾匹配）
-        pattern = r'(?<![A-Z])' + re.escape(eng_name) + r'(?![A-Z])'
-        
-        if re.search(pattern, upper_text):
-            # 將英文名轉換為對應的中文名，確保只加入中文名
-            print(f"DEBUG [StaffNames]: ✅ 找到英文名: {eng_name} -> {chinese_name}")
-            found_chinese_names.add(chinese_name)
+    if not matcher.staff_mapping:
+        print(f"DEBUG [StaffNames]: ❗ 無法獲取師傅名單")
+        return []
     
-    # 轉換為列表並返回，確保只回傳中文名
-    result = list(found_chinese_names)
+    # 一次掃描同時比對中文名（直接字串匹配）與英文名（轉大寫、前後不可為英文字母）
+    # 英文名轉換為對應的中文名，確保同一人只回傳一次，且只回傳中文名
+    result = matcher.find_staff_names(text)
     print(f"DEBUG [StaffNames]: ✅ 最終找到 {len(result)} 位師傅: {result}")
     return result
 
 
+def getStaffNamesFromTokens(tokens) -> List[str]:
+    """
+    由 booking_lexer 產生的 token 取得員工姓名（規則與 getStaffNames 相同）
+
+    有「不指定」等 RESERVATION_CUE 時返回所有師傅，否則依 STAFF token 出現順序返回中文名
+
+    Args:
+        tokens: booking_lexer.BookingTokens
+
+    Returns:
+        List[str]: 找到的員工姓名列表（中文名稱）
+    """
+    matcher = tokens.matcher
+    if matcher is None:
+        return []
+    if tokens.no_preference_keyword:
+        print(f"DEBUG [StaffNames]: ⭐️ 檢測到「{tokens.no_preference_keyword}」關鍵詞")
+        staff_names = matcher.staff_names
+        if staff_names:
+            print(f"DEBUG [StaffNames]: 返回所有 {len(staff_names)} 位師傅")
+        return staff_names
+    result = tokens.staff_names
+    if result:
+        print(f"DEBUG [StaffNames]: ✅ 最終找到 {len(result)} 位師傅: {result}")
+    return result
+
+
 def extractStaffNamesByPattern(text: str) -> List[str]:
     """
     通過特定模式提取員工姓名（更嚴格的匹配）
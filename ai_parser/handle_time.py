@@ -3,18 +3,9 @@
 
 import re
 from datetime import datetime, timedelta
-try:
-    from .handle_time_utils import convert_chinese_numerals_to_arabic, preprocess_text
-    from .handle_time_date import parse_date_component
-    from .handle_time_time import parse_time_component
-except ImportError:
-    # 絕對導入作為備選
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from handle_time_utils import convert_chinese_numerals_to_arabic, preprocess_text
-    from handle_time_date import parse_date_component
-    from handle_time_time import parse_time_component
+from .handle_time_utils import convert_chinese_numerals_to_arabic, preprocess_text
+from .handle_time_date import parse_date_component
+from .handle_time_time import parse_time_component
 
 
 def round_minutes_to_nearest_five(minutes: int) -> int:
@@ -433,12 +424,8 @@ def is_time_query(text):
     檢測是否為時間查詢相關的關鍵詞
     重新導出自 handle_time_time 模組
     """
-    try:
-        from .handle_time_time import is_time_query as _is_time_query
-        return _is_time_query(text)
-    except ImportError:
-        from handle_time_time import is_time_query as _is_time_query
-        return _is_time_query(text)
+    from .handle_time_time import is_time_query as _is_time_query
+    return _is_time_query(text)
 
 
 def _is_availability_query(text):
@@ -446,12 +433,8 @@ def _is_availability_query(text):
     檢測是否為可用性查詢
     重新導出自 handle_time_time 模組
     """
-    try:
-        from .handle_time_time import _is_availability_query as _is_avail_query
-        return _is_avail_query(text)
-    except ImportError:
-        from handle_time_time import _is_availability_query as _is_avail_query
-        return _is_avail_query(text)
+    from .handle_time_time import _is_availability_query as _is_avail_query
+    return _is_avail_query(text)
 
 
 def _should_clear_time_for_availability_query(text):
@@ -459,12 +442,8 @@ def _should_clear_time_for_availability_query(text):
     檢測是否應該為可用性查詢清空時間字段
     重新導出自 handle_time_time 模組
     """
-    try:
-        from .handle_time_time import _should_clear_time_for_availability_query as _should_clear
-        return _should_clear(text)
-    except ImportError:
-        from handle_time_time import _should_clear_time_for_availability_query as _should_clear
-        return _should_clear(text)
+    from .handle_time_time import _should_clear_time_for_availability_query as _should_clear
+    return _should_clear(text)
 
 
 # ==================== 內部組件導出（僅供單元測試使用） ====================
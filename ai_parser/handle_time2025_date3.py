@@ -1,6 +1,16 @@
 import re
 from datetime import datetime
-from handle_time2025_util import chinese_to_arabic
+from .handle_time2025_util import chinese_to_arabic
+
+# 匹配模式（預先編譯），extractor 以 (match, 當前年份, 當前月份) 返回 (年, 月, 日)
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{4})年(\d+)月(\d+)日'), lambda m, y, mo: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),  # 年 月 日
+    (re.compile(r'(\d{4})年(\d+)月(\d+)號'), lambda m, y, mo: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),  # 年 月 號
+    (re.compile(r'(\d+)月(\d+)日'), lambda m, y, mo: (y, int(m.group(1)), int(m.group(2)))),            # 月 日 (本年)
+    (re.compile(r'(\d+)月(\d+)號'), lambda m, y, mo: (y, int(m.group(1)), int(m.group(2)))),            # 月 號 (本年)
+    (re.compile(r'(\d+)日'), lambda m, y, mo: (y, mo, int(m.group(1)))),                                # 日 (本月本年)
+    (re.compile(r'(\d+)號'), lambda m, y, mo: (y, mo, int(m.group(1)))),                                # 號 (本月本年)
+]
 
 def format_date_string_3(date_str):
     """
@@ -16,19 +26,10 @@ def format_date_string_3(date_str):
     processed_str = chinese_to_arabic(date_str)
 
     # 匹配模式，現在都是阿拉伯數字
-    patterns = [
-        (r'(\d{4})年(\d+)月(\d+)日', lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),  # 年 月 日
-        (r'(\d{4})年(\d+)月(\d+)號', lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),  # 年 月 號
-        (r'(\d+)月(\d+)日', lambda m: (current_year, int(m.group(1)), int(m.group(2)))),            # 月 日 (本年)
-        (r'(\d+)月(\d+)號', lambda m: (current_year, int(m.group(1)), int(m.group(2)))),            # 月 號 (本年)
-        (r'(\d+)日', lambda m: (current_year, current_month, int(m.group(1)))),                     # 日 (本月本年)
-        (r'(\d+)號', lambda m: (current_year, current_month, int(m.group(1)))),                     # 號 (本月本年)
-    ]
-
-    for pattern, extractor in patterns:
-        match = re.match(pattern, processed_str)
+    for pattern, extractor in _DATE_PATTERNS:
+        match = pattern.match(processed_str)
         if match:
-            year, month, day = extractor(match)
+            year, month, day = extractor(match, current_year, current_month)
             try:
                 # 構造日期
                 date = datetime(year, month, day)
@@ -1,6 +1,25 @@
 import re
 from datetime import datetime, timedelta
 
+# 預先編譯的星期模式（順序即優先順序）
+_WEEKDAY_PATTERNS = [
+    re.compile(r'下下\s*(?:星期|週|周)([一二三四五六日天1234567])'),  # 下下星期X
+    re.compile(r'下\s*(?:星期|週|周)([一二三四五六日天1234567])'),     # 下星期X
+    re.compile(r'上\s*(?:星期|週|周)([一二三四五六日天1234567])'),     # 上星期X
+    re.compile(r'(?:這|这|本)\s*(?:星期|週|周)([一二三四五六日天1234567])'),  # 這星期X/本週X
+    re.compile(r'(?:星期|週|周)([一二三四五六日天1234567])'),  # 星期X/週X/周X（無前綴）
+    re.compile(r'禮拜([一二三四五六日天1234567])'),  # 禮拜X
+]
+_WEEKDAY_MAP = {
+    '一': 0, '1': 0,
+    '二': 1, '2': 1,
+    '三': 2, '3': 2,
+    '四': 3, '4': 3,
+    '五': 4, '5': 4,
+    '六': 5, '6': 5,
+    '日': 6, '天': 6, '7': 6
+}
+
 def format_date_string_4(date_str):
     """
     處理 "下週" "下星期" "上週" "上星期" "下下週" "下下星期" 相關字串，轉為標準日期格式。
@@ -10,29 +29,12 @@ def format_date_string_4(date_str):
     original_text = date_str
     cleaned_text = date_str.replace(' ', '')
 
-    weekday_patterns = [
-        r'下下\s*(?:星期|週|周)([一二三四五六日天1234567])',  # 下下星期X
-        r'下\s*(?:星期|週|周)([一二三四五六日天1234567])',     # 下星期X
-        r'上\s*(?:星期|週|周)([一二三四五六日天1234567])',     # 上星期X
-        r'(?:這|这|本)\s*(?:星期|週|周)([一二三四五六日天1234567])',  # 這星期X/本週X
-        r'(?:星期|週|周)([一二三四五六日天1234567])',  # 星期X/週X/周X（無前綴）
-        r'禮拜([一二三四五六日天1234567])',  # 禮拜X
-    ]
-    weekday_map = {
-        '一': 0, '1': 0,
-        '二': 1, '2': 1,
-        '三': 2, '3': 2,
-        '四': 3, '4': 3,
-        '五': 4, '5': 4,
-        '六': 5, '6': 5,
-        '日': 6, '天': 6, '7': 6
-    }
-    for pattern in weekday_patterns:
-        weekday_match = re.search(pattern, original_text) or re.search(pattern, cleaned_text)
+    for pattern in _WEEKDAY_PATTERNS:
+        weekday_match = pattern.search(original_text) or pattern.search(cleaned_text)
         if weekday_match:
             match_text = weekday_match.group(0)
             weekday_char = weekday_match.group(1)
-            target_weekday = weekday_map.get(weekday_char)
+            target_weekday = _WEEKDAY_MAP.get(weekday_char)
             if target_weekday is not None:
                 current_weekday = now.weekday()
                 # 下下星期
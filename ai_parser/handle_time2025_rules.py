@@ -0,0 +1,208 @@
+# 日期/時間字串擷取規則表
+# 用於 handle_time2025 的 extra_date_string / extra_time_string
+#
+# 所有規則在第一次比對時編譯一次，並依優先順序排列；
+# 每條規則另外記錄一段「必要字面字串」（如 "星期"、"點半"、":"），
+# 訊息中沒有該字串的規則直接跳過，不需執行正則比對。
+# 結果與原本逐條 re.search、取第一個成立的規則完全相同。
+
+import re
+
+# 規則中以 (?P<value>...) 標示要回傳的部分，未標示則回傳整段比對結果
+_VALUE_GROUP = 'value'
+
+# 推導必要字面字串時要移除的正則語法
+_ALT_GROUP_RE = re.compile(r'\(\?:[^()]*\|[^()]*\)')
+_CLASS_RE = re.compile(r'\[[^\]]*\]')
+_ESCAPE_RE = re.compile(r'\\.')
+_QUANTIFIER_RE = re.compile(r'\{\d+(?:,\d*)?\}')
+_GROUP_PREFIX_RE = re.compile(r'\(\?P<\w+>|\(\?:')
+_OPTIONAL_CHAR_RE = re.compile(r'.[?*]')
+_SPECIAL_SPLIT_RE = re.compile(r'[\0()?*+.^$]')
+
+
+def required_literal(pattern):
+    """
+    推導規則比對成功時一定會出現的字面字串（取最長的一段），無法推導時返回空字串
+
+    例：r'下下星期[一二三四五六日]' -> '下下星期'，r'\d{1,2}:\d{2}' -> ':'
+    """
+    stripped = _ALT_GROUP_RE.sub('\0', pattern)
+    stripped = _CLASS_RE.sub('\0', stripped)
+    stripped = _ESCAPE_RE.sub('\0', stripped)
+    stripped = _QUANTIFIER_RE.sub('\0', stripped)
+    stripped = _GROUP_PREFIX_RE.sub('\0', stripped)
+    stripped = _OPTIONAL_CHAR_RE.sub('\0', stripped)
+    if '|' in stripped:
+        return ''
+    return max(_SPECIAL_SPLIT_RE.split(stripped), key=len)
+
+
+class PriorityRuleTable:
+    """
+    依優先順序排列的正則規則表
+
+    Args:
+        rules: [(pattern, transform), ...]，排在前面的規則優先；
+               transform 為可選的後處理函數（輸入比對到的字串）
+    """
+
+    def __init__(self, rules):
+        self._patterns = list(rules)
+        self._rules = None
+
+    def _compile(self):
+        """第一次比對時才編譯（import 時不編譯，加快啟動）"""
+        rules = []
+        for pattern, transform in self._patterns:
+            regex = re.compile(pattern)
+            rules.append((regex, required_literal(pattern), _VALUE_GROUP in regex.groupindex, transform))
+        self._rules = rules
+        return rules
+
+    def search(self, text):
+        """返回第一個成立的規則所比對到的字串（已套用 transform），找不到時返回 None"""
+        rules = self._rules if self._rules is not None else self._compile()
+        for regex, literal, has_value_group, transform in rules:
+            if literal and literal not in text:
+                continue
+            match = regex.search(text)
+            if match:
+                value = match.group(_VALUE_GROUP) if has_value_group else match.group(0)
+                return transform(value) if transform else value
+        return None
+
+
+def _digits_then(suffix):
+    """am10 -> 10am, pm10 -> 10pm"""
+    def transform(value):
+        return re.search(r'\d+', value).group(0) + suffix
+    return transform
+
+
+# 日期：先檢查完全匹配的關鍵字，然後是正則表達式，順序從具體到一般
+DATE_EXACT_KEYWORDS = ["大前天", "前天", "昨天", "昨日", "昨兒", "今天", "今兒", "本日", "這天", "本天", "今日", "明日", "明兒", "明天", "後天", "後日", "大後天", "近日", "近日內", "現在", "立刻", "馬上", "等下", "等一下"]
+
+DATE_PATTERNS = [
+    r'下下星期[一二三四五六日]',
+    r'下下週[一二三四五六日]',
+    r'下星期[一二三四五六日]',
+    r'下週[一二三四五六日]',
+    r'上星期[一二三四五六日]',
+    r'上週[一二三四五六日]',
+    r'本星期[一二三四五六日]',
+    r'本週[一二三四五六日]',
+    r'下個月\d+號',
+    r'下個月\d+日',
+    r'上個月\d+號',
+    r'上個月\d+日',
+    r'\d{4}年\d+月\d+日',
+    r'明年\d+月\d+日',
+    r'去年\d+月\d+日',
+    r'今年\d+月\d+日',
+    r'後年\d+月\d+日',
+    r'明年春節',
+    r'去年中秋節',
+    r'今年五一勞動節',
+    r'後年國慶節',
+    r'明年端午節',
+    r'去年重陽節',
+    r'今年教師節',
+    r'後年元旦',
+    r'明年七夕節',
+    r'去年兒童節',
+    r'今年植樹節',
+    r'後年婦女節',
+    r'明年聖誕節',
+    r'去年萬聖節',
+    r'今年感恩節',
+    r'後年情人節',
+    r'明年清明節',
+    r'去年元宵節',
+    r'今年建黨節',
+    r'後年航海日',
+    r'明年春分',
+    r'去年秋分',
+    r'今年冬至',
+    r'後年夏至',
+    r'\d+月\d+日',
+    r'\d+月\d+號',
+    r'\d{4}/\d{1,2}/\d{1,2}',  # YYYY/MM/DD
+    r'\d{4}-\d{1,2}-\d{1,2}',  # YYYY-MM-DD
+    r'\d{1,2}/\d{1,2}',        # MM/DD
+    r'\d{1,2}-\d{1,2}',         # MM-DD
+    r'\d+日',
+    r'\d+號'
+]
+
+# 時間：在中文數字轉換為阿拉伯數字後的字串上比對，順序從具體到一般
+TIME_PATTERNS = [
+    (r'\d{1,2}:\d{2}', None),      # 11:30, 21:00
+    (r'\d{1,2}am', None),          # 10am
+    (r'am\d{1,2}', _digits_then('am')),  # am10
+    (r'\d{1,2}pm', None),          # 11pm
+    (r'pm\d{1,2}', _digits_then('pm')),  # pm10
+    (r'早上\d+點半', None),        # 早上三點半
+    (r'早上[一二兩三四五六七八九十]+點半', None),  # 早上三點半 (中文)
+    (r'上午\d+點半', None),        # 上午三點半
+    (r'上午[一二兩三四五六七八九十]+點半', None),  # 上午三點半 (中文)
+    (r'中午\d+點半', None),        # 中午12點半
+    (r'中午[一二兩三四五六七八九十]+點半', None),  # 中午十二點半 (中文)
+    (r'下午\d+點半', None),        # 下午3點半
+    (r'下午[一二兩三四五六七八九十]+點半', None),  # 下午三點半 (中文)
+    (r'傍晚\d+點半', None),        # 傍晚6點半
+    (r'傍晚[一二兩三四五六七八九十]+點半', None),  # 傍晚六點半 (中文)
+    (r'晚上\d+點半', None),        # 晚上七點半, 晚上8點半
+    (r'晚上[一二兩三四五六七八九十]+點半', None),  # 晚上七點半 (中文)
+    (r'凌晨\d+點半', None),        # 凌晨3點半
+    (r'凌晨[一二兩三四五六七八九十]+點半', None),  # 凌晨三點半 (中文)
+    (r'清晨\d+點半', None),        # 清晨5點半
+    (r'清晨[一二兩三四五六七八九十]+點半', None),  # 清晨五點半 (中文)
+    (r'深夜\d+點半', None),        # 深夜12點半
+    (r'深夜[一二兩三四五六七八九十]+點半', None),  # 深夜十二點半 (中文)
+    (r'午夜\d+點半', None),        # 午夜1點半
+    (r'午夜[一二兩三四五六七八九十]+點半', None),  # 午夜一點半 (中文)
+    (r'早上\d+點', None),          # 早上三點
+    (r'早上[一二兩三四五六七八九十]+點', None),    # 早上三點 (中文)
+    (r'上午\d+點', None),          # 上午三點
+    (r'上午[一二兩三四五六七八九十]+點', None),    # 上午三點 (中文)
+    (r'中午\d+點', None),          # 中午12點
+    (r'中午[一二兩三四五六七八九十]+點', None),    # 中午十二點 (中文)
+    (r'中午', None),                # 中午（默認12點）
+    (r'下午\d+點', None),          # 下午3點
+    (r'下午[一二兩三四五六七八九十]+點', None),    # 下午三點 (中文)
+    (r'傍晚\d+點', None),          # 傍晚6點
+    (r'傍晚[一二兩三四五六七八九十]+點', None),    # 傍晚六點 (中文)
+    (r'晚上\d+點', None),          # 晚上七點, 晚上8點
+    (r'晚上[一二兩三四五六七八九十]+點', None),    # 晚上七點 (中文)
+    (r'凌晨\d+點', None),          # 凌晨3點
+    (r'凌晨[一二兩三四五六七八九十]+點', None),    # 凌晨三點 (中文)
+    (r'清晨\d+點', None),          # 清晨5點
+    (r'清晨[一二兩三四五六七八九十]+點', None),    # 清晨五點 (中文)
+    (r'深夜\d+點', None),          # 深夜12點
+    (r'深夜[一二兩三四五六七八九十]+點', None),    # 深夜十二點 (中文)
+    (r'午夜\d+點', None),          # 午夜1點
+    (r'午夜[一二兩三四五六七八九十]+點', None),    # 午夜一點 (中文)
+    (r'\d+點半', None),            # 一點半
+    (r'[一二兩三四五六七八九十]+點半', None),      # 三點半 (中文)
+    (r'\d+點', None),              # 二點, 十一點
+    (r'[一二兩三四五六七八九十]+點', None),        # 三點 (中文)
+    (r'早上', None),                # 早上（默認9點）
+    (r'上午', None),                # 上午（默認9點）
+    (r'下午', None),                # 下午（默認13點）
+    (r'傍晚', None),                # 傍晚（默認17點）
+    (r'晚上', None),                # 晚上（默認18點）
+    (r'凌晨', None),                # 凌晨（默認1點）
+    (r'清晨', None),                # 清晨（默認6點）
+    (r'深夜', None),                # 深夜（默認22點）
+    (r'午夜', None),                # 午夜（默認24點）
+    # 中文數字時間（在轉換後應該不會匹配了）
+    (r'(?:^|[^一二兩三四五六七八九十])(?P<value>[一二兩三四五六七八九十]+點半)(?:[^一二兩三四五六七八九十]|$)', None),  # 一點半, 兩點半
+    (r'(?:^|[^一二兩三四五六七八九十])(?P<value>[一二兩三四五六七八九十]+點)(?:[^一二兩三四五六七八九十]|$)', None),    # 一點, 兩點, 十點
+]
+
+DATE_RULES = PriorityRuleTable(
+    [(re.escape(keyword), None) for keyword in DATE_EXACT_KEYWORDS]
+    + [(pattern, None) for pattern in DATE_PATTERNS]
+)
+TIME_RULES = PriorityRuleTable(TIME_PATTERNS)
@@ -1,6 +1,30 @@
 # 處理中文時間字串 X點X分  X點半 X時
 import re
-from handle_time2025_util import chinese_to_arabic
+from .handle_time2025_util import chinese_to_arabic
+
+# 只有時間段詞時的預設時間
+_PERIOD_DEFAULTS = {
+	'早上': "09:00", '上午': "09:00",
+	'中午': "12:00",
+	'下午': "13:00",
+	'傍晚': "17:00",
+	'晚上': "18:00",
+	'凌晨': "01:00",
+	'清晨': "06:00",
+	'深夜': "22:00",
+	'午夜': "24:00",
+}
+
+# 預先編譯的時間格式
+_PERIOD_PREFIX_RE = re.compile(r'(上午|下午|中午|晚上|早上|凌晨|清晨|傍晚|深夜|午夜)')
+_COLONS_RE = re.compile(r':+')
+_HALF_HOUR_RE = re.compile(r'^(\d{1,2})[\.|．](5|30)$')
+_HOUR_RE = re.compile(r'^\d{1,2}$')
+_HOUR_MINUTE_RE = re.compile(r'^\d{1,2}:\d{1,2}$')
+_HOUR_MINUTE_SECOND_RE = re.compile(r'^\d{1,2}:\d{1,2}:\d{1,2}$')
+_HOUR_SINGLE_MINUTE_RE = re.compile(r'^\d{1,2}:\d$')
+_HHMM_RE = re.compile(r'^\d{1,2}:\d{2}$')
+_HHMMSS_RE = re.compile(r'^\d{1,2}:\d{2}:\d{2}$')
 
 def format_time_string_1(time_str, time_format_type=3):
 	"""
@@ -11,51 +35,12 @@ def format_time_string_1(time_str, time_format_type=3):
 	s = chinese_to_arabic(time_str)
 	
 	# 檢查是否只有時間段詞
-	if s.strip() == '早上' or s.strip() == '上午':
-		if time_format_type == 3:
-			return "09:00:00"
-		else:
-			return "09:00"
-	elif s.strip() == '中午':
-		if time_format_type == 3:
-			return "12:00:00"
-		else:
-			return "12:00"
-	elif s.strip() == '下午':
-		if time_format_type == 3:
-			return "13:00:00"
-		else:
-			return "13:00"
-	elif s.strip() == '傍晚':
-		if time_format_type == 3:
-			return "17:00:00"
-		else:
-			return "17:00"
-	elif s.strip() == '晚上':
-		if time_format_type == 3:
-			return "18:00:00"
-		else:
-			return "18:00"
-	elif s.strip() == '凌晨':
-		if time_format_type == 3:
-			return "01:00:00"
-		else:
-			return "01:00"
-	elif s.strip() == '清晨':
-		if time_format_type == 3:
-			return "06:00:00"
-		else:
-			return "06:00"
-	elif s.strip() == '深夜':
-		if time_format_type == 3:
-			return "22:00:00"
-		else:
-			return "22:00"
-	elif s.strip() == '午夜':
+	default_time = _PERIOD_DEFAULTS.get(s.strip())
+	if default_time:
 		if time_format_type == 3:
-			return "24:00:00"
+			return default_time + ":00"
 		else:
-			return "24:00"
+			return default_time
 	
 	# 處理上午/下午時間轉換
 	hour_offset = 0
@@ -68,34 +53,34 @@ def format_time_string_1(time_str, time_format_type=3):
 		hour_offset = 12
 	
 	# 移除時間前綴
-	s = re.sub(r'(上午|下午|中午|晚上|早上|凌晨|清晨|傍晚|深夜|午夜)', '', s)
+	s = _PERIOD_PREFIX_RE.sub('', s)
 	
 	s = s.replace('點半', ':30').replace('點', ':').replace('時', ':').replace('分', '').replace('：', ':')
-	s = re.sub(r':+', ':', s)
+	s = _COLONS_RE.sub(':', s)
 	s = s.strip(':')
 	
 	# 將 12.5 轉為 12:30
-	match = re.match(r'^(\d{1,2})[\.|．](5|30)$', s)
+	match = _HALF_HOUR_RE.match(s)
 	if match:
 		hour = int(match.group(1)) + hour_offset
 		minute = 30
 		s = f"{hour}:{minute:02d}"
 	# 若只有小時
-	elif re.match(r'^\d{1,2}$', s):
+	elif _HOUR_RE.match(s):
 		hour = int(s) + hour_offset
 		s = f"{hour}:00"
 	# 若只有小時:分鐘
-	elif re.match(r'^\d{1,2}:\d{1,2}$', s):
+	elif _HOUR_MINUTE_RE.match(s):
 		hour, minute = map(int, s.split(':'))
 		hour += hour_offset
 		s = f"{hour}:{minute:02d}"
 	# 若已經有秒
-	elif re.match(r'^\d{1,2}:\d{1,2}:\d{1,2}$', s):
+	elif _HOUR_MINUTE_SECOND_RE.match(s):
 		hour, minute, second = map(int, s.split(':'))
 		hour += hour_offset
 		s = f"{hour}:{minute:02d}:{second:02d}"
 	# 若有小時:分鐘:但分鐘為一位數
-	elif re.match(r'^\d{1,2}:\d$', s):
+	elif _HOUR_SINGLE_MINUTE_RE.match(s):
 		hour, minute = s.split(':')
 		hour = int(hour) + hour_offset
 		s = f"{hour}:{int(minute):02d}"
@@ -103,12 +88,12 @@ def format_time_string_1(time_str, time_format_type=3):
 
 	if time_format_type == 3:
 		# 轉為 HH:MM:00
-		if re.match(r'^\d{1,2}:\d{2}$', s):
+		if _HHMM_RE.match(s):
 			s = s + ':00'
-		elif re.match(r'^\d{1,2}:\d{2}:\d{2}$', s):
+		elif _HHMMSS_RE.match(s):
 			pass
 	elif time_format_type == 2:
 		# 只保留 HH:MM
-		if re.match(r'^\d{1,2}:\d{2}:\d{2}$', s):
+		if _HHMMSS_RE.match(s):
 			s = ':'.join(s.split(':')[:2])
 	return s
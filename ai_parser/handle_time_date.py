@@ -3,13 +3,7 @@
 
 import re
 from datetime import datetime, timedelta
-try:
-    from .handle_time_utils import convert_chinese_numerals_to_arabic
-except ImportError:
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from handle_time_utils import convert_chinese_numerals_to_arabic
+from .handle_time_utils import convert_chinese_numerals_to_arabic
 
 
 def parse_date(text):
@@ -383,10 +377,7 @@ def parse_direct_datetime_combination(original_text, cleaned_text, now, format_d
     直接解析包含日期+时间数字的表达式，如"今天1400"或"明天9點"
     這是 handle_time_date.py 和 handle_time_time.py 的協作函數
     """
-    try:
-        from .handle_time_time import parse_direct_datetime_time_part
-    except ImportError:
-        from handle_time_time import parse_direct_datetime_time_part
+    from .handle_time_time import parse_direct_datetime_time_part
     
     # 日期关键词+数字时间模式
     date_time_patterns = [
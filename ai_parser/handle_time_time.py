@@ -3,13 +3,7 @@
 
 import re
 from datetime import datetime, timedelta
-try:
-    from .handle_time_utils import convert_chinese_numerals_to_arabic
-except ImportError:
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from handle_time_utils import convert_chinese_numerals_to_arabic
+from .handle_time_utils import convert_chinese_numerals_to_arabic
 
 
 def parse_time_component(original_text, cleaned_text, now=None, date_result=None):
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+師傅 / 分店名稱比對模組
+
+以單一 Aho-Corasick 自動機同時比對：
+- 師傅中文名（區分大小寫，等同 `name in text`）
+- 師傅英文名（不分大小寫，前後不可為英文字母，等同 `(?<![A-Z])NAME(?![A-Z])`）
+- 分店別名（BRANCH_MAPPING）
+- 店家中文名（Store.name，供多國語系佔位符使用）
+
+自動機依 Staffs / Store 表的最後更新時間建立一次（由 modules.table_versions 在背景偵測變動），供
+handle_staff.getStaffNames、appointment_analysis 的分店分析、
+multilang 的佔位符與師傅名稱轉換共用，每則訊息只需線性掃描一次、不查詢資料庫。
+"""
+
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from core.database import db_config
+
+# 店家名稱映射（地）- 來自 natural_language_parser.py
+BRANCH_MAPPING = {
+    '西門': '西門',
+    '延吉': '延吉',
+    '西門店': '西門',
+    '延吉店': '延吉',
+    '西': '西門',
+    '延': '延吉',
+    '大巨蛋': '延吉',
+    '台北巨蛋': '延吉',
+    '西門二店': '家樂福',
+    '西寧': '家樂福',
+    '家樂福店': '家樂福'
+}
+
+# 比對結果種類
+KIND_STAFF = 'staff'          # 師傅中文名，value = 中文名
+KIND_STAFF_EN = 'staff_en'    # 師傅英文名，value = 對應中文名
+KIND_BRANCH = 'branch'        # 分店別名，value = 分店名稱
+KIND_STORE = 'store'          # 店家中文名，value = 店家英文名
+
+# start/end 為原文中的位置（半開區間），key 為比對到的名稱（英文名為大寫）
+NameMatch = namedtuple('NameMatch', ['start', 'end', 'kind', 'key', 'value'])
+
+_VERSION_TABLES = ('Staffs', 'Store')
+
+
+def _is_ascii_upper(ch: str) -> bool:
+    return 'A' <= ch <= 'Z'
+
+
+def _fold(ch: str) -> str:
+    """逐字轉大寫（轉換後長度改變的字元保持原樣，確保位置不變）"""
+    upper = ch.upper()
+    return upper if len(upper) == 1 else ch
+
+
+def _is_english_bounded(text: str, start: int, end: int) -> bool:
+    """英文名前後不可為英文字母（避免 YU 匹配到 YUAN）"""
+    if start > 0 and _is_ascii_upper(_fold(text[start - 1])):
+        return False
+    if end < len(text) and _is_ascii_upper(_fold(text[end])):
+        return False
+    return True
+
+
+class AhoCorasick:
+    """多模式字串比對自動機，一次掃描找出所有（含重疊）出現位置"""
+
+    __slots__ = ('_goto', '_fail', '_out', '_built')
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, pattern_id: int):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(pattern_id)
+        self._built = False
+
+    def build(self):
+        """以 BFS 建立失敗連結，並合併輸出"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+        self._built = True
+
+    def iter_matches(self, chars):
+        """依序產生 (結束位置, pattern_id)，結束位置為最後一個字元的索引"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, ch in enumerate(chars):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                yield index, pattern_id
+
+
+class NameMatcher:
+    """
+    師傅 / 分店名稱比對器
+
+    Args:
+        staff_rows: [(中文名, 英文名), ...]，來自 Staffs 表
+        store_mapping: 店家中文名 -> 英文名，來自 Store 表
+        branch_mapping: 分店別名 -> 分店名稱
+    """
+
+    def __init__(self, staff_rows: List[Tuple[str, str]], store_mapping: Dict[str, str],
+                 branch_mapping: Optional[Dict[str, str]] = None):
+        # 英文名（大寫）-> 中文名，與 staff_utils.getStaffMapping 相同
+        self.staff_mapping: Dict[str, str] = {}
+        # 中文名 -> 英文名，與 multilang.get_staff_name_mapping 相同
+        self.staff_name_mapping: Dict[str, str] = {}
+        for chinese_name, english_name in staff_rows:
+            if english_name:
+                self.staff_mapping[english_name.upper()] = chinese_name
+            if chinese_name and english_name:
+                self.staff_name_mapping[chinese_name] = english_name
+        self.store_mapping: Dict[str, str] = dict(store_mapping or {})
+        self.branch_mapping: Dict[str, str] = dict(branch_mapping if branch_mapping is not None else BRANCH_MAPPING)
+        # Staffs / Store 表的最後更新時間（由共用比對器設定，無法取得時為 None）
+        self.version: Optional[Tuple] = None
+        # 分店別名、店家、師傅中文名的優先順序（與 sorted(..., key=len, reverse=True) 相同），建立時計算一次
+        self._branch_rank = {
+            key: rank for rank, key in
+            enumerate(sorted(self.branch_mapping.keys(), key=len, reverse=True))
+        }
+        self._store_rank = {
+            name: rank for rank, name in
+            enumerate(sorted(self.store_mapping.keys(), key=len, reverse=True))
+        }
+        self._staff_rank = {
+            name: rank for rank, name in
+            enumerate(sorted(self.staff_name_mapping.keys(), key=len, reverse=True))
+        }
+
+        # pattern_id -> (原始名稱, 種類, 值)
+        self._patterns: List[Tuple[str, str, str]] = []
+        self._automaton = AhoCorasick()
+        self._staff_name_set = set(self.staff_mapping.values())
+        for chinese_name in self._staff_name_set | set(self.staff_name_mapping):
+            self._add(chinese_name, KIND_STAFF, chinese_name)
+        for english_name, chinese_name in self.staff_mapping.items():
+            self._add(english_name, KIND_STAFF_EN, chinese_name)
+        for alias, branch in self.branch_mapping.items():
+            self._add(alias, KIND_BRANCH, branch)
+        for chinese_name, english_name in self.store_mapping.items():
+            self._add(chinese_name, KIND_STORE, english_name)
+        self._automaton.build()
+
+    def _add(self, key: str, kind: str, value: str):
+        if not key:
+            return
+        self._automaton.add(''.join(_fold(ch) for ch in key), len(self._patterns))
+        self._patterns.append((key, kind, value))
+
+    @property
+    def staff_names(self) -> List[str]:
+        """所有師傅中文名（去重）"""
+        return list(self._staff_name_set)
+
+    def find_all(self, text: str, english_boundary: bool = True) -> List[NameMatch]:
+        """
+        一次掃描找出所有名稱（含重疊），依 (start, end) 排序
+
+        english_boundary=False 時英文名不檢查前後字母（供 select_english_bounded 之後再篩選）
+        """
+        if not text:
+            return []
+        matches = []
+        for end_index, pattern_id in self._automaton.iter_matches(_fold(ch) for ch in text):
+            key, kind, value = self._patterns[pattern_id]
+            start = end_index - len(key) + 1
+            end = end_index + 1
+            if kind == KIND_STAFF_EN:
+                if english_boundary and not _is_english_bounded(text, start, end):
+                    continue
+            elif text[start:end] != key:
+                # 中文名、分店、店家名稱區分大小寫
+                continue
+            matches.append(NameMatch(start, end, kind, key, value))
+        matches.sort(key=lambda m: (m.start, m.end))
+        return matches
+
+    def select_english_bounded(self, text: str, matches: List[NameMatch]) -> List[NameMatch]:
+        """從 find_all(english_boundary=False) 的結果中，去除前後為英文字母的英文名"""
+        return [
+            match for match in matches
+            if match.kind != KIND_STAFF_EN or _is_english_bounded(text, match.start, match.end)
+        ]
+
+    def find_connected_staff(self, text: str, connectors: List[str],
+                             matches: Optional[List[NameMatch]] = None) -> Optional[Tuple[int, int]]:
+        """
+        找出「師傅名 + 連接詞 + 師傅名」（如 "鞋和豪"、"camper&simon"），返回 (start, end)，找不到時返回 None
+
+        英文名與連接詞不分大小寫，英文名不檢查前後字母，
+        等同 (中文名|英文名)(?:連接詞)(中文名|英文名) 的 re.search(..., re.IGNORECASE)
+        """
+        if matches is None:
+            matches = self.find_all(text, english_boundary=False)
+        staff_matches = [
+            match for match in matches
+            if match.kind == KIND_STAFF_EN or (match.kind == KIND_STAFF and match.value in self._staff_name_set)
+        ]
+        ends_by_start: Dict[int, int] = {}
+        for match in staff_matches:
+            ends_by_start[match.start] = max(match.end, ends_by_start.get(match.start, match.end))
+        for match in staff_matches:
+            for connector in connectors:
+                next_start = match.end + len(connector)
+                if next_start in ends_by_start and text[match.end:next_start].lower() == connector.lower():
+                    return match.start, ends_by_start[next_start]
+        return None
+
+    def find_staff_names(self, text: str, matches: Optional[List[NameMatch]] = None) -> List[str]:
+        """師傅中文名列表（英文名轉為中文名，同一人只回傳一次，依出現順序）"""
+        if matches is None:
+            matches = self.find_all(text)
+        found = []
+        for match in matches:
+            if match.kind == KIND_STAFF and match.value not in self._staff_name_set:
+                continue
+            if match.kind in (KIND_STAFF, KIND_STAFF_EN) and match.value not in found:
+                found.append(match.value)
+        return found
+
+    def find_branch(self, text: str, matches: Optional[List[NameMatch]] = None) -> str:
+        """最長的分店別名所對應的分店，找不到時返回空字串"""
+        if matches is None:
+            matches = self.find_all(text)
+        best = None
+        for match in matches:
+            if match.kind != KIND_BRANCH:
+                continue
+            rank = self._branch_rank[match.key]
+            if best is None or rank < best[0]:
+                best = (rank, match.value)
+        return best[1] if best else ''
+
+    def replace_names(self, text: str) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+        """
+        將店家與師傅中文名替換為佔位符（%S1%、%W1%...）
+
+        結果與「先店家後師傅、各自依長度由長到短逐一 str.replace」相同：
+        依該優先順序接受不與已接受區段重疊的出現位置。
+        """
+        if not text:
+            return text, {}
+
+        store_rank, staff_rank = self._store_rank, self._staff_rank
+        candidates = []
+        for match in self.find_all(text):
+            if match.kind == KIND_STORE:
+                candidates.append(((0, store_rank[match.key], match.start), match))
+            elif match.kind == KIND_STAFF and match.key in staff_rank:
+                candidates.append(((1, staff_rank[match.key], match.start), match))
+        if not candidates:
+            return text, {}
+        candidates.sort(key=lambda item: item[0])
+
+        occupied = [False] * len(text)
+        accepted = []
+        for _, match in candidates:
+            if any(occupied[match.start:match.end]):
+                continue
+            for i in range(match.start, match.end):
+                occupied[i] = True
+            accepted.append(match)
+
+        # 依優先順序為每個名稱分配佔位符
+        placeholder_map: Dict[str, Tuple[str, str]] = {}
+        placeholder_of: Dict[Tuple[str, str], str] = {}
+        counters = {KIND_STORE: 0, KIND_STAFF: 0}
+        for match in accepted:
+            name_key = (match.kind, match.key)
+            if name_key in placeholder_of:
+                continue
+            counters[match.kind] += 1
+            if match.kind == KIND_STORE:
+                placeholder = f"%S{counters[match.kind]}%"
+                placeholder_map[placeholder] = (match.key, self.store_mapping[match.key])
+            else:
+                placeholder = f"%W{counters[match.kind]}%"
+                placeholder_map[placeholder] = (match.key, self.staff_name_mapping[match.key])
+            placeholder_of[name_key] = placeholder
+
+        parts = []
+        cursor = 0
+        for match in sorted(accepted, key=lambda m: m.start):
+            parts.append(text[cursor:match.start])
+            parts.append(placeholder_of[(match.kind, match.key)])
+            cursor = match.end
+        parts.append(text[cursor:])
+        return ''.join(parts), placeholder_map
+
+
+# 行程內共用的比對器 {'version': (Staffs 版本, Store 版本), 'matcher': NameMatcher}
+_matcher_cache: Dict[str, object] = {}
+_matcher_lock = threading.Lock()
+
+
+def _load_names() -> Optional[Tuple[List[Tuple[str, str]], Dict[str, str]]]:
+    """一次讀取師傅與店家名稱，資料庫無法連線或查詢失敗時返回 None"""
+    staff_rows: List[Tuple[str, str]] = []
+    store_mapping: Dict[str, str] = {}
+    connection = db_config.get_connection()
+    if not connection:
+        print("DEBUG [NameMatcher]: 無法連接資料庫")
+        return None
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT name, staff
+            FROM Staffs
+            WHERE enable = 1 AND staff IS NOT NULL AND staff != ''
+            GROUP BY staff, name
+            ORDER BY staff
+        """)
+        staff_rows = [(row['name'], row['staff']) for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT name, enname
+            FROM Store
+            WHERE name IS NOT NULL AND enname IS NOT NULL
+        """)
+        for row in cursor.fetchall():
+            if row['name']:
+                store_mapping[row['name']] = row['enname'] or row['name']
+    except Exception as e:
+        print(f"DEBUG [NameMatcher]: 查詢名稱資料錯誤: {e}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if connection.is_connected():
+            connection.close()
+    return staff_rows, store_mapping
+
+
+def _reload_name_matcher(table: str, version: Optional[str]):
+    """
+    版本服務的 listener：Staffs 或 Store 版本變動時重新建立比對器
+
+    讀取失敗時保留原本的比對器並拋出例外，由版本服務在下次輪詢時重試
+    """
+    from modules.table_versions import table_versions
+
+    versions = tuple(table_versions.get(name) for name in _VERSION_TABLES)
+    if (_matcher_cache.get('matcher') is not None and all(versions)
+            and _matcher_cache.get('version') == versions):
+        return
+    names = _load_names()
+    if names is None:
+        raise RuntimeError("無法讀取師傅 / 店家名稱")
+    staff_rows, store_mapping = names
+    matcher = NameMatcher(staff_rows, store_mapping)
+    matcher.version = versions if any(versions) else None
+    _matcher_cache['version'] = versions
+    _matcher_cache['matcher'] = matcher
+    print(f"DEBUG [NameMatcher]: 已建立比對器（師傅 {len(staff_rows)} 筆，店家 {len(store_mapping)} 筆，版本 {versions}）")
+
+
+def get_name_matcher() -> NameMatcher:
+    """
+    取得共用比對器（師傅 / 店家中英文名稱的行程內登錄表）
+
+    第一次呼叫時同步載入；之後由版本服務（modules.table_versions）在背景偵測
+    Staffs / Store 表變動並重新建立，比對名稱時不查詢資料庫
+    """
+    matcher = _matcher_cache.get('matcher')
+    if matcher is None:
+        from modules.table_versions import table_versions
+        with _matcher_lock:
+            if _matcher_cache.get('matcher') is None:
+                # 先讀取 Store 的版本，第一次建立比對器時兩張表的版本都已知
+                table_versions.watch('Store')
+                for name in _VERSION_TABLES:
+                    table_versions.watch(name, _reload_name_matcher)
+            matcher = _matcher_cache.get('matcher')
+        if matcher is None:
+            # 載入失敗時只使用分店別名（版本為 None，解析結果不快取），等待背景重新載入
+            return NameMatcher([], {})
+    return matcher
@@ -9,55 +9,17 @@
 import re
 import json
 import time
-import datetime
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional, Union
-import redis
-import mysql.connector
-import sys
-import os
-
-# 獲取當前腳本所在目錄
-current_dir = os.path.dirname(os.path.abspath(__file__))
-
-# 確保當前目錄在路徑中，這樣可以正確導入同目錄下的模塊
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
-
-from handle_customer import getCustomerCount
-from handle_staff import getStaffNames
-from handle_time import parse_datetime_phrases
 
-import re
-import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Tuple
-import os
-import sys
-import time
 import redis
-import mysql.connector
-
-# 添加當前目錄到 Python 路徑
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-# 添加父目錄到 Python 路徑
-parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(parent_dir)
-parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(parent_dir)
-
-# 導入資料庫配置
-from core.database import db_config
 
 # 導入現有的處理模組
-from handle_customer import getCustomerCount
-from handle_staff import getStaffNames
-from handle_time import parse_datetime_phrases
-from staff_utils import getStaffMapping
-from handle_isReserv import isReservation
-
-# 導入 common 模組中的函數
-from core.common import update_user_visitdate, get_user_info
+from .handle_customer import getCustomerCount
+from .handle_staff import getStaffNames
+from .handle_time import parse_datetime_phrases
+from .staff_utils import getStaffMapping
+from .handle_isReserv import isReservation
 
 # Redis 連接設定
 REDIS_HOST = 'localhost'
@@ -88,7 +50,8 @@ PROJECT_MAPPING = {
 
 def check_keywords_match(text: str) -> Optional[str]:
     """
-    檢查文本是否匹配資料庫中的關鍵詞
+    檢查文本是否匹配資料庫中的關鍵詞（與 modules.keyword.check_keywords_match 相同，
+    關鍵詞表依版本編譯一次後共用）
     
     Args:
         text (str): 用戶輸入的自然語言文本
@@ -96,66 +59,8 @@ def check_keywords_match(text: str) -> Optional[str]:
     Returns:
         Optional[str]: 匹配到的關鍵詞回應，如果沒有匹配則返回 None
     """
-    try:
-        # 獲取資料庫連接
-        connection = db_config.get_connection()
-        if not connection:
-            print("警告：無法連接到資料庫")
-            return None
-            
-        cursor = connection.cursor(dictionary=True)
-        
-        # 查詢所有啟用的關鍵詞，按優先級排序
-        query = """
-        SELECT keyword, match_type, response_message 
-        FROM keywords 
-        WHERE enabled = 1 
-        ORDER BY priority DESC, id ASC
-        """
-        
-        cursor.execute(query)
-        keywords = cursor.fetchall()
-        
-        # 檢查每個關鍵詞是否匹配
-        for keyword_data in keywords:
-            keyword = keyword_data['keyword']
-            match_type = keyword_data['match_type']
-            response = keyword_data['response_message']
-            
-            # 根據匹配類型進行匹配
-            is_match = False
-            if match_type == 'exact':
-                # 精確匹配
-                if text.strip() == keyword:
-                    is_match = True
-            elif match_type == 'contains':
-                # 包含匹配
-                if keyword in text:
-                    is_match = True
-            elif match_type == 'regex':
-                # 正則表達式匹配
-                keywords_list = keyword.split('|')
-                for k in keywords_list:
-                    if k.strip() and re.search(k.strip(), text, re.IGNORECASE):
-                        is_match = True
-                        break
-            
-            # 如果匹配成功，返回回應消息
-            if is_match:
-                cursor.close()
-                connection.close()
-                return response
-                
-        cursor.close()
-        connection.close()
-        return None
-        
-    except mysql.connector.Error as err:
-        print(f"資料庫查詢錯誤: {err}")
-        return None
-    except Exception as e:
-        print(f"檢查關鍵詞匹配時發生錯誤: {e}")
-        return None
+    from modules.keyword import check_keywords_match as _check_keywords_match
+    return _check_keywords_match(text)
 
 class NaturalLanguageParser:
     """自然語言解析器"""
@@ -163,12 +68,18 @@ class NaturalLanguageParser:
     def __init__(self):
         self.branch_mapping = BRANCH_MAPPING
         self.project_mapping = PROJECT_MAPPING
-        # 獲取師傅映射
-        try:
-            self.staff_mapping = getStaffMapping()
-        except Exception as e:
-            print(f"警告：無法獲取師傅映射：{e}")
-            self.staff_mapping = {}
+        self._staff_mapping = None
+
+    @property
+    def staff_mapping(self) -> Dict[str, str]:
+        """師傅映射，第一次使用時才查詢資料庫（import 時不連線）"""
+        if self._staff_mapping is None:
+            try:
+                self._staff_mapping = getStaffMapping()
+            except Exception as e:
+                print(f"警告：無法獲取師傅映射：{e}")
+                self._staff_mapping = {}
+        return self._staff_mapping
     
     def parse_text(self, text: str, line_key: str = None) -> Dict[str, Any]:
         """
@@ -657,6 +568,9 @@ def parse_natural_language(text: str) -> Dict[str, Any]:
         if not line_key or line_key.strip() == "":
             return {"error": "key 不能為空"}
         
+        # core.common 體積大且會建立全域管理器，只在實際處理訊息時才導入
+        from core.common import update_user_visitdate, get_user_info
+
         # 更新用戶的 visitdate 為當前日期，並獲取更新前的用戶信息
         # 返回的 user_info 包含更新前的 visitdate，用於判斷是否需要顯示問侯語
         old_user_info = update_user_visitdate(line_key)
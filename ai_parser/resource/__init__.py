@@ -1,6 +0,0 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-# @Time    : 2017/12/5 17:29
-# @Author  : zhm
-# @File    : __init__.py
-# @Software: PyCharm
\ No newline at end of file
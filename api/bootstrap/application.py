@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from api.routes import (
+    availability_router,
     language_router,
     parse_router,
     rooms_router,
@@ -13,6 +14,8 @@ from api.routes import (
     tasks_router,
     translation_router,
 )
+from core.translation_client import close_translation_client
+from utils import get_executor_stats, shutdown_executors
 
 load_dotenv()
 
@@ -42,6 +45,12 @@ def create_app() -> FastAPI:
     app.include_router(tasks_router)
     app.include_router(schedule_router)
     app.include_router(rooms_router)
+    app.include_router(availability_router)
+
+    # 關閉翻譯服務的連線池
+    app.add_event_handler("shutdown", close_translation_client)
+    # 關閉資料庫 / 計算 / HTTP 執行緒池
+    app.add_event_handler("shutdown", shutdown_executors)
 
     @app.get("/", summary="API首頁")
     async def root() -> dict:
@@ -61,6 +70,11 @@ def create_app() -> FastAPI:
             },
         }
 
+    @app.get("/executor-stats", summary="執行緒池統計")
+    async def executor_stats() -> dict:
+        """各執行緒池（db / cpu / http / default）的大小、排隊數、執行中數量與等待時間"""
+        return get_executor_stats()
+
     @app.exception_handler(500)
     async def internal_server_error(_: Request, __: Exception) -> JSONResponse:
         return JSONResponse(
@@ -11,7 +11,10 @@ from .requests import (
     RoomAvailabilityQuery,
     TaskConfirm,
     PreferStoreQuery,
-    NaturalLanguageRequest
+    AvailabilityBatchItem,
+    AvailabilityBatchRequest,
+    NaturalLanguageRequest,
+    ParseBatchRequest
 )
 
 from .responses import (
@@ -31,6 +34,9 @@ __all__ = [
     "RoomAvailabilityQuery",
     "TaskConfirm",
     "PreferStoreQuery",
+    "AvailabilityBatchItem",
+    "AvailabilityBatchRequest",
     "NaturalLanguageRequest",
+    "ParseBatchRequest",
     "NaturalLanguageResponse"
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 
 # Translation Models
 class TranslateRequest(BaseModel):
@@ -78,7 +78,24 @@ class RoomAvailabilityQuery(BaseModel):
     duration_minutes: int = Field(..., description="持續時間（分鐘）")
     required_rooms: int = Field(1, description="需要的房間數量")
 
+# Availability Batch Models
+class AvailabilityBatchItem(BaseModel):
+    date: str = Field(..., description="預約日期，格式: YYYY-MM-DD")
+    time: str = Field(..., description="預約開始時間，格式: HH:MM")
+    duration: int = Field(..., description="預約時長（分鐘）", ge=1)
+    guest: int = Field(1, description="客人數量", ge=1)
+    storeid: Optional[Union[int, str]] = Field(None, description="店家ID（可選，不指定則檢查所有店家）")
+    lineid: Optional[str] = Field(None, description="LINE 用戶 ID")
+
+class AvailabilityBatchRequest(BaseModel):
+    queries: List[AvailabilityBatchItem] = Field(..., description="查詢列表，結果依相同順序返回")
+
 # Natural Language Models
 class NaturalLanguageRequest(BaseModel):
     key: str = Field(..., description="用戶的唯一識別鍵")
     message: str = Field(..., description="客戶輸入的自然語言文字")
+
+class ParseBatchRequest(BaseModel):
+    messages: List[str] = Field(..., description="要解析的訊息列表，結果依相同順序返回")
+    reference_time: Optional[str] = Field(None, description="解析時的「現在」，格式: YYYY-MM-DD HH:MM[:SS]（不指定則為實際時間）")
+    workers: Optional[int] = Field(None, description="worker 行程數量（預設與上限皆為 CPU 核心數）", ge=1)
@@ -6,6 +6,7 @@ from .stores import router as stores_router
 from .tasks import router as tasks_router
 from .schedule import router as schedule_router
 from .rooms import router as rooms_router
+from .availability import router as availability_router
 
 __all__ = [
     "translation_router",
@@ -15,5 +16,6 @@ __all__ = [
     "stores_router",
     "tasks_router",
     "schedule_router",
-    "rooms_router"
+    "rooms_router",
+    "availability_router"
 ]
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from api.models import AvailabilityBatchRequest
+from modules.availability_batch import run_availability_batch
+from utils import run_in_executor
+
+router = APIRouter(prefix="/availability", tags=["Availability"])
+
+@router.post("/batch", summary="批次檢查房間與師傅可預約狀態")
+async def check_availability_batch(request: AvailabilityBatchRequest):
+    """
+    批次檢查多個時段的房間與師傅可預約狀態
+    
+    依日期分組，每個日期只載入一次當日資料，所有查詢共用同一份資料計算。
+    
+    每筆結果包含：
+    - room: 與 /rooms/checkRoomCanBook 相同格式
+    - staff: 與 /rooms/checkStaffCanBook 相同格式
+    
+    結果順序與輸入 queries 相同。
+    """
+    try:
+        queries = [item.dict() for item in request.queries]
+        results = await run_in_executor(run_availability_batch, queries)
+        return {
+            'success': True,
+            'count': len(results),
+            'results': results
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f'批次檢查可預約狀態錯誤: {str(e)}')
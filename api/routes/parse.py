@@ -1,10 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from api.models import NaturalLanguageRequest
+import asyncio
+import json
+from api.models import NaturalLanguageRequest, ParseBatchRequest
 from modules import lang, greeting, appointment, keyword, multilang, integration
-from utils import run_in_executor
+from modules.parse_memo import get_parse_memo_stats
+from modules.parse_timings import StageTimer, get_parse_stage_stats
+from modules.user_queue import UserQueueFull, UserTurn, get_user_queue_stats, record_coalesced, user_turn
+from modules.parse_batch import parse_messages_batch
+from modules.response_templates import render, template_message
+from utils import run_in_executor, executor_pool, POOL_DB, POOL_CPU
 from core.multilanguage import MultiLanguage
-from keywords_manager import get_skip_keywords
+from core.provider_health import start_translation_budget
+from keywords_manager import has_skip_keyword
 import redis
 
 router = APIRouter(tags=["Parse"])
@@ -18,6 +27,7 @@ def get_redis_connection():
     """建立 Redis 連接"""
     return redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
+@executor_pool(POOL_DB)
 def clear_user_redis_data(line_user_id: str) -> dict:
     """
     清空 Redis 上所有與特定 line_user_id 相關的資料
@@ -64,15 +74,106 @@ def clear_user_redis_data(line_user_id: str) -> dict:
         }
 
 #新增一個function 名為。check_skip_keyword
+@executor_pool(POOL_CPU)
 def check_has_skip_keyword(message: str) -> bool:
-    # 在此實現檢查是否跳過關鍵字的邏輯
-    # 例如，根據 message 內容判斷是否跳過
-    # 從資料庫/Redis 取得最新的 skip_keywords
-    skip_keywords = get_skip_keywords()
-    for keyword in skip_keywords:
-        if keyword in message:
-            return True
-    return False
+    # 是否包含 skip_keywords（行程內編譯好的比對器，一次掃描；
+    # 資料表變動由版本服務在背景重新載入，請求中不查詢資料庫/Redis）
+    return has_skip_keyword(message)
+
+
+@router.get("/parse/memo-stats", summary="解析結果快取統計")
+async def parse_memo_stats():
+    """
+    預約訊息解析結果快取（parse_memo）的統計
+
+    返回快取數量、命中 / 未命中次數（clock_misses 為因時刻不同而未命中）、
+    未快取次數（名稱版本未知）、淘汰次數與命中率
+    """
+    return get_parse_memo_stats()
+
+
+@router.post("/parse/batch", summary="批次解析訊息（離線紀錄重播）")
+async def parse_batch(request: ParseBatchRequest):
+    """
+    批次解析多則訊息，只執行階段1 的純解析（日期、時間、師傅、分店、療程、人數、是否預約）
+
+    - 不讀寫 Redis、不更新 visitdate、不翻譯，不影響用戶的對話狀態
+    - 以行程池平行解析（預設與 CPU 核心數相同）
+    - reference_time 指定解析時的「現在」，重播歷史紀錄時相對日期以該時間計算
+
+    以 NDJSON（application/x-ndjson）串流返回，每行一筆，順序與輸入 messages 相同：
+    {"index": 0, "message": "...", "parsed": {...}}，單筆失敗時為 {"index": 0, "message": "...", "error": "..."}
+    """
+    reference_time = None
+    if request.reference_time:
+        try:
+            reference_time = datetime.fromisoformat(request.reference_time.strip())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"reference_time 格式錯誤: {request.reference_time}")
+
+    try:
+        results = await run_in_executor(parse_messages_batch, request.messages, reference_time, request.workers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批次解析錯誤: {str(e)}")
+
+    def ndjson_lines():
+        for result in results:
+            yield json.dumps(result, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@executor_pool(POOL_DB)
+def _initialize_user_language(line_user_id: str) -> str:
+    """尚未設定語系的用戶設為繁體中文，返回用戶目前的語系"""
+    lang.initialize_user_language_if_needed(line_user_id, 'zh-TW')
+    return lang.get_user_language(line_user_id)
+
+
+async def _load_user_state(timer: StageTimer, line_user_id: str):
+    """
+    用戶語系與每日問候語（在執行緒中讀寫 Redis / 資料庫）
+
+    兩者依序執行：新用戶的 line_users 記錄由語系初始化建立，之後問候語才能更新 visitdate
+
+    Returns:
+        (用戶語系, (問候語, 用戶資料))
+    """
+    user_language = await timer.run('language', run_in_executor(_initialize_user_language, line_user_id))
+    greeting_result = await timer.run('greeting', run_in_executor(greeting.check_daily_greeting, line_user_id))
+    return user_language, greeting_result
+
+
+async def _finish_response(timer: StageTimer, parsed_data: dict, user_language: str, path: str) -> dict:
+    """第五階段（多國語系翻譯）與第六階段（LINE SDK 格式），並記錄各階段耗時"""
+    parsed_data = await timer.run('translate_out', multilang.translate_response_fields_async(parsed_data, user_language))
+    with timer.stage('integration'):
+        parsed_data = integration.format_for_line_sdk(parsed_data, language=user_language)
+    timer.finish(path)
+    return parsed_data
+
+
+@router.get("/parse/stage-stats", summary="/parse 各階段耗時統計")
+async def parse_stage_stats():
+    """
+    /parse 各階段（queue、language、greeting、skip_keyword、translate_in、appointment、keyword、
+    translate_out、integration）與整個請求（total，不含 queue）最近的耗時
+
+    返回各階段的次數、平均、p50、p95 與最大耗時（毫秒）；
+    language / greeting、skip_keyword、translate_in 並行執行，total 小於各階段總和
+    """
+    return get_parse_stage_stats()
+
+
+@router.get("/parse/queue-stats", summary="用戶訊息佇列統計")
+async def parse_queue_stats():
+    """
+    同一用戶訊息依序處理的佇列（modules.user_queue）統計
+
+    返回排隊中（含處理中）的訊息數與用戶數、上限、已處理 / 合併（略過查詢）/ 因背壓拒絕的次數、
+    等待其他 worker 租約的次數與逾時次數、平均與最長等待時間
+    """
+    return get_user_queue_stats()
 
 
 @router.post("/parse", summary="自然語言解析")
@@ -80,7 +181,7 @@ async def parse_natural_text(request: NaturalLanguageRequest):
     """
     解析客戶輸入的自然語言文字，提取預約資訊
     
-    六階段處理流程：
+    六階段處理流程（讀寫 Redis / 資料庫的階段在執行緒中執行，互不相依的階段並行，耗時見 GET /parse/stage-stats）：
     1. 語系判斷 (Language Module) - 若為設置語系，設置完後跳到第六階段
     2. 問候語判斷 (Greeting Module) - 必需階段，無法跳過
     3. 預約判斷 (Appointment Module) - 若為預約，處理完後跳到第六階段
@@ -99,15 +200,33 @@ async def parse_natural_text(request: NaturalLanguageRequest):
     - 當客人傳送訊息時，系統會更新 line_users 表中的 visitdate 欄位為當下日期
     - 若客人的 visitdate 不是今日，系統會在返回訊息最後面加上問侯語：
       "親愛的會員{display_name}({line_user_id})您好!"
+    
+    同一用戶的訊息依到達順序處理（modules/user_queue.py）：連續傳送多則訊息時，
+    較舊的訊息只更新對話資料，由最後一則查詢可預約狀況；排隊訊息過多時返回 503
     """
+    try:
+        async with user_turn(request.key) as turn:
+            return await _parse_message(request, turn)
+    except UserQueueFull as e:
+        print(f"DEBUG [Parse]: {request.key} {e}")
+        raise HTTPException(status_code=503, detail="訊息處理中，請稍後再試", headers={"Retry-After": "1"})
+
+
+async def _parse_message(request: NaturalLanguageRequest, turn: UserTurn) -> dict:
+    """/parse 的六階段處理（已輪到這個用戶的訊息）"""
+    # 這個請求的翻譯時間預算（翻譯服務緩慢時返回原文，確保在 LINE webhook 時限內回應）
+    start_translation_budget()
+    timer = StageTimer()
+    # 等待同一用戶前面的訊息處理完成的時間
+    timer.add('queue', turn.waited)
     try:
         # 檢查是否為 clearredis 指令
         if request.message.strip().lower() == "clearredis":
-            clear_result = clear_user_redis_data(request.key)
+            clear_result = await run_in_executor(clear_user_redis_data, request.key)
             
             # 取得用戶語系（如果還存在的話，否則使用預設值）
             try:
-                user_language = lang.get_user_language(request.key) or 'zh-TW'
+                user_language = await run_in_executor(lang.get_user_language, request.key) or 'zh-TW'
             except:
                 user_language = 'zh-TW'
             
@@ -131,14 +250,16 @@ async def parse_natural_text(request: NaturalLanguageRequest):
             }
             
             # 格式化為 LINE SDK 格式
-            parsed_data = integration.format_for_line_sdk(parsed_data)
+            with timer.stage('integration'):
+                parsed_data = integration.format_for_line_sdk(parsed_data, language=user_language)
+            timer.finish('clearredis')
             return parsed_data
         
 
         # 1. 判斷語系 (Language Module)
         detected_lang = lang.detect_language(request.message)
         if detected_lang:
-            lang.set_user_language(request.key, detected_lang)
+            await timer.run('language', run_in_executor(lang.set_user_language, request.key, detected_lang))
             # 語系設置完成，直接跳到第五階段（多國語處理）
             user_language = detected_lang
             parsed_data = {
@@ -151,36 +272,35 @@ async def parse_natural_text(request: NaturalLanguageRequest):
                 "isReservation": False,
                 "is_keyword_match": False,
                 "is_language_setting": True,
-                "response_message": f"語系已設定為：{user_language}",
+                "response_message": render('language.set', language_code=user_language),
+                "response_message_template": template_message('language.set', language_code=user_language),
                 "success": True
             }
-            # 跳到第五階段
-            parsed_data = multilang.translate_response_fields(parsed_data, user_language)
-            # 第六階段：整合階段 (Integration Module)
-            parsed_data = integration.format_for_line_sdk(parsed_data)
-            return parsed_data
-        else:
-            lang.initialize_user_language_if_needed(request.key, 'zh-TW')
-
-        # 取得用戶當前語系設定
-        user_language = lang.get_user_language(request.key)
-
-        # 2. 每日問候語 (Greeting Module) - 必需階段
-        greeting_message, user_info = greeting.check_daily_greeting(request.key)
-
-        has_skip_keyword = False
-        has_skip_keyword = check_has_skip_keyword(request.message)
+            # 跳到第五、六階段
+            return await _finish_response(timer, parsed_data, user_language, 'language_setting')
 
-        # 2.1 將可能的員工名字和分店的名字，用代位符號取代，以免翻譯成繁體中文時出錯
-        # 這裡可以根據實際需求實現替換邏輯
-        # 使用 core/multilanguage.py 裡的 translate_to_traditional_chinese 把文字變成繁體中文
-        request.message, _ = MultiLanguage.translate_to_traditional_chinese(request.message)
+        # 1~2.1 互不相依的工作並行：用戶語系與每日問候語、skip_keywords 檢查、翻譯成繁體中文
+        # （資料庫 / Redis 在執行緒中執行，翻譯為非同步請求，不阻塞其他用戶的請求）
+        (user_language, (greeting_message, user_info)), has_skip_keyword, (request.message, _) = await asyncio.gather(
+            _load_user_state(timer, request.key),
+            timer.run('skip_keyword', run_in_executor(check_has_skip_keyword, request.message)),
+            # 使用 core/multilanguage.py 裡的 translate_to_traditional_chinese 把文字變成繁體中文
+            # （已是繁體中文或為簡體中文時在本地處理，不呼叫 Google，統計見 GET /translate/stats）
+            timer.run('translate_in', MultiLanguage.translate_to_traditional_chinese_async(request.message)),
+        )
         #輸出翻譯後的文字供debug    
         print(f"翻譯後的文字: {request.message}")
 
         # 3. 預約流程 (Appointment Module)
+        # 同一用戶已有較新的訊息在排隊時，只保存對話資料，由最後一則訊息查詢
+        # （較早的訊息略過了查詢時，最後一則訊息即使不是預約訊息也以累積的對話資料查詢；
+        #   含 skip_keywords 的訊息不查詢，保留記錄給下一則訊息）
         if not has_skip_keyword:
-            parsed_data = await run_in_executor(appointment.process_appointment, request.key, request.message, user_info)
+            skip_query = await turn.is_superseded()
+            query_owed = not skip_query and await turn.take_query_owed()
+            parsed_data = await timer.run('appointment', run_in_executor(
+                appointment.process_appointment, request.key, request.message, user_info, skip_query, query_owed
+            ))
         else: 
             parsed_data = {}
             parsed_data['isReservation'] = False
@@ -188,38 +308,34 @@ async def parse_natural_text(request: NaturalLanguageRequest):
         # 將問候語添加到返回結果中
         if greeting_message:
             parsed_data['greeting_message'] = greeting_message
+            parsed_data['greeting_message_template'] = greeting.daily_greeting_template(user_info, request.key)
+
+        if parsed_data.get('is_coalesced', False):
+            await turn.mark_query_owed()
+            record_coalesced()
+            return await _finish_response(timer, parsed_data, user_language, 'coalesced')
 
         # 若為預約，直接跳到第五階段
         if parsed_data.get('isReservation', False):
             # 5. 文字輸出階段 (MultiLang Module) - 多國語系翻譯
-            parsed_data = multilang.translate_response_fields(parsed_data, user_language)
             # 6. 整合階段 (Integration Module)
-            parsed_data = integration.format_for_line_sdk(parsed_data)
-            return parsed_data
+            return await _finish_response(timer, parsed_data, user_language, 'reservation')
         
         # 4. 關鍵字搜尋 (Keyword Module) - 只有在非預約時才進行
-        keyword_response = keyword.check_keywords_match(request.message)
+        keyword_response = await timer.run('keyword', run_in_executor(keyword.check_keywords_match, request.message))
         if keyword_response:
             parsed_data['is_keyword_match'] = True
             parsed_data['response_message'] = keyword_response
-            # 處理完關鍵字後，跳到第五階段
-            # 5. 文字輸出階段 (MultiLang Module)
-            parsed_data = multilang.translate_response_fields(parsed_data, user_language)
-            # 6. 整合階段 (Integration Module)
-            parsed_data = integration.format_for_line_sdk(parsed_data)
-            return parsed_data
+            # 處理完關鍵字後，跳到第五、六階段
+            return await _finish_response(timer, parsed_data, user_language, 'keyword')
 
         # 如果沒有匹配任何關鍵字或預約，提供預設回應(不回應)
         #if not parsed_data.get('response_message'):
         #    parsed_data['response_message'] = ""
 
         # 5. 文字輸出階段 (MultiLang Module) - 多國語系翻譯
-        parsed_data = multilang.translate_response_fields(parsed_data, user_language)
-        
         # 6. 整合階段 (Integration Module) - 格式化為 LINE SDK 可顯示的格式
-        parsed_data = integration.format_for_line_sdk(parsed_data)
-        
-        return parsed_data
+        return await _finish_response(timer, parsed_data, user_language, 'default')
         
     except Exception as e:
         current_time = datetime.now()
@@ -240,9 +356,8 @@ async def parse_natural_text(request: NaturalLanguageRequest):
         
         # 即使發生錯誤，也嘗試翻譯錯誤訊息並格式化
         try:
-            user_language = lang.get_user_language(request.key)
-            error_data = multilang.translate_response_fields(error_data, user_language)
-            error_data = integration.format_for_line_sdk(error_data)
+            user_language = await run_in_executor(lang.get_user_language, request.key)
+            error_data = await _finish_response(timer, error_data, user_language, 'error')
         except:
             pass  # 如果翻譯或格式化失敗，返回原始錯誤訊息
         
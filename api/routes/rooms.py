@@ -4,8 +4,9 @@ import json
 from api.models import AppointmentQuery, PreferStoreQuery, RoomAvailabilityQuery
 from core.common import room_status_manager, CommonUtils
 from core.tasks import TaskManager
-from modules.workday_manager import WorkdayManager
+from modules.day_snapshot import get_day_snapshot
 from utils import run_in_executor
+from core.room_engine import BLOCKS_PER_DAY, TIME_LABELS, iter_bits
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
 
@@ -78,51 +79,21 @@ async def get_available_times(store_id: int, date: str):
         # 判斷是否為今天
         is_today = input_date.date() == today
         
-        available_times = []
-        
+        lead_block = None
         if is_today:
-            # 如果是今天，從現在時間+2小時開始
+            # 如果是今天，從現在時間+2小時開始，調整到下一個15分鐘間隔（向上取整）
             start_time = now + timedelta(hours=2)
-            
-            # 調整到下一個15分鐘間隔（向上取整）
-            minutes = start_time.minute
-            if minutes % 15 != 0:
-                minutes = ((minutes // 15) + 1) * 15
-                if minutes >= 60:
-                    start_time = start_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                else:
-                    start_time = start_time.replace(minute=minutes, second=0, microsecond=0)
+            if start_time.date() != today:
+                lead_block = BLOCKS_PER_DAY  # 已跨日，今日無可預約時段
             else:
-                start_time = start_time.replace(second=0, microsecond=0)
-            
-            # 從調整後的時間開始，每15分鐘一個時段，直到22:30
-            end_time = datetime.combine(today, datetime.strptime("22:30", "%H:%M").time())
-            
-            current_time = start_time
-            while current_time <= end_time:
-                available_times.append(current_time.strftime("%H:%M"))
-                current_time += timedelta(minutes=15)
-        else:
-            # 如果不是今天，從09:00開始到22:30
-            start_time = datetime.combine(input_date.date(), datetime.strptime("09:00", "%H:%M").time())
-            end_time = datetime.combine(input_date.date(), datetime.strptime("22:30", "%H:%M").time())
-            
-            current_time = start_time
-            while current_time <= end_time:
-                available_times.append(current_time.strftime("%H:%M"))
-                current_time += timedelta(minutes=15)
-        """獲取本日己有工作的時間，需排除不能用的時段"""
-        workday_manager = WorkdayManager()
-        # 呼叫時傳入整數 store_id，並保護返回值類型
-        all_avoid_block = await run_in_executor(workday_manager.get_all_avoid_block_by_storeid, store_id, date_str)
-        # 將 all_avoid_block 列出的時間，排除在 available_times 中
-        if isinstance(all_avoid_block, (list, tuple)):
-            for avoid_time in all_avoid_block:
-                if avoid_time in available_times:
-                    available_times.remove(avoid_time)
-        else:
-            # 若回傳為 None 或其他類型，記錄 debug 並繼續（不造成錯誤）
-            print(f"[DEBUG] get_available_times - all_avoid_block 非 list: {type(all_avoid_block)}")
+                # 以分鐘計算（忽略秒數），非15倍數時進位到下一個15分鐘
+                start_minutes = start_time.hour * 60 + start_time.minute
+                lead_block = -(-start_minutes // 15) * 3
+        
+        # 當日各店可預約時段已預先計算為 bitmask（扣除有其它客人進出的時間），這裡只需套用最早時間
+        snapshot = await run_in_executor(get_day_snapshot, date_str)
+        slot_mask = snapshot.bookable_slot_mask(store_id, lead_block)
+        available_times = [TIME_LABELS[block] for block in iter_bits(slot_mask)]
 
         return {
             "success": True,
@@ -416,12 +387,12 @@ async def check_room_can_book(
                 return {'result': False, 'error': '店家ID不能為空'}
             store_id_to_check = storeid
         
-        # 5. 獲取工作日管理器和任務管理器
-        workday_manager = WorkdayManager()
+        # 5. 取得當日資料快照和任務管理器
+        snapshot = await run_in_executor(get_day_snapshot, date_str)
         task_manager = TaskManager()
         
         # 6. 獲取該日期的房間狀態
-        room_status_data = await run_in_executor(workday_manager.get_all_room_status, date_str)
+        room_status_data = snapshot.room_status
         #顯示room_status_data 供 debug 
         print(room_status_data)
 
@@ -469,7 +440,7 @@ async def check_room_can_book(
             if available_rooms >= guest:
                 if bMustCheckAvoidBlock:
                     print("檢查避免區塊中...")
-                    all_avoid_block = await run_in_executor(workday_manager.get_all_task_avoid_block, date_str)
+                    all_avoid_block = snapshot.avoid_blocks
                     
                     # 驗證 all_avoid_block 的有效性
                     # 使用字符串鍵訪問，因為 Redis JSON 反序列化後鍵為字符串
@@ -610,18 +581,18 @@ async def check_staff_can_book(
                 except ValueError:
                     return {'result': False, 'error': '店家ID必須為有效的整數', 'available_staffs': []}
         
-        # 5. 獲取工作日管理器和任務管理器
-        workday_manager = WorkdayManager()
+        # 5. 取得當日資料快照和任務管理器
+        snapshot = await run_in_executor(get_day_snapshot, date_str)
         task_manager = TaskManager()
         
         # 6. 獲取該日期的師傅工作狀態
-        work_day_status = await run_in_executor(workday_manager.get_all_work_day_status, date_str)
+        work_day_status = snapshot.work_status
         
         if work_day_status is None:
             return {'result': False, 'error': '無法獲取該日期的師傅工作狀態', 'available_staffs': []}
         
         # 7. 獲取該日期的師傅店家分佈
-        staff_store_map = await run_in_executor(workday_manager.get_all_staff_store_map, date_str)
+        staff_store_map = snapshot.staff_store_map
         
         if staff_store_map is None:
             return {'result': False, 'error': '無法獲取該日期的師傅店家分佈', 'available_staffs': []}
@@ -1,17 +1,61 @@
 from fastapi import APIRouter
 from api.models import TranslateRequest, TargetRequest
 from core.multilanguage import MultiLanguage
+from core.provider_health import health_snapshot
+from core.translation_client import get_translation_client
+from modules.translation_cache import get_translation_cache_stats
 
 router = APIRouter(prefix="/translate", tags=["Translation"])
 
 @router.post("/to-traditional-chinese")
 async def translate_to_traditional_chinese_api(request: TranslateRequest):
     """將文字翻譯為繁體中文"""
-    translated, lang = MultiLanguage.translate_to_traditional_chinese(request.text)
+    translated, lang = await MultiLanguage.translate_to_traditional_chinese_async(request.text)
     return {"translated_text": translated, "source_language": lang}
 
 @router.post("/to-target-language")
 async def translate_to_target_language_api(request: TargetRequest):
     """將文字翻譯為指定語言"""
-    translated = MultiLanguage.translate_to_target_language(request.text, request.target_language)
+    translated = await MultiLanguage.translate_to_target_language_async(request.text, request.target_language)
     return {"translated_text": translated, "dest_language": request.target_language}
+
+@router.get("/stats", summary="繁體中文翻譯統計")
+async def translation_stats():
+    """
+    /to-traditional-chinese 與 /parse 的繁體中文翻譯統計
+
+    返回本地判斷已是繁體中文而略過 Google 的次數（skipped）、本地簡轉繁（converted）、實際翻譯（translated）、
+    失敗（failed）次數、略過比例、不需呼叫 Google 的比例（local_rate）與各語系的訊息數
+    """
+    return MultiLanguage.get_translation_stats()
+
+@router.get("/cache-stats", summary="回應訊息翻譯快取統計")
+async def translation_cache_stats():
+    """
+    回應訊息翻譯快取（translation_cache）的統計
+
+    返回行程內快取數量、行程內 / Redis 命中次數、未命中次數、寫入與淘汰次數、
+    Redis 錯誤次數與命中率
+    """
+    return get_translation_cache_stats()
+
+@router.get("/client-stats", summary="翻譯服務請求統計")
+async def translation_client_stats():
+    """
+    非同步翻譯用戶端（core.translation_client）的統計
+
+    返回 Azure / Google 各自的請求數、翻譯段數、錯誤數、被取消 / 因斷路未送出的請求數與平均延遲，
+    以及對沖（hedged）、主要服務失敗改用另一個服務（fallbacks）、由另一個服務提供結果（hedge_wins）、
+    兩者都失敗（failed）、超過翻譯時間預算（budget_exceeded）的次數
+    """
+    return get_translation_client().stats()
+
+@router.get("/health", summary="翻譯服務健康狀態")
+async def translation_health():
+    """
+    各翻譯服務的斷路器狀態（core.provider_health）與翻譯時間預算統計
+
+    返回 Azure / Google 的狀態（closed / open / half_open）、最近一分鐘的請求數、錯誤率、
+    平均與 p95 延遲、斷路次數與因斷路未送出的請求數，以及翻譯預算秒數與用完的次數
+    """
+    return health_snapshot()
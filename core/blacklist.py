@@ -1,6 +1,8 @@
 from typing import List, Optional
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 
+@executor_pool(POOL_DB)
 class BlacklistManager:
     """黑名單管理模塊"""
     
@@ -5,12 +5,15 @@ from datetime import datetime, timedelta
 import os
 import re
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 from .store import StoreManager
 from .tasks import TaskManager
 from .staffs import StaffManager
 from .sch import ScheduleManager
 import threading
+from .room_engine import RoomAssignment, TIME_LABELS, BLOCKS_PER_DAY, parse_day_start
 
+@executor_pool(POOL_DB)
 class RoomStatusManager:
     """房间状态管理模块"""
     
@@ -43,83 +46,20 @@ class RoomStatusManager:
         """生成指定日期的时间段列表 (5分钟间隔)"""
         # 標準化日期格式
         date_str = self._normalize_date_format(date_str)
-        time_slots = []
-        start_time = datetime.strptime(f"{date_str} 00:00", "%Y/%m/%d %H:%M")
-        
-        # 生成一天24小时的时间段 (24 * 12 = 288个5分钟间隔)
-        for i in range(288):
-            current_time = start_time + timedelta(minutes=i * 5)
-            time_slots.append(current_time.strftime("%Y/%m/%d %H:%M"))
-        
-        return time_slots
+        day_prefix = parse_day_start(date_str).strftime("%Y/%m/%d ")
+        # 一天24小时的时间段 (24 * 12 = 288个5分钟间隔)
+        return [day_prefix + label for label in TIME_LABELS]
     
-    def _get_room_occupancy_from_tasks(self, store_id: int, date_str: str) -> Dict[str, List[int]]:
-        """根据预约任务获取房间占用情况"""
-        # 获取指定日期和店家的所有预约
+    def _get_room_assignment(self, store_id: int, date_str: str, rooms_count: Optional[int] = None) -> RoomAssignment:
+        """根据预约任务建立房间分配结果（整数 block 索引 + 每间房 bitmask）"""
+        if rooms_count is None:
+            rooms_count = self._get_store_rooms_count(store_id)
         tasks = self.task_manager.get_tasks_by_date(date_str.replace('/', '-'))
-        store_tasks = [task for task in tasks if task.get('storeid') == store_id]
-        
-        # 获取店家房间数
-        store = self.store_manager.get_store_by_id(store_id)
-        rooms_count = store.get('rooms', 4) if store else 4
-        
-        # 初始化房间占用状态 {time_slot: [occupied_room_ids]}
-        room_occupancy = {}
-        
-        # 按预约开始时间排序，确保按时间顺序分配房间
-        store_tasks.sort(key=lambda x: x.get('start', ''))
-        
-        for task in store_tasks:
-            if not task.get('start') or not task.get('end'):
-                continue
-            
-            start_time = task['start']
-            end_time = task['end']
-            
-            # 如果start_time是字符串，转换为datetime对象
-            if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            if isinstance(end_time, str):
-                end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-            
-            # 为结束时间添加15分钟缓冲时间
-            end_time = end_time + timedelta(minutes=15)
-            
-            # 计算预约占用的时间段
-            current_time = start_time.replace(second=0, microsecond=0)
-            # 将分钟调整到5分钟的倍数
-            current_time = current_time.replace(minute=(current_time.minute // 5) * 5)
-            
-            # 生成需要检查的所有时间段
-            required_time_slots = []
-            temp_time = current_time
-            while temp_time < end_time:
-                required_time_slots.append(temp_time.strftime("%Y/%m/%d %H:%M"))
-                temp_time += timedelta(minutes=5)
-            
-            # 寻找可用房间：从房间1到房间rooms_count依序检查
-            assigned_room = None
-            for room_id in range(1, rooms_count + 1):  # 房间ID从1开始
-                # 检查这个房间在所有需要的时间段是否都可用
-                room_available = True
-                for time_slot in required_time_slots:
-                    if time_slot in room_occupancy and room_id in room_occupancy[time_slot]:
-                        room_available = False
-                        break
-                
-                if room_available:
-                    assigned_room = room_id
-                    break
-            
-            # 如果找到可用房间，标记为占用
-            if assigned_room:
-                for time_slot in required_time_slots:
-                    if time_slot not in room_occupancy:
-                        room_occupancy[time_slot] = []
-                    if assigned_room not in room_occupancy[time_slot]:
-                        room_occupancy[time_slot].append(assigned_room)
-        
-        return room_occupancy
+        return RoomAssignment.from_tasks(store_id, self._normalize_date_format(date_str), rooms_count, tasks)
+    
+    def _get_room_occupancy_from_tasks(self, store_id: int, date_str: str) -> Dict[str, List[int]]:
+        """根据预约任务获取房间占用情况 {time_slot: [occupied_room_ids]}"""
+        return self._get_room_assignment(store_id, date_str).to_slot_occupancy()
     
     def build_room_status_table(self, store_id: int, date_str: str) -> Optional[Dict]:
         """
@@ -140,27 +80,12 @@ class RoomStatusManager:
         
         rooms_count = store.get('rooms', 4)  # 默认4个房间
         
-        # 生成时间段
-        time_slots = self._generate_time_slots(date_str)
+        # 获取房间分配结果
+        assignment = self._get_room_assignment(store_id, date_str, rooms_count)
         
-        # 获取房间占用情况
-        room_occupancy = self._get_room_occupancy_from_tasks(store_id, date_str)
-        
-        # 初始化房间状态表
-        room_status = {
-            store_id: {}
+        return {
+            store_id: assignment.to_status_table()
         }
-        
-        # 为每个时间段生成房间状态
-        for time_slot in time_slots:
-            room_status[store_id][time_slot] = {}
-            occupied_rooms = room_occupancy.get(time_slot, [])
-            
-            # 为每个房间设置状态
-            for room_id in range(1, rooms_count + 1):
-                room_status[store_id][time_slot][room_id] = room_id in occupied_rooms
-        
-        return room_status
     
     def get_room_status_at_time(self, store_id: int, date_str: str, time_str: str) -> Optional[Dict[int, bool]]:
         """
@@ -174,13 +99,17 @@ class RoomStatusManager:
         Returns:
             Dict[int, bool]: {room_id: is_occupied}
         """
-        full_time = f"{date_str} {time_str}"
-        room_status = self.build_room_status_table(store_id, date_str)
-        
-        if not room_status or store_id not in room_status:
+        store = self.store_manager.get_store_by_id(store_id)
+        if not store:
             return None
         
-        return room_status[store_id].get(full_time, {})
+        assignment = self._get_room_assignment(store_id, date_str, store.get('rooms', 4))
+        try:
+            block = TIME_LABELS.index(time_str)
+        except ValueError:
+            return {}
+        
+        return {room_id: assignment.is_occupied(room_id, block) for room_id in range(1, assignment.rooms_count + 1)}
     
     def get_available_rooms_at_time(self, store_id: int, date_str: str, time_str: str) -> List[int]:
         """
@@ -211,30 +140,21 @@ class RoomStatusManager:
         Returns:
             Dict: 摘要信息
         """
-        room_status = self.build_room_status_table(store_id, date_str)
-        if not room_status or store_id not in room_status:
+        store_info = self.store_manager.get_store_by_id(store_id)
+        if not store_info:
             return {}
         
-        store_status = room_status[store_id]
-        total_slots = len(store_status)
-        
-        if total_slots == 0:
-            return {}
+        rooms_count = store_info.get('rooms', 4)
+        assignment = self._get_room_assignment(store_id, date_str, rooms_count)
+        total_slots = BLOCKS_PER_DAY
         
         # 计算每个房间的使用率
-        store_info = self.store_manager.get_store_by_id(store_id)
-        rooms_count = store_info.get('rooms', 4) if store_info else 4
-        
         room_usage = {}
         for room_id in range(1, rooms_count + 1):
-            occupied_count = sum(
-                1 for time_slot in store_status.values() 
-                if time_slot.get(room_id, False)
-            )
             room_usage[room_id] = {
-                'occupied_slots': occupied_count,
+                'occupied_slots': assignment.occupied_count(room_id),
                 'total_slots': total_slots,
-                'usage_rate': round(occupied_count / total_slots * 100, 2) if total_slots > 0 else 0
+                'usage_rate': assignment.usage_rate(room_id)
             }
         
         return {
@@ -282,11 +202,9 @@ class RoomStatusManager:
         
         rooms_count = store.get('rooms', 4)
         
-        # 生成时间段
-        time_slots = self._generate_time_slots(date_str)
-        
-        # 获取房间占用情况
-        room_occupancy = self._get_room_occupancy_from_tasks(store_id, date_str)
+        # 获取房间分配结果与时间段
+        assignment = self._get_room_assignment(store_id, date_str, rooms_count)
+        time_slots = assignment.slot_keys()
         
         # 构建详细房间状态表
         detailed_status = {
@@ -297,31 +215,14 @@ class RoomStatusManager:
             'rooms': {}
         }
         
-        # 为每个房间构建状态
+        # 为每个房间构建状态（由 bitmask 直接展开）
         for room_id in range(1, rooms_count + 1):
-            room_data = {
+            detailed_status['rooms'][str(room_id)] = {
                 'room_id': room_id,
-                'total_occupied_slots': 0,
-                'usage_rate': 0.0,
-                'time_slots': {}
+                'total_occupied_slots': assignment.occupied_count(room_id),
+                'usage_rate': assignment.usage_rate(room_id),
+                'time_slots': dict(zip(time_slots, assignment.room_array(room_id)))
             }
-            
-            occupied_count = 0
-            
-            # 为每个时间段设置占用状态
-            for time_slot in time_slots:
-                occupied_rooms = room_occupancy.get(time_slot, [])
-                is_occupied = room_id in occupied_rooms
-                room_data['time_slots'][time_slot] = 1 if is_occupied else 0
-                
-                if is_occupied:
-                    occupied_count += 1
-            
-            # 计算使用率
-            room_data['total_occupied_slots'] = occupied_count
-            room_data['usage_rate'] = round(occupied_count / len(time_slots) * 100, 2) if time_slots else 0
-            
-            detailed_status['rooms'][str(room_id)] = room_data
         
         return detailed_status
     
@@ -362,48 +263,26 @@ class RoomStatusManager:
         
         rooms_count = store.get('rooms', 4)
         
-        # 生成时间段
-        time_slots = self._generate_time_slots(date_str)
-        
-        # 生成时间标签（只显示时间，不显示日期）
-        time_labels = [slot.split(' ')[1] for slot in time_slots]
-        
-        # 获取房间占用情况
-        room_occupancy = self._get_room_occupancy_from_tasks(store_id, date_str)
+        # 获取房间分配结果
+        assignment = self._get_room_assignment(store_id, date_str, rooms_count)
         
         # 构建房间状态数组表格
         array_table = {
             'store_id': store_id,
             'date': date_str,
             'rooms_count': rooms_count,
-            'time_slots_count': len(time_slots),
-            'time_labels': time_labels,
+            'time_slots_count': BLOCKS_PER_DAY,
+            'time_labels': list(TIME_LABELS),
             'rooms': {},
             'summary': {}
         }
         
         # 为每个房间构建状态数组
         for room_id in range(1, rooms_count + 1):
-            room_status_array = []
-            occupied_count = 0
-            
-            # 为每个时间段设置占用状态
-            for time_slot in time_slots:
-                occupied_rooms = room_occupancy.get(time_slot, [])
-                is_occupied = room_id in occupied_rooms
-                status_value = 1 if is_occupied else 0
-                room_status_array.append(status_value)
-                
-                if is_occupied:
-                    occupied_count += 1
-            
-            # 保存房间状态数组
-            array_table['rooms'][str(room_id)] = room_status_array
-            
-            # 计算摘要信息
+            array_table['rooms'][str(room_id)] = assignment.room_array(room_id)
             array_table['summary'][str(room_id)] = {
-                'occupied_slots': occupied_count,
-                'usage_rate': round(occupied_count / len(time_slots) * 100, 2) if time_slots else 0
+                'occupied_slots': assignment.occupied_count(room_id),
+                'usage_rate': assignment.usage_rate(room_id)
             }
         
         return array_table
@@ -533,30 +412,8 @@ class RoomStatusManager:
         """
         獲取房間狀態陣列，每個房間288個時段的狀態
         """
-        room_status_table = self.build_room_status_table(store_id, date_str)
-        if not room_status_table or store_id not in room_status_table:
-            return None
-        
-        store_status = room_status_table[store_id]
-        
-        # 生成時間段
-        time_slots = []
-        for hour in range(24):
-            for minute in range(0, 60, 5):
-                time_slots.append(f"{hour:02d}:{minute:02d}")
-        
-        # 構建每個房間的狀態陣列
-        room_arrays = {}
-        for room_id in range(1, rooms_count + 1):
-            room_array = []
-            for time_slot in time_slots:
-                full_time_key = f"{date_str} {time_slot}"
-                room_status = store_status.get(full_time_key, {})
-                is_occupied = room_status.get(room_id, False)
-                room_array.append(1 if is_occupied else 0)  # 1=占用, 0=可用
-            room_arrays[room_id] = room_array
-        
-        return room_arrays
+        assignment = self._get_room_assignment(store_id, date_str, rooms_count)
+        return {room_id: assignment.room_array(room_id) for room_id in range(1, rooms_count + 1)}
     
     def _find_room_earliest_time_improved(self, room_array: List[int], time_slots: List[str], 
                                          start_index: int, required_slots: int) -> Dict:
@@ -1042,8 +899,15 @@ class RoomStatusManager:
                 'step': 'error'
             }
     
-    def query_available_appointment_202512(self, query_data: Dict) -> Dict:
+    def query_available_appointment_202512(self, query_data: Dict, snapshot=None) -> Dict:
+        """
+        查詢預約可用性（2025年12月修訂版本）
 
+        Args:
+            query_data: 查詢參數
+            snapshot: 單日資料快照（modules.day_snapshot.DaySnapshot，可選）；
+                      提供時房間與師傅狀態皆取自快照，與同一請求的其他查詢一致
+        """
         try:
 
             
@@ -1099,7 +963,10 @@ class RoomStatusManager:
             store_id = store['id']
             
             # 步驟2: 取得房間狀況
-            room_status = self.workday_manager.get_all_room_status(date_str)
+            if snapshot is not None:
+                room_status = snapshot.room_status
+            else:
+                room_status = self.workday_manager.get_all_room_status(date_str)
 
             iDurationNeed = int(project_duration) #需要N分鐘
             iStartIndex = self.task_manager.convert_time_to_block_index(time_str)
@@ -1156,7 +1023,10 @@ class RoomStatusManager:
                 }
         
             #取得當天工作表，判斷師傅是否在這時段可用
-            all_work_status  = self.workday_manager.get_all_work_day_status(date_str)
+            if snapshot is not None:
+                all_work_status = snapshot.work_status
+            else:
+                all_work_status  = self.workday_manager.get_all_work_day_status(date_str)
             
             # 遍歷 all_work_status 中的所有師傅
             for staff_name, staff_info in all_work_status.items():
@@ -2462,6 +2332,7 @@ class RoomStatusManager:
         
         return recommendation
 
+@executor_pool(POOL_DB)
 class CommonUtils:
     """通用工具类"""
 
@@ -2533,6 +2404,7 @@ class CommonUtils:
             return date_str
     
     @staticmethod
+    @executor_pool(POOL_DB)
     def getPreferStore(date_str: str, staff_name: str) -> List[int]:
         """
         獲取師傅偏好的店家
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地文字語系判斷
+以字元所屬的 Unicode 區段判斷訊息的語系，不需呼叫外部服務：
+- 假名 -> ja，諺文 -> ko，泰文 -> th
+- 漢字佔詞數（漢字數 + 拉丁單字數）超過 ZH_MIN_CJK_RATIO -> 中文；含簡體專用字 -> zh-CN，否則 zh-TW
+  （中文訊息夾雜師傅英文名、10pm、mins 等仍視為中文）
+- 其餘以拉丁字母為主 -> latin，沒有任何字母（只有數字、符號） -> none
+混合多種文字時依上述順序判斷，結果只用來決定是否需要翻譯，不需精確。
+"""
+
+from typing import Dict
+
+ZH_TW = 'zh-TW'
+ZH_CN = 'zh-CN'
+JA = 'ja'
+KO = 'ko'
+TH = 'th'
+LATIN = 'latin'
+NONE = 'none'
+
+# 漢字佔詞數（漢字 + 拉丁單字）須超過此比例，否則視為外文夾雜少量漢字
+ZH_MIN_CJK_RATIO = 0.5
+
+# 常用的簡體專用字（繁體中文不會出現；與繁體共用的字如 台、后、里、干 不列入）
+SIMPLIFIED_ONLY_CHARS = frozenset(
+    '这个们来时会说对还没国过发动问间现开关见长门马车东两实点头进话认让样学经电钱买卖书写报场'
+    '业无专与为么义乐习乡亚产亲亿仅从众优伤伟传侠俩债倾偿儿兑党兴兰养军农冻凤凭击则刘创删别刹'
+    '剂剑剧劝办务励劳势区医华协单卢卫厂厅历压厌县参双变叶号叹吓吗启员响哑唤团园围图圆圣坏块坚'
+    '坛坝坟坠垄垒垦垫执扩扫扬扰抚抛抢护担拟拥拦拧择挡挤挥损换掷摄摆摇摊撑敌数斋断旧旷显晋晓晕'
+    '暂术杀杂权条杨极构枪枣柜标栈栋栏树档桥梦检椭楼榄欢欧歼残毁毕气汇汉汤沟泽洁浅浆浇测济浑浓'
+    '涛涝润涨渊渐渔湿溃滚满滤滥滨灭灯灵灾灿炉炼烂烛烦烧热爱爷牵牺犹狭独狮猎献环玛琐画畅疗疮疯'
+    '痒瘫盏盐监盖盘睁矫码砖础硕确碍礼祸禅离种积称稳穷窃窍竞笔笼筛筝签简类粮紧纠红约级纪纬纯纱'
+    '纲纳纵纷纸纹纺线练组细织终绍绑结绕绘给络绝统继绩续绳维绵综绿缓编缘缠缩缴网罗罚罢羡翘耸职'
+    '聪肃肠肤肿胀胁胜脏脑脚脱腊舆舰舱艺节芦苍苏苹茎荐荡荣药莱获萝营萧蓝虑虚虽蚀蚁蛮补装裤观规'
+    '视览觉誉计订讨训议讯记讲讶许论设访证评识诈诉词译试诗诚诞询该详语误请诸诺读课谁调谈谊谋谓'
+    '谜谢谣谦谨谱贝贞负贡财责贤败账货质贩贪贫购贯贵贷贸费贺贼资赋赌赎赏赔赖赚赛赞赠赢赵赶趋跃'
+    '践轨轩转轮软轰轻载较辅辆辈辉辑输辞边辽达迁迈运远违连迟选逊递逻遗邓邮邻郑酱释钟钢钥钻铁铃'
+    '铅银铺链销锁锅锋错锤锦键镇镜闪闭闯闲闷闹闻阀阁阅队阳阴阵阶际陆陈险随隐难雾静韩页顶项顺须'
+    '顾顿预领频颗题颜额风飘飞饥饭饮饰饱饼馆驱驶驻驾验骂骑骗骚骤鱼鲜鸟鸡鸣鸭麦黄齐齿龙龟师广厕'
+    '厨厦凯岁岛峡币帅帐帮库庄庆庐应废异弃张弯弹彦径忆忧怀态怜总恋恳恶恼悬惊惧惨惯愤愿戏战户'
+)
+
+
+def _is_cjk(code: int) -> bool:
+    return (0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF
+            or 0xF900 <= code <= 0xFAFF or 0x20000 <= code <= 0x2FA1F)
+
+
+def count_scripts(text: str) -> Dict[str, int]:
+    """
+    各類文字的字元數（cjk / simplified / kana / hangul / thai / latin），
+    以及拉丁字母組成的單字數（latin_words，如 "ann"、"10pm" 的 "pm"）
+    """
+    counts = {'cjk': 0, 'simplified': 0, 'kana': 0, 'hangul': 0, 'thai': 0, 'latin': 0, 'latin_words': 0}
+    in_word = False
+    for ch in text or '':
+        code = ord(ch)
+        is_latin = False
+        if code < 0x80:
+            is_latin = ch.isalpha()
+        elif _is_cjk(code):
+            counts['cjk'] += 1
+            if ch in SIMPLIFIED_ONLY_CHARS:
+                counts['simplified'] += 1
+        elif 0x3040 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF or 0xFF66 <= code <= 0xFF9F:
+            counts['kana'] += 1
+        elif 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+            counts['hangul'] += 1
+        elif 0x0E00 <= code <= 0x0E7F:
+            counts['thai'] += 1
+        else:
+            # 帶重音的拉丁字母、越南文等
+            is_latin = ch.isalpha()
+        if is_latin:
+            counts['latin'] += 1
+            if not in_word:
+                counts['latin_words'] += 1
+        in_word = is_latin
+    return counts
+
+
+def detect_text_language(text: str) -> str:
+    """
+    判斷文字的語系
+
+    Returns:
+        'zh-TW' / 'zh-CN' / 'ja' / 'ko' / 'th' / 'latin' / 'none'
+    """
+    counts = count_scripts(text)
+    if counts['kana']:
+        return JA
+    if counts['hangul']:
+        return KO
+    if counts['thai']:
+        return TH
+    # 一個漢字與一個拉丁單字各算一個詞
+    words = counts['cjk'] + counts['latin_words']
+    if not words:
+        return NONE
+    if counts['cjk'] / words > ZH_MIN_CJK_RATIO:
+        return ZH_CN if counts['simplified'] else ZH_TW
+    return LATIN
+
+
+def is_traditional_chinese(text: str) -> bool:
+    """文字是否已是繁體中文（或只有數字、符號），不需要翻譯"""
+    return detect_text_language(text) in (ZH_TW, NONE)
@@ -1,114 +1,205 @@
 
-import requests
 import re
 import html
 import logging
 import json
-import uuid
 import os
+import threading
+from collections import Counter
+
+from .language_detect import detect_text_language, ZH_TW, ZH_CN, NONE
+from .zh_convert import to_traditional
+from .provider_health import ProviderCall
+from utils.async_helpers import executor_pool, POOL_HTTP
+from .translation_client import (
+    PROVIDER_AZURE, PROVIDER_GOOGLE, azure_headers, azure_params, azure_subscription_key, azure_translate_url,
+    get_http_session, get_translation_client, google_params, google_translate_url, parse_google_response,
+)
 
 class MultiLanguage:
     logger = logging.getLogger(__name__)
     google_key = os.getenv("GOOGLE_TRANSLATE_API_KEY", "")
 
+    # translate_to_traditional_chinese 的統計：本地判斷為繁體中文而略過、本地簡轉繁、實際呼叫 Google 的次數等
+    _stats_lock = threading.Lock()
+    _stats = Counter()
+    _stats_by_language = Counter()
+
+    @classmethod
+    def _count(cls, outcome: str, detected_language: str = None):
+        with cls._stats_lock:
+            cls._stats[outcome] += 1
+            if detected_language:
+                cls._stats_by_language[detected_language] += 1
+
+    @classmethod
+    def get_translation_stats(cls) -> dict:
+        """
+        繁體中文翻譯的統計：略過（skipped）、本地簡轉繁（converted）、已翻譯（translated）、
+        失敗（failed）次數與各語系的訊息數
+        """
+        with cls._stats_lock:
+            stats = {key: cls._stats[key] for key in ('skipped', 'converted', 'translated', 'failed')}
+            by_language = dict(cls._stats_by_language)
+        total = sum(stats.values())
+        stats['total'] = total
+        stats['skip_rate'] = round(stats['skipped'] / total, 4) if total else 0.0
+        # 不需呼叫 Google 的比例（略過 + 本地簡轉繁）
+        stats['local_rate'] = round((stats['skipped'] + stats['converted']) / total, 4) if total else 0.0
+        stats['by_language'] = by_language
+        return stats
+
+    @staticmethod
+    def _normalize_translated_text(text: str) -> str:
+        return html.unescape(
+            text.lower()
+            .replace("tonight", "今晚")
+            .replace("ximen", "西門")
+            .replace("yanji", "延吉")
+        )  # 解碼HTML實體
+
     @classmethod
+    def _normalize_local_text(cls, text: str) -> str:
+        # 略過翻譯的中文訊息中夾雜的英文日期用詞（tmr 已換成 tomorrow），改為翻譯服務會產生的中文
+        return cls._normalize_translated_text(text).replace("tomorrow", "明天")
+
+    @staticmethod
+    def _prepare_for_traditional(text: str) -> str:
+        text = text.replace("tmr", "tomorrow")
+        text = re.sub(r"(\d+)\.(\d+)", r"\1:\2", text)
+        return (
+            text.strip().replace(",", "").replace("!", "").replace(".", "")
+        )  # 去除首尾空格和換行符
+
+    @classmethod
+    def _translate_locally(cls, text: str) -> tuple:
+        """
+        不需呼叫翻譯服務的情況：(轉換後的文字或 None, 偵測到的語系)
+
+        已是繁體中文（或只有數字、符號）時只做正規化，簡體中文以本地對照表轉成繁體；
+        夾雜的英文日期用詞（tmr / tomorrow、tonight）轉成中文，與翻譯服務的結果相同
+        """
+        # 判斷是否需要翻譯（已是繁體中文則略過 Google）
+        detected_language = detect_text_language(text)
+        if detected_language in (ZH_TW, NONE):
+            cls._count('skipped', detected_language)
+            return cls._normalize_local_text(text), detected_language
+        if detected_language == ZH_CN:
+            cls._count('converted', detected_language)
+            return cls._normalize_local_text(to_traditional(text)), detected_language
+        return None, detected_language
+
+    @classmethod
+    def _translated_result(cls, text: str, translated_text: str, detected_language: str) -> str:
+        # 如果翻譯成功，返回翻譯後的文本，否則返回原文本
+        if translated_text:
+            cls.logger.info("翻譯成功: '%s' -> '%s'", text, translated_text)
+            cls._count('translated', detected_language)
+            return cls._normalize_translated_text(translated_text)
+        cls.logger.warning("翻譯失敗，使用原始文本: '%s'", text)
+        cls._count('failed', detected_language)
+        return text
+
+    @classmethod
+    @executor_pool(POOL_HTTP)
     def translate_to_traditional_chinese(cls, text: str) -> tuple:
         """
         使用Google翻譯API將文本翻譯成繁體中文
         如果文本已經是中文或翻譯失敗，則返回原文本
+
+        先以本地語系判斷（core/language_detect.py），已是繁體中文（或只有數字、符號）時
+        不呼叫 Google，只做與翻譯結果相同的正規化；簡體中文以本地對照表轉成繁體
+        （core/zh_convert.py），只有其他語系才呼叫 Google
         """
         source_language = "zh-TW"  # 默認值為繁體中文
 
         try:
-            # 判斷是否需要翻譯 (包含非中文字符)
-            # if is_chinese_text(text):
-            #    return text,source_language
-            text = text.replace("tmr", "tomorrow")
-            text = re.sub(r"(\d+)\.(\d+)", r"\1:\2", text)
-            text = (
-                text.strip().replace(",", "").replace("!", "").replace(".", "")
-            )  # 去除首尾空格和換行符
-
-            url = "https://translate.googleapis.com/translate_a/single"
-            params = {
-                "client": "gtx",
-                "sl": "auto",  # 自動檢測源語言
-                "tl": "zh-TW",  # 繁體中文
-                "dt": "t",
-                "q": text,
-            }
-
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-
-            # 解析Google翻譯的響應
-            result = response.json()
-            translated_text = ""
-
-            # 提取翻譯文本
-            if result and len(result) > 0 and result[0]:
-                for segment in result[0]:
-                    if segment and len(segment) > 0:
-                        translated_text += segment[0]
-
-            # 如果翻譯成功，返回翻譯後的文本，否則返回原文本
-            if translated_text:
-                cls.logger.info("翻譯成功: '%s' -> '%s'", text, translated_text)
-                translated_text = (
-                    translated_text.lower()
-                    .replace("tonight", "今晚")
-                    .replace("ximen", "西門")
-                    .replace("yanji", "延吉")
+            text = cls._prepare_for_traditional(text)
+            local_text, detected_language = cls._translate_locally(text)
+            if local_text is not None:
+                return local_text, source_language
+
+            # 共用連線池的 Session（重複使用連線）；斷路中或超過翻譯預算時不呼叫 Google
+            with ProviderCall(PROVIDER_GOOGLE, 5) as call:
+                if not call.allowed:
+                    cls._count('failed')
+                    return text, source_language
+                response = get_http_session().get(
+                    google_translate_url(), params=google_params(text, "zh-TW"), timeout=call.timeout
                 )
-                return html.unescape(translated_text), source_language  # 解碼HTML實體
-            else:
-                cls.logger.warning("翻譯失敗，使用原始文本: '%s'", text)
-                return text, source_language
+                response.raise_for_status()
+
+                # 解析Google翻譯的響應
+                translated_text = parse_google_response(response.json())
+                if not translated_text:
+                    call.fail()
+            return cls._translated_result(text, translated_text, detected_language), source_language
+
+        except Exception as e:
+            cls.logger.error("翻譯過程發生錯誤: %s", str(e))
+            cls._count('failed')
+            return text, source_language  # 出錯時返回原文本
+
+    @classmethod
+    async def translate_to_traditional_chinese_async(cls, text: str) -> tuple:
+        """
+        translate_to_traditional_chinese 的非同步版本（在事件迴圈中使用，不阻塞）
+
+        需要翻譯時以共用的非同步用戶端呼叫 Google，超過對沖延遲未回應時同時請求 Azure
+        """
+        source_language = "zh-TW"  # 默認值為繁體中文
+
+        try:
+            text = cls._prepare_for_traditional(text)
+            local_text, detected_language = cls._translate_locally(text)
+            if local_text is not None:
+                return local_text, source_language
+
+            translated, provider = await get_translation_client().translate_batch(
+                [text], "zh-TW", source_language=None, primary=PROVIDER_GOOGLE
+            )
+            translated_text = translated[0] if provider else ""
+            return cls._translated_result(text, translated_text, detected_language), source_language
 
         except Exception as e:
             cls.logger.error("翻譯過程發生錯誤: %s", str(e))
+            cls._count('failed')
             return text, source_language  # 出錯時返回原文本
 
     @classmethod
+    @executor_pool(POOL_HTTP)
     def translate_to_target_language(cls, text: str, target_language: str = "en") -> str:
         try:
             print(f"翻譯文本: {text} 到 {target_language}")
             # 如果目標語言是繁體中文，直接返回原文本，假設已經是中文
-            subscription_key = os.getenv("AZURE_TRANSLATOR_KEY", "")
-            endpoint = os.getenv("AZURE_TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
-            location = os.getenv("AZURE_TRANSLATOR_LOCATION", "global")
-
-            if not subscription_key:
+            if not azure_subscription_key():
                 cls.logger.warning("缺少 AZURE_TRANSLATOR_KEY，返回原文")
                 return text
 
-            # API 路徑與參數
-            path = '/translate?api-version=3.0'
-            params = f'&to={target_language}'
-            constructed_url = endpoint + path + params
-
-            # HTTP 標頭
-            headers = {
-                'Ocp-Apim-Subscription-Key': subscription_key,
-                'Ocp-Apim-Subscription-Region': location,
-                'Content-type': 'application/json',
-                'X-ClientTraceId': str(uuid.uuid4())
-            }
-
-            # 請求主體
-            body = [{
-                'text': text
-            }]
-
-            # 發送 POST 請求
-            response = requests.post(constructed_url, headers=headers, json=body)
+            # 發送 POST 請求（共用連線池的 Session）；斷路中或超過翻譯預算時返回原文
+            with ProviderCall(PROVIDER_AZURE, 10) as call:
+                if not call.allowed:
+                    return text
+                response = get_http_session().post(
+                    azure_translate_url(),
+                    params=azure_params(target_language),
+                    headers=azure_headers(),
+                    json=[{'text': text}],
+                    timeout=call.timeout
+                )
 
-            # 顯示翻譯結果
-            result = response.json()
+                # 顯示翻譯結果
+                result = response.json()
 
-            # 可擷取翻譯文字
-            translated_text = result[0]['translations'][0]['text']
+                # 可擷取翻譯文字
+                translated_text = result[0]['translations'][0]['text']
             return translated_text
         except Exception as e:
             print(f"翻譯過程發生錯誤: {str(e)}")
-            return text  # 出錯時返回原文本
\ No newline at end of file
+            return text  # 出錯時返回原文本
+
+    @classmethod
+    async def translate_to_target_language_async(cls, text: str, target_language: str = "en") -> str:
+        """translate_to_target_language 的非同步版本（Azure 為主，逾時或失敗時改用 Google）"""
+        print(f"翻譯文本: {text} 到 {target_language}")
+        return await get_translation_client().translate(text, target_language, source_language=None)
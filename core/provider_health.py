@@ -0,0 +1,299 @@
+"""
+外部翻譯服務（Azure / Google）的健康狀態
+
+- 斷路器（CircuitBreaker）：每個翻譯服務各一個，記錄最近 BREAKER_WINDOW_SECONDS 秒的請求結果與延遲
+  - closed：正常送出請求；錯誤率（超過 BREAKER_SLOW_CALL_SECONDS 的請求也算失敗）達到門檻，
+    或連續失敗 BREAKER_CONSECUTIVE_FAILURES 次時轉為 open
+  - open：不送出請求（直接視為失敗），BREAKER_OPEN_SECONDS 秒後轉為 half_open
+  - half_open：只允許 BREAKER_HALF_OPEN_PROBES 個試探請求，成功轉為 closed，失敗再轉為 open
+- 翻譯時間預算（TranslationBudget）：每個請求（如 /parse）翻譯可使用的總時間，
+  用完後不再呼叫翻譯服務，返回未翻譯（或已快取）的文字，確保 LINE webhook 在時限內回應；
+  以 contextvars 保存，只影響目前的請求
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+# 斷路器統計的時間範圍（秒）
+BREAKER_WINDOW_SECONDS = 60
+# 時間範圍內至少有此數量的請求才依錯誤率判斷
+BREAKER_MIN_CALLS = 5
+# 錯誤率達到此比例時斷路
+BREAKER_ERROR_RATE = 0.5
+# 連續失敗此次數時斷路
+BREAKER_CONSECUTIVE_FAILURES = 3
+# 超過此秒數的請求視為失敗（慢呼叫）
+BREAKER_SLOW_CALL_SECONDS = 3.0
+# 斷路後多久開始試探（秒）
+BREAKER_OPEN_SECONDS = 30
+# half_open 時同時允許的試探請求數
+BREAKER_HALF_OPEN_PROBES = 1
+
+# 每個請求翻譯可使用的總時間（秒）
+TRANSLATION_BUDGET_SECONDS = float(os.getenv('TRANSLATION_BUDGET_SECONDS', '3.0'))
+
+PROVIDER_AZURE = 'azure'
+PROVIDER_GOOGLE = 'google'
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """單一翻譯服務的斷路器與滾動統計"""
+
+    def __init__(self, name: str,
+                 window_seconds: float = BREAKER_WINDOW_SECONDS,
+                 min_calls: int = BREAKER_MIN_CALLS,
+                 error_rate: float = BREAKER_ERROR_RATE,
+                 consecutive_failures: int = BREAKER_CONSECUTIVE_FAILURES,
+                 slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS,
+                 half_open_probes: int = BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.consecutive_failures = consecutive_failures
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        # (時間, 是否成功, 延遲秒數)
+        self._calls: deque = deque()
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._failures_in_row = 0
+        self._counters = Counter()
+
+    def _trim(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now: float):
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._counters['opened'] += 1
+        print(f"DEBUG [ProviderHealth]: {self.name} 斷路（{self.open_seconds} 秒後試探）")
+
+    def _current_state(self, now: float) -> str:
+        if self._state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow_request(self) -> bool:
+        """是否可以送出請求（half_open 時會佔用一個試探名額）"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def record(self, ok: bool, latency: float):
+        """記錄一次請求的結果（慢呼叫視為失敗）"""
+        now = time.monotonic()
+        ok = ok and latency <= self.slow_call_seconds
+        with self._lock:
+            self._calls.append((now, ok, latency))
+            self._trim(now)
+            self._counters['success' if ok else 'failure'] += 1
+            state = self._current_state(now)
+
+            if ok:
+                self._failures_in_row = 0
+                if state == STATE_HALF_OPEN:
+                    self._state = STATE_CLOSED
+                    self._calls.clear()
+                    print(f"DEBUG [ProviderHealth]: {self.name} 恢復")
+                return
+
+            self._failures_in_row += 1
+            if state == STATE_HALF_OPEN:
+                self._open(now)
+            elif state == STATE_CLOSED:
+                errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+                if (self._failures_in_row >= self.consecutive_failures
+                        or (len(self._calls) >= self.min_calls and errors / len(self._calls) >= self.error_rate)):
+                    self._open(now)
+
+    def release_probe(self):
+        """試探請求被取消（未得到結果）時歸還名額"""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            state = self._current_state(now)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            errors = sum(1 for _, ok, _ in self._calls if not ok)
+            calls = len(self._calls)
+            return {
+                'state': state,
+                'window_seconds': self.window_seconds,
+                'calls': calls,
+                'errors': errors,
+                'error_rate': round(errors / calls, 4) if calls else 0.0,
+                'avg_ms': round(sum(latencies) * 1000 / calls, 1) if calls else 0.0,
+                'p95_ms': round(latencies[min(calls - 1, int(calls * 0.95))] * 1000, 1) if calls else 0.0,
+                'consecutive_failures': self._failures_in_row,
+                'open_remaining_seconds': round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+                if state == STATE_OPEN else 0.0,
+                'times_opened': self._counters['opened'],
+                'rejected': self._counters['rejected'],
+                'total_success': self._counters['success'],
+                'total_failure': self._counters['failure'],
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """翻譯服務的斷路器（第一次使用時建立）"""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+
+# ==================== 翻譯時間預算 ====================
+
+class TranslationBudget:
+    """一個請求的翻譯時間預算（扣除實際花在翻譯服務的時間）"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.seconds - self.spent)
+
+    def charge(self, elapsed: float):
+        with self._lock:
+            self.spent += elapsed
+
+
+_current_budget: contextvars.ContextVar = contextvars.ContextVar('translation_budget', default=None)
+_budget_stats_lock = threading.Lock()
+_budget_stats = Counter()
+
+
+def start_translation_budget(seconds: float = TRANSLATION_BUDGET_SECONDS) -> TranslationBudget:
+    """為目前的請求設定翻譯時間預算（只影響目前的 context，如單一 /parse 請求）"""
+    budget = TranslationBudget(seconds)
+    _current_budget.set(budget)
+    with _budget_stats_lock:
+        _budget_stats['requests'] += 1
+    return budget
+
+
+def current_budget() -> Optional[TranslationBudget]:
+    return _current_budget.get()
+
+
+def budget_timeout(default_timeout: float) -> Optional[float]:
+    """
+    翻譯請求可使用的逾時秒數：沒有預算時為 default_timeout，
+    預算已用完時返回 None（不應再呼叫翻譯服務）
+    """
+    budget = _current_budget.get()
+    if budget is None:
+        return default_timeout
+    remaining = budget.remaining()
+    if remaining <= 0:
+        record_budget_exhausted()
+        return None
+    return min(default_timeout, remaining)
+
+
+def record_budget_exhausted():
+    with _budget_stats_lock:
+        _budget_stats['exhausted'] += 1
+
+
+class ProviderCall:
+    """
+    同步翻譯呼叫的斷路器與預算檢查：
+
+        with ProviderCall(PROVIDER_AZURE, 10) as call:
+            if not call.allowed:
+                return text
+            response = session.post(..., timeout=call.timeout)
+
+    區塊內發生例外或呼叫 call.fail() 時記錄為失敗，否則記錄為成功，並扣除預算
+    """
+
+    def __init__(self, provider: str, timeout: float, charge_budget: bool = True):
+        self.breaker = get_breaker(provider)
+        self.default_timeout = timeout
+        self.charge_budget = charge_budget
+        self.timeout: Optional[float] = None
+        self.allowed = False
+        self._failed = False
+        self._started = 0.0
+
+    def fail(self):
+        self._failed = True
+
+    def __enter__(self) -> 'ProviderCall':
+        self.timeout = budget_timeout(self.default_timeout) if self.charge_budget else self.default_timeout
+        self.allowed = self.timeout is not None and self.breaker.allow_request()
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if not self.allowed:
+            return False
+        elapsed = time.monotonic() - self._started
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # 被取消（如對沖時另一個服務先完成）：不算成功或失敗
+            self.breaker.release_probe()
+            return False
+        self.breaker.record(exc_type is None and not self._failed, elapsed)
+        if self.charge_budget:
+            budget = _current_budget.get()
+            if budget is not None:
+                budget.charge(elapsed)
+        return False
+
+
+def health_snapshot() -> Dict[str, Any]:
+    """各翻譯服務的斷路器狀態與翻譯預算統計"""
+    for provider in (PROVIDER_AZURE, PROVIDER_GOOGLE):
+        get_breaker(provider)
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    with _budget_stats_lock:
+        budget_stats = dict(_budget_stats)
+    return {
+        'providers': {name: breaker.snapshot() for name, breaker in breakers.items()},
+        'budget': {
+            'seconds': TRANSLATION_BUDGET_SECONDS,
+            'requests': budget_stats.get('requests', 0),
+            'exhausted': budget_stats.get('exhausted', 0),
+        }
+    }
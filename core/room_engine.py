@@ -0,0 +1,238 @@
+"""
+房間分配引擎
+以整數 block 索引（每 5 分鐘一個 block）與每間房間的 bitmask 表示占用狀況，
+取代以 "YYYY/MM/DD HH:MM" 字串為鍵、逐時段 `room_id in list` 檢查的字典結構。
+
+分配規則與原本 `_get_room_occupancy_from_tasks` 相同：
+- 預約依開始時間排序
+- 開始時間向下取整到 5 分鐘，結束時間加 15 分鐘緩衝
+- 由房間 1 開始依序找第一間整段可用的房間（first-fit）
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+BLOCK_MINUTES = 5
+BLOCKS_PER_DAY = 288
+BUFFER_MINUTES = 15
+
+# 288 個時間標籤 ["00:00", "00:05", ...]，只建立一次
+TIME_LABELS: Tuple[str, ...] = tuple(
+    f"{(i * BLOCK_MINUTES) // 60:02d}:{(i * BLOCK_MINUTES) % 60:02d}" for i in range(BLOCKS_PER_DAY)
+)
+
+_DAY_MASK = (1 << BLOCKS_PER_DAY) - 1
+_BLOCK_SECONDS = BLOCK_MINUTES * 60
+
+
+def _to_naive_datetime(value) -> Optional[datetime]:
+    """將 task 的 start/end（datetime 或 ISO 字串）轉為不含時區的 datetime"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return value
+
+
+def parse_day_start(date_str: str) -> datetime:
+    """解析 YYYY/MM/DD 或 YYYY-MM-DD，返回當日 00:00"""
+    return datetime.strptime(date_str.replace('-', '/'), "%Y/%m/%d")
+
+
+def task_to_block_interval(task: Dict, day_start: datetime) -> Optional[Tuple[int, int]]:
+    """
+    將預約轉換為半開區間 [start_block, end_block)
+
+    Returns:
+        (start_block, end_block)，若預約缺少時間或區間為空則返回 None
+    """
+    start_time = _to_naive_datetime(task.get('start'))
+    end_time = _to_naive_datetime(task.get('end'))
+    if start_time is None or end_time is None:
+        return None
+
+    end_time = end_time + timedelta(minutes=BUFFER_MINUTES)
+    start_seconds = int((start_time - day_start).total_seconds())
+    end_seconds = int((end_time - day_start).total_seconds())
+
+    # 開始時間向下取整，結束時間向上取整（等同原本 while temp_time < end_time 的逐段產生）
+    start_block = start_seconds // _BLOCK_SECONDS
+    end_block = -(-end_seconds // _BLOCK_SECONDS)
+    if end_block <= start_block:
+        return None
+    return start_block, end_block
+
+
+def flags_to_mask(flags) -> int:
+    """將 block 狀態列表（True/非零 = 可用）轉為 bitmask，bit n 對應第 n 個 block"""
+    mask = 0
+    for i, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def window_mask(mask: int, length: int) -> int:
+    """
+    連續可用視窗：返回的 bit s 為 1 表示 mask 的 [s, s+length) 全部為 1
+
+    以倍增方式位移 AND，只需 O(log length) 次整數運算
+    """
+    if length <= 0:
+        return mask
+    result = mask
+    covered = 1
+    while covered < length:
+        step = min(covered, length - covered)
+        result &= result >> step
+        covered += step
+    return result
+
+
+def iter_bits(mask: int):
+    """依序產生 mask 中為 1 的 bit 索引"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def assign_rooms(intervals: List[Tuple[int, int]], rooms_count: int) -> Tuple[List[int], List[Optional[int]]]:
+    """
+    以排序掃描做 first-fit 房間分配
+
+    由於區間依開始時間排序，已分配到某房間的區間開始時間都不晚於目前區間，
+    因此「整段可用」等價於「該房間最後結束的 block <= 目前開始 block」。
+
+    Args:
+        intervals: [(start_block, end_block), ...]，需已依開始時間排序
+        rooms_count: 房間數量
+
+    Returns:
+        (room_masks, assigned)
+        room_masks[i] 為房間 i+1 的占用 bitmask（bit n = 第 n 個 block 被占用）
+        assigned[k] 為第 k 個區間分配到的房間ID，無房間時為 None
+    """
+    room_masks = [0] * rooms_count
+    room_free_at = [0] * rooms_count
+    assigned: List[Optional[int]] = []
+
+    for start_block, end_block in intervals:
+        room_index = None
+        for i in range(rooms_count):
+            if room_free_at[i] <= start_block:
+                room_index = i
+                break
+
+        if room_index is None:
+            assigned.append(None)
+            continue
+
+        room_free_at[room_index] = max(room_free_at[room_index], end_block)
+        room_masks[room_index] |= ((1 << (end_block - start_block)) - 1) << start_block
+        assigned.append(room_index + 1)
+
+    return room_masks, assigned
+
+
+class RoomAssignment:
+    """單一店家單日的房間分配結果，所有表格皆由 bitmask 產生的輕量視圖"""
+
+    __slots__ = ('store_id', 'date_str', 'rooms_count', 'room_masks', '_bits_cache')
+
+    def __init__(self, store_id: int, date_str: str, rooms_count: int, room_masks: List[int]):
+        self.store_id = store_id
+        self.date_str = date_str
+        self.rooms_count = rooms_count
+        self.room_masks = room_masks
+        self._bits_cache: Dict[int, str] = {}
+
+    @classmethod
+    def from_tasks(cls, store_id: int, date_str: str, rooms_count: int, tasks: List[Dict]) -> 'RoomAssignment':
+        """由當日預約建立房間分配（tasks 可包含其他店家，會自動篩選）"""
+        day_start = parse_day_start(date_str)
+        keyed = []
+        for order, task in enumerate(tasks):
+            if task.get('storeid') != store_id:
+                continue
+            try:
+                interval = task_to_block_interval(task, day_start)
+            except (TypeError, ValueError) as e:
+                print(f"警告：無法解析預約時間 - start: {task.get('start')}, end: {task.get('end')}, 錯誤: {e}")
+                continue
+            if interval is not None:
+                keyed.append((_to_naive_datetime(task.get('start')), order, interval))
+
+        # 依實際開始時間排序，相同開始時間保留原順序（與原本 list.sort 的穩定排序一致）
+        keyed.sort()
+        room_masks, _ = assign_rooms([item[2] for item in keyed], rooms_count)
+        return cls(store_id, date_str.replace('-', '/'), rooms_count, room_masks)
+
+    def _bits(self, room_id: int) -> str:
+        """房間當日 288 個 block 的占用字串，'1'=占用, '0'=可用（索引即 block）"""
+        bits = self._bits_cache.get(room_id)
+        if bits is None:
+            mask = self.room_masks[room_id - 1] & _DAY_MASK
+            bits = format(mask, f'0{BLOCKS_PER_DAY}b')[::-1]
+            self._bits_cache[room_id] = bits
+        return bits
+
+    def is_occupied(self, room_id: int, block: int) -> bool:
+        """房間在指定 block 是否被占用"""
+        return bool((self.room_masks[room_id - 1] >> block) & 1)
+
+    def is_room_free(self, room_id: int, start_block: int, end_block: int) -> bool:
+        """房間在 [start_block, end_block) 是否整段可用"""
+        if end_block <= start_block:
+            return True
+        span = ((1 << (end_block - start_block)) - 1) << start_block
+        return not (self.room_masks[room_id - 1] & span)
+
+    def free_rooms(self, start_block: int, end_block: int) -> List[int]:
+        """在 [start_block, end_block) 整段可用的房間ID列表"""
+        return [room_id for room_id in range(1, self.rooms_count + 1)
+                if self.is_room_free(room_id, start_block, end_block)]
+
+    def occupied_count(self, room_id: int) -> int:
+        """房間當日被占用的 block 數"""
+        return bin(self.room_masks[room_id - 1] & _DAY_MASK).count('1')
+
+    def usage_rate(self, room_id: int) -> float:
+        return round(self.occupied_count(room_id) / BLOCKS_PER_DAY * 100, 2)
+
+    def room_array(self, room_id: int) -> List[int]:
+        """房間的 288 個狀態值，1=占用, 0=可用"""
+        return list(map(int, self._bits(room_id)))
+
+    def slot_keys(self) -> List[str]:
+        """"YYYY/MM/DD HH:MM" 格式的 288 個時間鍵"""
+        day_prefix = parse_day_start(self.date_str).strftime("%Y/%m/%d ")
+        return [day_prefix + label for label in TIME_LABELS]
+
+    def to_slot_occupancy(self) -> Dict[str, List[int]]:
+        """
+        轉換為舊格式 {time_slot: [occupied_room_ids]}（含跨日的時段），
+        供尚未改用 block 索引的函數使用
+        """
+        day_start = parse_day_start(self.date_str)
+        occupancy: Dict[str, List[int]] = {}
+        for room_id, mask in enumerate(self.room_masks, start=1):
+            block = 0
+            while mask:
+                if mask & 1:
+                    slot = (day_start + timedelta(minutes=block * BLOCK_MINUTES)).strftime("%Y/%m/%d %H:%M")
+                    occupancy.setdefault(slot, []).append(room_id)
+                mask >>= 1
+                block += 1
+        return occupancy
+
+    def to_status_table(self) -> Dict[str, Dict[int, bool]]:
+        """{time_slot: {room_id: is_occupied}}"""
+        room_ids = range(1, self.rooms_count + 1)
+        room_bits = [self._bits(room_id) for room_id in room_ids]
+        return {
+            slot: {room_id: bits[i] == '1' for room_id, bits in zip(room_ids, room_bits)}
+            for i, slot in enumerate(self.slot_keys())
+        }
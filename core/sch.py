@@ -1,8 +1,10 @@
 from typing import List, Dict, Optional
 from datetime import datetime, date, timedelta
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 from .staffs import StaffManager
 
+@executor_pool(POOL_DB)
 class ScheduleManager:
     """班表管理模塊"""
     
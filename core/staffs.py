@@ -1,9 +1,11 @@
 from typing import List, Dict, Optional
 from datetime import datetime, date
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 import redis
 import json
 
+@executor_pool(POOL_DB)
 class StaffManager:
     """師傅管理模塊"""
     
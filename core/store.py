@@ -1,8 +1,10 @@
 from typing import List, Dict, Optional
 from datetime import datetime
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 
 
+@executor_pool(POOL_DB)
 class StoreManager:
     """店家管理模塊"""
     
@@ -1,9 +1,11 @@
 from typing import List, Dict, Optional
 from datetime import datetime, date, timedelta
 from .database import db_config
+from utils.async_helpers import executor_pool, POOL_DB, POOL_CPU
 from .staffs import StaffManager
 from .store import StoreManager
 
+@executor_pool(POOL_DB)
 class TaskManager:
     """預約任務管理模塊"""
     
@@ -213,6 +215,7 @@ class TaskManager:
     
    
 
+    @executor_pool(POOL_CPU)
     def convert_time_to_block_index(self, time_str: str, is_end_time: bool = False) -> int:
         """將時間字串轉換為block索引（每5分鐘一個block，從00:00開始）
         
@@ -0,0 +1,430 @@
+"""
+翻譯服務的 HTTP 用戶端（Azure Translator / Google Translate）
+
+- 非同步用戶端（TranslationClient）：持續連線的 httpx 連線池，在事件迴圈中不阻塞
+  - Azure 一次請求翻譯多段文字（同一則回應的所有欄位一次送出）
+  - 每個翻譯服務有各自的同時請求數上限
+  - 對沖（hedging）：主要服務超過 TRANSLATION_HEDGE_DELAY 秒未回應時，同時向另一個服務送出相同請求，
+    使用先成功的結果並取消另一個
+- 同步呼叫（在執行緒中的翻譯）使用共用的 requests.Session，重複使用連線
+- 斷路器與每個請求的翻譯時間預算見 core/provider_health.py
+
+端點可以環境變數指定（AZURE_TRANSLATOR_ENDPOINT、GOOGLE_TRANSLATE_URL），
+以 scripts/tools/translation_stub_server.py 在本機測試。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .provider_health import (
+    PROVIDER_AZURE, PROVIDER_GOOGLE, STATE_OPEN, ProviderCall, current_budget, get_breaker, record_budget_exhausted,
+)
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_AZURE_TRANSLATOR_ENDPOINT = 'https://api.cognitive.microsofttranslator.com'
+DEFAULT_GOOGLE_TRANSLATE_URL = 'https://translate.googleapis.com/translate_a/single'
+
+# 連線池大小與閒置連線保留時間（秒）
+TRANSLATION_MAX_CONNECTIONS = 20
+TRANSLATION_KEEPALIVE_EXPIRY = 60
+# 各翻譯服務的同時請求數上限
+AZURE_MAX_CONCURRENCY = 8
+GOOGLE_MAX_CONCURRENCY = 4
+# Azure 單次請求的上限（官方限制為 1000 段、50000 字元）
+AZURE_MAX_BATCH_ITEMS = 1000
+AZURE_MAX_BATCH_CHARS = 50000
+# 主要服務超過此秒數未回應時，向另一個服務送出相同請求
+TRANSLATION_HEDGE_DELAY = float(os.getenv('TRANSLATION_HEDGE_DELAY', '1.0'))
+# 單次請求的逾時（秒）
+AZURE_TIMEOUT = 10
+GOOGLE_TIMEOUT = 5
+
+# Azure 與 Google 語系代碼不同的部分（其餘相同）
+_AZURE_LANGUAGE_CODES = {'zh-TW': 'zh-Hant', 'zh-tw': 'zh-Hant', 'tw': 'zh-Hant', 'zh-CN': 'zh-Hans'}
+
+
+def azure_language_code(language: str) -> str:
+    return _AZURE_LANGUAGE_CODES.get(language, language)
+
+
+# 設定在呼叫時讀取（.env 在 import 之後才載入）
+
+def azure_subscription_key() -> str:
+    return os.getenv('AZURE_TRANSLATOR_KEY', '')
+
+
+def azure_translate_url() -> str:
+    endpoint = os.getenv('AZURE_TRANSLATOR_ENDPOINT', DEFAULT_AZURE_TRANSLATOR_ENDPOINT)
+    return endpoint.rstrip('/') + '/translate'
+
+
+def google_translate_url() -> str:
+    return os.getenv('GOOGLE_TRANSLATE_URL', DEFAULT_GOOGLE_TRANSLATE_URL)
+
+
+def azure_headers() -> Dict[str, str]:
+    return {
+        'Ocp-Apim-Subscription-Key': azure_subscription_key(),
+        'Ocp-Apim-Subscription-Region': os.getenv('AZURE_TRANSLATOR_LOCATION', 'global'),
+        'Content-type': 'application/json',
+        'X-ClientTraceId': str(uuid.uuid4())
+    }
+
+
+def azure_params(target_language: str, source_language: Optional[str] = None) -> Dict[str, str]:
+    params = {'api-version': '3.0', 'to': azure_language_code(target_language)}
+    if source_language:
+        params['from'] = azure_language_code(source_language)
+    return params
+
+
+def google_params(text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, str]:
+    return {
+        'client': 'gtx',
+        'sl': source_language or 'auto',
+        'tl': target_language,
+        'dt': 't',
+        'q': text
+    }
+
+
+def parse_google_response(result) -> str:
+    """Google 翻譯的回應由多個片段組成，依序連接"""
+    translated_text = ""
+    if result and len(result) > 0 and result[0]:
+        for segment in result[0]:
+            if segment and len(segment) > 0 and segment[0]:
+                translated_text += segment[0]
+    return translated_text
+
+
+# ==================== 同步連線池 ====================
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """同步翻譯呼叫共用的 Session（連線池，重複使用 TLS 連線）"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=TRANSLATION_MAX_CONNECTIONS)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+# ==================== 非同步用戶端 ====================
+
+class TranslationError(Exception):
+    """翻譯服務請求失敗或回應格式錯誤"""
+
+
+class TranslationClient:
+    """Azure / Google 翻譯的非同步用戶端（連線池、批次、同時請求數上限、對沖）"""
+
+    def __init__(self, hedge_delay: float = TRANSLATION_HEDGE_DELAY,
+                 azure_concurrency: int = AZURE_MAX_CONCURRENCY,
+                 google_concurrency: int = GOOGLE_MAX_CONCURRENCY):
+        self.hedge_delay = hedge_delay
+        self.azure_concurrency = azure_concurrency
+        self.google_concurrency = google_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = Counter()
+        self._latency = Counter()
+
+    # ---------- 連線 ----------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # httpx 的連線屬於建立時的事件迴圈，迴圈不同時重新建立
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=TRANSLATION_MAX_CONNECTIONS,
+                                    max_keepalive_connections=TRANSLATION_MAX_CONNECTIONS,
+                                    keepalive_expiry=TRANSLATION_KEEPALIVE_EXPIRY),
+                timeout=httpx.Timeout(AZURE_TIMEOUT)
+            )
+            self._loop = loop
+            self._limits = {
+                PROVIDER_AZURE: asyncio.Semaphore(self.azure_concurrency),
+                PROVIDER_GOOGLE: asyncio.Semaphore(self.google_concurrency),
+            }
+        return self._client
+
+    async def close(self):
+        """關閉連線池（應用程式關閉時呼叫）"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    # ---------- 統計 ----------
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _record(self, provider: str, texts: int, elapsed: float, outcome: str):
+        """outcome: 'ok'、'error'、'cancelled'（對沖時另一個服務先完成），或 'rejected'（斷路中，未送出）"""
+        with self._stats_lock:
+            if outcome == 'rejected':
+                self._stats[f'{provider}_rejected'] += 1
+                return
+            self._stats[f'{provider}_requests'] += 1
+            self._stats[f'{provider}_texts'] += texts
+            if outcome == 'error':
+                self._stats[f'{provider}_errors'] += 1
+            elif outcome == 'cancelled':
+                self._stats[f'{provider}_cancelled'] += 1
+            self._latency[provider] += elapsed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        各翻譯服務的請求數、文字段數、錯誤數、被取消 / 因斷路未送出的請求數、平均延遲，
+        以及對沖（hedged）、主要服務失敗改用另一個服務（fallbacks）、由另一個服務提供結果（hedge_wins）、
+        兩者都失敗（failed）、超過翻譯時間預算（budget_exceeded）的次數
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+            latency = dict(self._latency)
+        for provider in (PROVIDER_AZURE, PROVIDER_GOOGLE):
+            requests_count = stats.get(f'{provider}_requests', 0)
+            for key in ('requests', 'texts', 'errors', 'cancelled', 'rejected'):
+                stats.setdefault(f'{provider}_{key}', 0)
+            stats[f'{provider}_avg_ms'] = round(latency.get(provider, 0.0) * 1000 / requests_count, 1) if requests_count else 0.0
+        for key in ('hedged', 'fallbacks', 'hedge_wins', 'failed', 'budget_exceeded'):
+            stats.setdefault(key, 0)
+        return stats
+
+    # ---------- 各翻譯服務 ----------
+
+    async def _azure_request(self, texts: Sequence[str], target_language: str,
+                             source_language: Optional[str]) -> List[str]:
+        client = self._get_client()
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            async with self._limits[PROVIDER_AZURE]:
+                with ProviderCall(PROVIDER_AZURE, AZURE_TIMEOUT, charge_budget=False) as call:
+                    if not call.allowed:
+                        outcome = 'rejected'
+                        raise TranslationError("Azure 斷路中")
+                    response = await client.post(
+                        azure_translate_url(),
+                        params=azure_params(target_language, source_language),
+                        headers=azure_headers(),
+                        json=[{'text': text} for text in texts],
+                        timeout=call.timeout
+                    )
+                    response.raise_for_status()
+                    result = response.json()
+                    translated = [item['translations'][0]['text'] for item in result]
+                    if len(translated) != len(texts):
+                        raise TranslationError(f"Azure 回應 {len(translated)} 段，請求 {len(texts)} 段")
+            outcome = 'ok'
+            return translated
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise TranslationError(f"Azure 翻譯失敗: {e}") from e
+        finally:
+            self._record(PROVIDER_AZURE, len(texts), time.monotonic() - started, outcome)
+
+    async def azure_translate(self, texts: Sequence[str], target_language: str,
+                              source_language: Optional[str] = None) -> List[str]:
+        """Azure 批次翻譯，超過單次請求上限時分成多次（並行）送出"""
+        if not azure_subscription_key():
+            raise TranslationError("缺少 AZURE_TRANSLATOR_KEY")
+        batches: List[List[str]] = []
+        size = 0
+        for text in texts:
+            if not batches or len(batches[-1]) >= AZURE_MAX_BATCH_ITEMS or size + len(text) > AZURE_MAX_BATCH_CHARS:
+                batches.append([])
+                size = 0
+            batches[-1].append(text)
+            size += len(text)
+        results = await self._gather([
+            self._azure_request(batch, target_language, source_language) for batch in batches
+        ])
+        return [text for batch in results for text in batch]
+
+    async def _google_request(self, text: str, target_language: str,
+                              source_language: Optional[str]) -> str:
+        client = self._get_client()
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            async with self._limits[PROVIDER_GOOGLE]:
+                with ProviderCall(PROVIDER_GOOGLE, GOOGLE_TIMEOUT, charge_budget=False) as call:
+                    if not call.allowed:
+                        outcome = 'rejected'
+                        raise TranslationError("Google 斷路中")
+                    response = await client.get(google_translate_url(),
+                                                params=google_params(text, target_language, source_language),
+                                                timeout=call.timeout)
+                    response.raise_for_status()
+                    translated = parse_google_response(response.json())
+                    if not translated:
+                        raise TranslationError("Google 回應沒有翻譯結果")
+            outcome = 'ok'
+            return translated
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except (httpx.HTTPError, IndexError, TypeError, ValueError) as e:
+            raise TranslationError(f"Google 翻譯失敗: {e}") from e
+        finally:
+            self._record(PROVIDER_GOOGLE, 1, time.monotonic() - started, outcome)
+
+    async def google_translate(self, texts: Sequence[str], target_language: str,
+                               source_language: Optional[str] = None) -> List[str]:
+        """Google 翻譯（每段一次請求，受同時請求數上限限制）"""
+        return await self._gather([
+            self._google_request(text, target_language, source_language) for text in texts
+        ])
+
+    @staticmethod
+    async def _gather(coroutines) -> list:
+        """同時執行，任一個失敗時取消其餘的請求"""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ---------- 對沖 ----------
+
+    async def translate_batch(self, texts: Sequence[str], target_language: str,
+                              source_language: Optional[str] = 'zh-TW',
+                              primary: str = PROVIDER_AZURE) -> Tuple[List[str], Optional[str]]:
+        """
+        翻譯多段文字（一次請求），主要服務超過 hedge_delay 秒未回應時同時向另一個服務請求
+
+        斷路中的服務不送出請求；目前的請求有翻譯時間預算（core.provider_health）時，
+        超過剩餘預算即停止等待，返回原文
+
+        Args:
+            texts: 要翻譯的文字
+            target_language: 目標語系代碼（Google 格式，如 en、zh-TW）
+            source_language: 來源語系代碼，None 為自動偵測
+            primary: 主要翻譯服務（PROVIDER_AZURE / PROVIDER_GOOGLE）
+
+        Returns:
+            (翻譯結果, 提供結果的翻譯服務)；兩個服務都失敗、斷路或超過預算時返回 (原文, None)
+        """
+        texts = list(texts)
+        if not texts:
+            return [], None
+
+        budget = current_budget()
+        remaining = budget.remaining() if budget is not None else None
+        if remaining is not None and remaining <= 0:
+            record_budget_exhausted()
+            self._count('budget_exceeded')
+            return texts, None
+
+        started = time.monotonic()
+        try:
+            if remaining is None:
+                return await self._translate_hedged(texts, target_language, source_language, primary)
+            return await asyncio.wait_for(
+                self._translate_hedged(texts, target_language, source_language, primary), remaining
+            )
+        except asyncio.TimeoutError:
+            record_budget_exhausted()
+            self._count('budget_exceeded')
+            logger.warning(f"翻譯超過預算 {remaining:.2f} 秒，返回原文")
+            return texts, None
+        finally:
+            if budget is not None:
+                budget.charge(time.monotonic() - started)
+
+    async def _translate_hedged(self, texts: List[str], target_language: str,
+                                source_language: Optional[str], primary: str) -> Tuple[List[str], Optional[str]]:
+        providers = {
+            PROVIDER_AZURE: self.azure_translate,
+            PROVIDER_GOOGLE: self.google_translate,
+        }
+        order = [primary] + [provider for provider in providers if provider != primary]
+        if not azure_subscription_key():
+            order.remove(PROVIDER_AZURE)
+        # 主要服務斷路中時直接使用另一個服務（不等待對沖延遲）
+        if len(order) > 1 and get_breaker(order[0]).state == STATE_OPEN and get_breaker(order[1]).state != STATE_OPEN:
+            order.reverse()
+
+        pending: Dict[asyncio.Task, str] = {}
+        first = asyncio.ensure_future(providers[order[0]](texts, target_language, source_language))
+        pending[first] = order[0]
+        hedge_started = False
+        try:
+            while pending:
+                timeout = None
+                if not hedge_started and len(order) > 1:
+                    timeout = self.hedge_delay
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done or any(task.exception() is not None for task in done):
+                    # 主要服務太慢或失敗：啟動另一個服務
+                    if not hedge_started and len(order) > 1:
+                        hedge_started = True
+                        self._count('hedged' if not done else 'fallbacks')
+                        hedge = asyncio.ensure_future(providers[order[1]](texts, target_language, source_language))
+                        pending[hedge] = order[1]
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if provider != primary:
+                            self._count('hedge_wins')
+                        return task.result(), provider
+                    logger.warning(f"{provider} 翻譯失敗: {task.exception()}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._count('failed')
+        return texts, None
+
+    async def translate(self, text: str, target_language: str,
+                        source_language: Optional[str] = 'zh-TW',
+                        primary: str = PROVIDER_AZURE) -> str:
+        """翻譯單段文字，失敗時返回原文"""
+        if not text:
+            return text
+        translated, _ = await self.translate_batch([text], target_language, source_language, primary)
+        return translated[0]
+
+
+_translation_client = TranslationClient()
+
+
+def get_translation_client() -> TranslationClient:
+    """共用的非同步翻譯用戶端"""
+    return _translation_client
+
+
+async def close_translation_client():
+    """關閉共用用戶端的連線池"""
+    await _translation_client.close()
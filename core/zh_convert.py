@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地簡體 -> 繁體（台灣）轉換
+對照表 core/resource/s2tw.txt（由 scripts/tools/build_s2t_table.py 從 OpenCC 字典產生）
+在第一次轉換時載入，同一行程共用：
+- 詞組以首字索引，由長到短比對，取最長的詞組（如 头发 -> 頭髮、以后 -> 以後）
+- 沒有詞組時逐字轉換（如 预约 -> 預約）
+簡體中文的訊息因此不需要呼叫 Google 翻譯。
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RESOURCE_DIR = os.path.join(os.path.dirname(__file__), 'resource')
+S2T_TABLE_PATH = os.path.join(RESOURCE_DIR, 's2tw.txt')
+
+
+class SimplifiedToTraditional:
+    """以最長匹配將簡體中文轉成繁體中文"""
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]]):
+        self._chars: Dict[str, str] = {}
+        self._phrases: Dict[str, str] = {}
+
+        lengths: Dict[str, set] = {}
+        for simplified, traditional in pairs:
+            if len(simplified) == 1:
+                self._chars[simplified] = traditional
+            elif simplified:
+                self._phrases[simplified] = traditional
+                lengths.setdefault(simplified[0], set()).add(len(simplified))
+        # 首字 -> 以該字開頭的詞組長度（由長到短）
+        self._phrase_lengths: Dict[str, Tuple[int, ...]] = {
+            ch: tuple(sorted(sizes, reverse=True)) for ch, sizes in lengths.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._chars) + len(self._phrases)
+
+    def convert(self, text: str) -> str:
+        if not text:
+            return text
+        chars = self._chars
+        phrases = self._phrases
+        phrase_lengths = self._phrase_lengths
+        out: List[str] = []
+        i = 0
+        n = len(text)
+        while i < n:
+            ch = text[i]
+            lengths = phrase_lengths.get(ch)
+            if lengths:
+                for size in lengths:
+                    if i + size <= n:
+                        converted = phrases.get(text[i:i + size])
+                        if converted is not None:
+                            out.append(converted)
+                            i += size
+                            break
+                else:
+                    out.append(chars.get(ch, ch))
+                    i += 1
+                continue
+            out.append(chars.get(ch, ch))
+            i += 1
+        return ''.join(out)
+
+
+def load_table(path: str = S2T_TABLE_PATH) -> List[Tuple[str, str]]:
+    """讀取對照表（簡體<TAB>繁體，# 開頭為註解）"""
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            line = line.rstrip('\n')
+            if '\t' not in line:
+                continue
+            simplified, traditional = line.split('\t', 1)
+            pairs.append((simplified, traditional))
+    return pairs
+
+
+_converter: Optional[SimplifiedToTraditional] = None
+_converter_lock = threading.Lock()
+
+
+def get_s2t_converter() -> SimplifiedToTraditional:
+    """共用的轉換器，第一次使用時才讀取對照表"""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                _converter = SimplifiedToTraditional(load_table())
+                print(f"DEBUG [ZhConvert]: 已載入簡繁對照表 {len(_converter)} 筆")
+    return _converter
+
+
+def to_traditional(text: str) -> str:
+    """將簡體中文轉成繁體中文（台灣用字），非中文字元不變"""
+    return get_s2t_converter().convert(text)
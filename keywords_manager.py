@@ -1,7 +1,9 @@
 import redis
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 from datetime import datetime
 from core.database import db_config
+from ai_parser.name_matcher import AhoCorasick
 
 # Redis Configuration
 REDIS_HOST = 'localhost'
@@ -64,20 +66,18 @@ def get_table_last_modified_time() -> Optional[float]:
         return None
 
 
-def get_skip_keywords_from_db() -> List[str]:
+def get_skip_keywords_from_db() -> Optional[List[str]]:
     """
     從資料庫讀取 skip_keywords
     
     Returns:
-        List[str]: 關鍵字列表
+        Optional[List[str]]: 關鍵字列表（資料表為空時為空列表），讀取失敗時為 None
     """
-    keywords = []
-    
     try:
         connection = db_config.get_connection()
         if not connection:
             print("無法建立資料庫連線")
-            return keywords
+            return None
         
         cursor = connection.cursor(dictionary=True)
         
@@ -96,11 +96,12 @@ def get_skip_keywords_from_db() -> List[str]:
         
     except Exception as e:
         print(f"從資料庫讀取 skip_keywords 錯誤: {e}")
+        return None
     
     return keywords
 
 
-def get_skip_keywords() -> List[str]:
+def get_skip_keywords() -> Optional[List[str]]:
     """
     取得 skip_keywords 列表（帶 Redis 快取）
     
@@ -110,7 +111,7 @@ def get_skip_keywords() -> List[str]:
     3. 否則直接使用 Redis 快取的資料
     
     Returns:
-        List[str]: 關鍵字列表
+        Optional[List[str]]: 關鍵字列表，資料庫與 Redis 都無法讀取時為 None
     """
     try:
         r = get_redis_connection()
@@ -145,7 +146,10 @@ def get_skip_keywords() -> List[str]:
             # 從資料庫讀取
             keywords = get_skip_keywords_from_db()
             
-            if keywords:
+            if keywords is None:
+                print("從資料庫讀取失敗")
+                return None
+            elif keywords:
                 # 將資料存入 Redis（使用 list）
                 r.delete(SKIP_KEYWORDS_KEY)  # 先清空舊資料
                 if keywords:  # 確保有資料才寫入
@@ -182,3 +186,67 @@ def get_skip_keywords() -> List[str]:
         # 發生錯誤時，嘗試直接從資料庫讀取
         print("嘗試直接從資料庫讀取")
         return get_skip_keywords_from_db()
+
+
+class SkipKeywordMatcher:
+    """skip_keywords 比對器：一次掃描判斷訊息是否包含任一關鍵字（與逐一 keyword in message 相同）"""
+
+    def __init__(self, keywords: List[str]):
+        self.size = len(keywords)
+        # 空字串包含於任何訊息
+        self._always = '' in keywords
+        self._automaton = AhoCorasick()
+        for pattern_id, keyword in enumerate(dict.fromkeys(k for k in keywords if k)):
+            self._automaton.add(keyword, pattern_id)
+        self._automaton.build()
+
+    def contains_any(self, message: str) -> bool:
+        if self._always:
+            return True
+        for _ in self._automaton.iter_matches(message):
+            return True
+        return False
+
+
+_skip_matcher_lock = threading.Lock()
+_skip_matcher: Dict[str, object] = {}
+
+
+def _reload_skip_keywords(table: str, version: Optional[str]):
+    """
+    版本服務通知 skip_keywords 有變動時（背景執行緒）重新建立比對器
+
+    讀取失敗時保留原本的比對器並拋出例外，由版本服務在下次輪詢時重試
+    """
+    keywords = get_skip_keywords()
+    if keywords is None:
+        raise RuntimeError("無法讀取 skip_keywords")
+    matcher = SkipKeywordMatcher(keywords)
+    _skip_matcher['matcher'] = matcher
+    _skip_matcher['version'] = version
+    print(f"已建立 skip_keywords 比對器: {matcher.size} 個關鍵字 (版本 {version})")
+
+
+def get_skip_keyword_matcher() -> SkipKeywordMatcher:
+    """
+    行程內共用的 skip_keywords 比對器
+
+    第一次呼叫時同步載入；之後由版本服務（modules.table_versions）在背景偵測資料表變動並替換，
+    請求中不查詢資料庫或 Redis
+    """
+    matcher = _skip_matcher.get('matcher')
+    if matcher is None:
+        from modules.table_versions import table_versions
+        with _skip_matcher_lock:
+            if _skip_matcher.get('matcher') is None:
+                table_versions.watch('skip_keywords', _reload_skip_keywords)
+            matcher = _skip_matcher.get('matcher')
+        if matcher is None:
+            # 載入失敗時（如資料庫無法連線）不阻擋訊息，等待背景重新載入
+            return SkipKeywordMatcher([])
+    return matcher
+
+
+def has_skip_keyword(message: str) -> bool:
+    """訊息是否包含任一 skip_keyword"""
+    return get_skip_keyword_matcher().contains_any(message)
@@ -3,13 +3,16 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
 # 導入新的三階段模塊
-from modules.appointment_analysis import analyze_appointment
+from modules.appointment_analysis import analyze_appointment, analyze_saved_appointment
 #from modules.appointment_query import query_appointment_availability
 from modules.appointment_query import query_appointment_availability_202512
 from modules.appointment_result import format_appointment_result
+from utils.async_helpers import executor_pool, POOL_DB
 
 
-def process_appointment(line_key: str, message: str, user_info: Optional[Dict]) -> Dict[str, Any]:
+@executor_pool(POOL_DB)
+def process_appointment(line_key: str, message: str, user_info: Optional[Dict],
+                        skip_query: bool = False, query_owed: bool = False) -> Dict[str, Any]:
     """
     處理預約邏輯，分三個階段執行：
     
@@ -36,6 +39,9 @@ def process_appointment(line_key: str, message: str, user_info: Optional[Dict])
         line_key: LINE user ID
         message: User's message text
         user_info: User information from greeting module (including visitdate)
+        skip_query: 只執行階段1（對話資料寫回 Redis），不查詢也不產生回應
+            （同一用戶已有較新的訊息在排隊時，由最後一則訊息查詢，見 modules/user_queue.py）
+        query_owed: 較早的訊息略過了查詢，這則訊息不是預約訊息時仍以 Redis 上累積的預約資料查詢
         
     Returns:
         Dict containing:
@@ -57,6 +63,15 @@ def process_appointment(line_key: str, message: str, user_info: Optional[Dict])
     raw_data = analysis_result.get('raw_data', {})
     query_data = analysis_result.get('query_data', {})
     is_reservation = query_data.get('isReservation', False)
+
+    if not is_reservation and query_owed and not skip_query:
+        saved_result = analyze_saved_appointment(line_key, user_info)
+        if saved_result is not None:
+            print(f"DEBUG [Appointment]: 較早的訊息略過了查詢，以累積的預約資料查詢")
+            analysis_result = saved_result
+            raw_data = analysis_result['raw_data']
+            query_data = analysis_result['query_data']
+            is_reservation = True
     
     print(f"DEBUG [Appointment]: 分析結果：")
     print(f"  - 是否為預約: {is_reservation}")
@@ -72,6 +87,15 @@ def process_appointment(line_key: str, message: str, user_info: Optional[Dict])
             'isReservation': False
         }
     
+    if skip_query:
+        print(f"DEBUG [Appointment]: 同一用戶有較新的訊息，只保存對話資料，略過查詢")
+        print(f"DEBUG [Appointment]: 結束處理\n")
+
+        return {
+            'isReservation': True,
+            'is_coalesced': True
+        }
+
     # ==================== 階段2：查詢 ====================
     print(f"\nDEBUG [Appointment]: ========== 階段2：查詢 ==========")
     #檢查資料是否完整
@@ -94,6 +118,7 @@ def process_appointment(line_key: str, message: str, user_info: Optional[Dict])
     if not query_data.get('count'):
         query_data['count'] = 1
 
+    # 當日資料快照由查詢階段在通過時間、班表查詢等檢查後才取得，提前返回的訊息不需載入
     #原本舊版本
     #availability_result = query_appointment_availability(line_key, query_data)
     #改用新版本
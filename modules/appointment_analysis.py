@@ -25,11 +25,17 @@ import redis
 
 # 使用現有的解析器（來自 ai_parser）
 from ai_parser.handle_time import parse_datetime_phrases
-from ai_parser.handle_staff import getStaffNames
-from ai_parser.handle_customer import getCustomerCount
+from ai_parser.handle_staff import getStaffNamesFromTokens
+from ai_parser.handle_customer import getCustomerCountFromTokens
 from ai_parser.handle_isReserv import isReservation
-from ai_parser.handle_duration import extract_duration
-from ai_parser.handle_time2025 import parser_date_time
+# 店家名稱映射（地）
+from ai_parser.name_matcher import BRANCH_MAPPING
+# 單次掃描產生日期、時間、師傅、分店、療程、人數、關鍵詞 token
+from ai_parser.booking_lexer import (
+    tokenize_booking_message, DATE, TIME, CUE_RESERVATION, CUE_HESITATION, CUE_FORCE_CLEAR,
+    RESERVATION_KEYWORDS, HESITATION_KEYWORDS, FORCE_CLEAR_KEYWORDS
+)
+from modules.parse_memo import parse_message_memoized
 
 # Redis 配置
 REDIS_HOST = 'localhost'
@@ -37,21 +43,6 @@ REDIS_PORT = 6379
 REDIS_DB = 0
 REDIS_EXPIRY = 12 * 60 * 60  # 12小時過期時間（以秒為單位）
 
-# 店家名稱映射（地）- 來自 natural_language_parser.py
-BRANCH_MAPPING = {
-    '西門': '西門',
-    '延吉': '延吉',
-    '西門店': '西門',
-    '延吉店': '延吉',
-    '西': '西門',
-    '延': '延吉',
-    '大巨蛋': '延吉',
-    '台北巨蛋': '延吉',
-    '西門二店': '家樂福',
-    '西寧': '家樂福',
-    '家樂福店': '家樂福'
-}
-
 # 默認值
 DEFAULT_BRANCH = "西門"
 DEFAULT_PROJECT = 90
@@ -187,11 +178,14 @@ def get_is_reservation(parsed_data: Dict[str, Any]) -> bool:
     print(f"DEBUG [get_is_reservation]: 開始判斷是否為預約相關")
     
     # 先檢查是否有猶豫/不確定的關鍵字 - 如果有則直接返回 False
-    message = parsed_data.get('message', '')
-    hesitation_keywords = ['不確定', '再決定', '再約', '先看看','先不用','先不要','再說','再看看','之後再說','改天','想一下','考慮','暫時不用','不需要','暫緩','等下','等一下','聯絡','不確定','先不']
-    has_hesitation = any(keyword in message for keyword in hesitation_keywords)
+    # 已由 booking_lexer 判斷時直接使用 has_hesitation
+    if 'has_hesitation' in parsed_data:
+        has_hesitation = parsed_data['has_hesitation']
+    else:
+        message = parsed_data.get('message', '')
+        has_hesitation = any(keyword in message for keyword in HESITATION_KEYWORDS)
     if has_hesitation:
-        print(f"DEBUG [get_is_reservation]: 檢測到猶豫/不確定關鍵字: {hesitation_keywords}")
+        print(f"DEBUG [get_is_reservation]: 檢測到猶豫/不確定關鍵字: {HESITATION_KEYWORDS}")
         print(f"DEBUG [get_is_reservation]: 直接判定為非預約")
         return False
     
@@ -253,15 +247,7 @@ def _check_reservation_keywords(message: str) -> bool:
     Returns:
         bool: 是否包含預約關鍵字
     """
-    reservation_keywords = [
-        '預約', '約', '訂', '排', '安排', '登記', 
-        '預訂', '預定', '預排', '空位', '時段',
-        '幾點', '什麼時候', '哪個時間', '幾號',
-        '可以來', '要來', '想來', '安排時間', '還有時間', '分鐘可以', '分可以',
-        '不指定', '都可以', '都可', '任何師', '會按', '按比較', '比較會'
-    ]
-    
-    for keyword in reservation_keywords:
+    for keyword in RESERVATION_KEYWORDS:
         if keyword in message:
             return True
     
@@ -281,63 +267,39 @@ def is_force_clear_time(message: str) -> bool:
     Returns:
         bool: 是否需要強制清除時間
     """
-    force_clear_keywords = [
-        '班表', '師傅表', '排班表','排表'
-    ]
-    
-    for keyword in force_clear_keywords:
+    for keyword in FORCE_CLEAR_KEYWORDS:
         if keyword in message:
             return True
     
     return False
 
 
-def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] = None) -> Dict[str, Any]:
+def parse_current_message(message: str, matcher=None, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     """
-    分析預約訊息
-    
-    流程：
-    1. 先完成基礎解析（1-1 ~ 1-6）
-    2. 生成當前訊息的 RAW_DATA（1-7）
-    3. 調用 get_is_reservation 判斷（1-4）
-    4. 若 is_reservation=false，返回非預約結果
-    5. 若 is_reservation=true：
-       - 2-1. 從 Redis 取回前面對話的預約資料
-       - 2-2. 整合上次 Redis 資料和當前解析結果，成為新的 RAW_DATA，存放 Redis
-       - 2-3. 將 RAW_DATA 整合預設值，成為 query_data
-       - 2-4. 將 query_data 送至查詢
-    
+    階段1 的純解析：只依訊息內容與當下時間，不讀寫 Redis（結果可由 parse_memo 快取）
+
     Args:
-        line_key: LINE 用戶 ID
         message: 用戶訊息
-        user_info: 用戶資訊
-        
+        matcher: 名稱比對器（可選，預設使用共用比對器）
+        timings: 傳入 dict 時記錄各階段耗時（秒），見 tokenize_booking_message，另含 is_reservation
+
     Returns:
-        {
-            'raw_data': {},      # 原始資料（當前訊息的解析結果）
-            'query_data': {},    # 查詢資料（套用預設值後）
-            'is_reservation': bool,
-            'has_update': bool
-        }
+        當前訊息的 RAW_DATA（未結合 Redis），另含 is_reservation 與 clock_sensitive
     """
-    print(f"DEBUG [Appointment]: 開始處理預約")
-    print(f"DEBUG [Appointment]: line_key={line_key}")
-    print(f"DEBUG [Appointment]: message={message}")
-    
-    print(f"\nDEBUG [Appointment]: ========== 階段1：解析當前訊息 ==========")
-    
     # ===== 步驟 1-1 ~ 1-6: 基礎解析 =====
+    # 訊息只掃描一次，各項分析由 token 取得結果
+    tokens = tokenize_booking_message(message, matcher, timings)
     
     # 1-1. 日期分析 & 1-2. 時間分析
     date_val = ""
     time_val = ""
     force_clear_time = False  # 新增：是否強制清除時間的標記
     try:
-        date_val,time_val= parser_date_time(message,2)
+        date_val, time_val = tokens.date, tokens.time
         
         #如果不是今天，則判讀是否時間清空
         if date_val and date_val != datetime.now().strftime("%Y-%m-%d"):
-            force_clear_time = is_force_clear_time(message)
+            force_clear_time = tokens.has_cue(CUE_FORCE_CLEAR)
             if force_clear_time :
                 time_val =""
         
@@ -369,7 +331,7 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
     # 1-3. 員工分析
     masseur_val = []
     try:
-        masseur_val = getStaffNames(message)
+        masseur_val = getStaffNamesFromTokens(tokens)
         if masseur_val:
             print(f"DEBUG [Analysis]: 1-3. 員工分析 - {masseur_val}")
     except Exception as e:
@@ -378,16 +340,18 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
     # 1-4. 先不在這裡判斷，先做完其他解析
     
     # 1-5. 分店分析
+    # 最長的分店別名優先（與依長度排序逐一比對相同）
     branch_val = ""
-    for branch_key in sorted(BRANCH_MAPPING.keys(), key=len, reverse=True):
-        if branch_key in message:
-            branch_val = BRANCH_MAPPING[branch_key]
+    try:
+        branch_val = tokens.branch
+        if branch_val:
             print(f"DEBUG [Analysis]: 1-5. 分店分析 - {branch_val}")
-            break
+    except Exception as e:
+        print(f"警告：分店判斷失敗：{e}")
     
     # 1-6. 療程分析
     print(f"DEBUG [Analysis]: 1-6. 療程分析 - 開始解析...")
-    project_val = extract_duration(message)
+    project_val = tokens.duration
     if project_val:
         print(f"DEBUG [Analysis]: 1-6. 療程分析 - ✓ 找到療程 {project_val} 分鐘")
     else:
@@ -395,7 +359,8 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
         print(f"DEBUG [Analysis]: 1-6. 療程分析 - ✗ 未找到療程（設為 0）")
     
     # 人数分析 - 使用统一入口
-    count_val, is_explicit = getCustomerCount(message, return_details=True)
+    explicit_count, is_explicit = getCustomerCountFromTokens(tokens, return_details=True)
+    count_val = explicit_count
     if is_explicit:
         print(f"DEBUG [Analysis]: 人数分析 - {count_val} (明确表达)")
     else:
@@ -404,7 +369,7 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
         print(f"DEBUG [Analysis]: 人数分析 - None (未明确指定，将在 query_data 套用预设值 1)")
     
     # 檢查預約相關關鍵字
-    has_keyword = _check_reservation_keywords(message)
+    has_keyword = tokens.has_cue(CUE_RESERVATION)
     
     # ===== 步驟 1-7: 生成當前訊息的 RAW_DATA（未結合 Redis） =====
     current_parsed_data = {
@@ -416,7 +381,10 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
         "project": project_val,
         "count": count_val,
         "has_keyword": has_keyword,
-        "force_clear_time": force_clear_time  # 新增：記錄是否強制清除時間
+        "has_hesitation": tokens.has_cue(CUE_HESITATION),
+        "force_clear_time": force_clear_time,  # 新增：記錄是否強制清除時間
+        # 日期為今天時，過去的時間會依當下時刻調整（format_time_string_3），結果與時刻有關
+        "clock_sensitive": bool(tokens.first(DATE) and tokens.first(TIME))
     }
     
     print(f"\n📋 當前訊息的解析結果（RAW_DATA - 未結合 Redis）:")
@@ -429,11 +397,60 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
     print(f"  🔑 預約關鍵字: {current_parsed_data['has_keyword']}")
     
     # ===== 步驟 1-4: 調用 get_is_reservation 判斷 =====
+    started = time.perf_counter()
     is_reservation = get_is_reservation(current_parsed_data)
     if not is_reservation:
         is_reservation = get_is_reservarion_by_string(message)
+    if timings is not None:
+        timings['is_reservation'] = timings.get('is_reservation', 0.0) + time.perf_counter() - started
 
     print(f"\nDEBUG [Analysis]: 1-4. 是否預約判斷 - {is_reservation}")
+
+    current_parsed_data['is_reservation'] = is_reservation
+    return current_parsed_data
+
+
+def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    分析預約訊息
+    
+    流程：
+    1. 先完成基礎解析（1-1 ~ 1-6）
+    2. 生成當前訊息的 RAW_DATA（1-7）
+    3. 調用 get_is_reservation 判斷（1-4）
+    4. 若 is_reservation=false，返回非預約結果
+    5. 若 is_reservation=true：
+       - 2-1. 從 Redis 取回前面對話的預約資料
+       - 2-2. 整合上次 Redis 資料和當前解析結果，成為新的 RAW_DATA，存放 Redis
+       - 2-3. 將 RAW_DATA 整合預設值，成為 query_data
+       - 2-4. 將 query_data 送至查詢
+    
+    Args:
+        line_key: LINE 用戶 ID
+        message: 用戶訊息
+        user_info: 用戶資訊
+        
+    Returns:
+        {
+            'raw_data': {},      # 原始資料（當前訊息的解析結果）
+            'query_data': {},    # 查詢資料（套用預設值後）
+            'is_reservation': bool,
+            'has_update': bool
+        }
+    """
+    print(f"DEBUG [Appointment]: 開始處理預約")
+    print(f"DEBUG [Appointment]: line_key={line_key}")
+    print(f"DEBUG [Appointment]: message={message}")
+    
+    print(f"\nDEBUG [Appointment]: ========== 階段1：解析當前訊息 ==========")
+    
+    # ===== 步驟 1-1 ~ 1-7、1-4: 解析當前訊息（相同訊息與參考日期直接使用快取結果） =====
+    current_parsed_data = parse_message_memoized(message, parse_current_message)
+    is_reservation = current_parsed_data['is_reservation']
+    force_clear_time = current_parsed_data['force_clear_time']
+    # 人数：只有明確表達時 count 才不為 None
+    explicit_count = current_parsed_data['count']
+    is_explicit = explicit_count is not None
     
     # 如果不是預約相關，返回非預約結果
     if not is_reservation:
@@ -498,8 +515,7 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
         
         # 人数：只有在有明確表達時才更新（不使用默认值覆盖）
         # 注意：getCustomerCount 返回的默认值 1 不应该覆盖 Redis 中的历史值
-        # 只有当用户明确说 "3位"、"两个人" 等时才更新
-        explicit_count, is_explicit = getCustomerCount(message, return_details=True)
+        # 只有当用户明确说 "3位"、"两个人" 等时才更新（沿用階段1的人數分析結果）
         if is_explicit:
             raw_data['count'] = explicit_count
             print(f"DEBUG [Analysis]: 2-2. 检测到明确人数表达，更新人数为 {explicit_count}")
@@ -566,6 +582,34 @@ def analyze_appointment(line_key: str, message: str, user_info: Optional[Dict] =
     }
 
 
+def analyze_saved_appointment(line_key: str, user_info: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
+    """
+    以 Redis 上累積的預約資料產生分析結果（不解析訊息、不寫回 Redis）
+
+    同一用戶連續傳送訊息時，較早的預約訊息只保存對話資料、略過查詢；
+    最後一則訊息不是預約訊息時，以此查詢累積的預約資料（見 modules/user_queue.py）
+
+    Returns:
+        與 analyze_appointment 相同格式的結果，Redis 沒有預約資料時返回 None
+    """
+    redis_data = _get_data_from_redis(line_key)
+    if not redis_data:
+        return None
+
+    raw_data = redis_data.copy()
+    raw_data['isReservation'] = True
+    if user_info:
+        raw_data['user_info'] = user_info
+    print(f"DEBUG [Analysis]: 使用 Redis 上累積的預約資料: {raw_data}")
+
+    return {
+        'raw_data': raw_data,
+        'query_data': _apply_defaults(raw_data.copy()),
+        'is_reservation': True,
+        'has_update': False
+    }
+
+
 def _apply_defaults(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     為查詢資料套用預設值
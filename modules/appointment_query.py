@@ -7,7 +7,7 @@
 包含師傅地點分佈管理功能
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
 import time as time_module
 from datetime import datetime as dt
@@ -15,6 +15,9 @@ import redis
 from core.common import room_status_manager
 from core.database import db_config
 from core.blacklist import BlacklistManager
+from modules.availability_optimizer import DayAvailabilityMatrix, find_cross_store_alternatives
+from modules.day_snapshot import DaySnapshot, get_day_snapshot
+from modules.response_templates import ResponseBuilder
 
 # Redis 配置
 REDIS_HOST = 'localhost'
@@ -289,7 +292,8 @@ def _get_store_name_list(store_ids: list) -> str:
 
 def _filter_block_masseurs(
     availability_result: Dict[str, Any],
-    line_key: str
+    line_key: str,
+    blocked_staffs: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     根據黑名單過濾師傅
@@ -303,13 +307,14 @@ def _filter_block_masseurs(
     Args:
         availability_result: 原始查詢結果
         line_key: LINE 用戶 ID
+        blocked_staffs: 已查詢的黑名單師傅（可選，未提供時依 line_key 查詢）
         
     Returns:
         過濾後的查詢結果
     """
     # 檢查並過濾黑名單師傅
-    blacklist_mgr = BlacklistManager()
-    blocked_staffs = blacklist_mgr.getBlockedStaffsList(line_key)
+    if blocked_staffs is None:
+        blocked_staffs = BlacklistManager().getBlockedStaffsList(line_key)
     
     if not blocked_staffs:
         # 沒有黑名單，直接返回原結果
@@ -586,6 +591,74 @@ def _filter_masseurs_by_store_distribution(
     return availability_result
 
 
+def _find_cross_store_alternatives(
+    line_key: str,
+    query_params: Dict[str, Any],
+    target_storeid: int,
+    store_distribution: Dict[str, list],
+    snapshot: Optional[DaySnapshot] = None,
+    blocked_staffs: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    指定分店無法預約時，一次評估所有店家的替代方案
+    （同時段其他分店、同分店最接近時段），避免客人再詢問其他分店
+    
+    Args:
+        line_key: LINE 用戶 ID（用於排除黑名單師傅）
+        query_params: 查詢參數（date, time, project, count, masseur）
+        target_storeid: 目標分店 ID
+        store_distribution: 師傅店家分佈
+        snapshot: 單日資料快照（可選，未提供時依日期取得）
+        blocked_staffs: 已查詢的黑名單師傅（可選）
+        
+    Returns:
+        替代方案字典，無法計算時返回 None
+    """
+    try:
+        date = query_params['date']
+        time = query_params['time']
+        if snapshot is None:
+            snapshot = get_day_snapshot(date, room_status_manager.workday_manager)
+        room_status = snapshot.room_status
+        work_status = snapshot.work_status
+        if not room_status or not work_status:
+            return None
+        
+        task_manager = room_status_manager.task_manager
+        start_block = task_manager.convert_time_to_block_index(time)
+        total_blocks = (int(query_params['project']) + 15) // 5  # 包含15分鐘緩衝時間
+        
+        # 今天的查詢不建議已經過去的時段
+        earliest_block = 0
+        now = dt.now()
+        if date.replace('/', '-') == now.strftime('%Y-%m-%d'):
+            earliest_block = -(-(now.hour * 60 + now.minute) // 5)
+        
+        if blocked_staffs is None:
+            blocked_staffs = BlacklistManager().getBlockedStaffsList(line_key) if line_key else []
+        
+        matrix = DayAvailabilityMatrix(room_status, work_status, store_distribution)
+        alternatives = find_cross_store_alternatives(
+            matrix,
+            target_storeid,
+            start_block,
+            total_blocks,
+            query_params.get('count', 1),
+            masseur_names=query_params.get('masseur', []),
+            blocked_staffs=blocked_staffs,
+            earliest_block=earliest_block
+        )
+        
+        print("DEBUG [Query]: 跨店替代方案")
+        print(f"  - 同時段其他分店: {[(o['store_name'], o['time']) for o in alternatives['same_time_other_stores']]}")
+        print(f"  - 同分店最接近時段: {[(o['store_name'], o['time']) for o in alternatives['nearest_time_same_store']]}")
+        return alternatives
+        
+    except Exception as e:
+        print(f"DEBUG [Query]: 計算跨店替代方案時發生錯誤: {e}")
+        return None
+
+
 def query_appointment_availability(line_key: str, query_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     查詢預約可用性（直接使用 core.common 的現有函數）
@@ -642,16 +715,19 @@ def query_appointment_availability(line_key: str, query_data: Dict[str, Any]) ->
             
             # 格式化給用戶的訊息
             staff_shifts = schedule_result.get('staff_shifts', [])
+            message = ResponseBuilder()
             if staff_shifts:
-                user_message = f"{schedule_result.get('date', date)} 班表：\n" + "\n".join(staff_shifts)
+                message.add('schedule.list_header', date=schedule_result.get('date', date))
+                message.add_text("\n".join(staff_shifts))
             else:
-                user_message = f"{schedule_result.get('date', date)} 沒有排班記錄"
+                message.add('schedule.no_shifts', date=schedule_result.get('date', date))
             
             return {
                 'should_query': True,
                 'is_schedule_query': True,
                 'schedule_result': schedule_result,
-                'user_message': user_message,
+                'user_message': message.render(),
+                'user_message_template': message.to_list(),
                 'query_type': 'schedule',
                 'success': True
             }
@@ -802,7 +878,8 @@ def query_appointment_availability(line_key: str, query_data: Dict[str, Any]) ->
         }
 
 #2025年12月修訂版本
-def query_appointment_availability_202512(line_key: str, query_data: Dict[str, Any]) -> Dict[str, Any]:
+def query_appointment_availability_202512(line_key: str, query_data: Dict[str, Any],
+                                          snapshot: Optional[DaySnapshot] = None) -> Dict[str, Any]:
     """
     查詢預約可用性（2025年12月修訂版本）
     
@@ -813,6 +890,7 @@ def query_appointment_availability_202512(line_key: str, query_data: Dict[str, A
     Args:
         line_key: LINE 用戶 ID
         query_data: 查詢資料
+        snapshot: 當日資料快照（可選）；房間、師傅狀態與店家分佈皆取自同一份快照
         
     Returns:
         查詢結果
@@ -867,16 +945,19 @@ def query_appointment_availability_202512(line_key: str, query_data: Dict[str, A
             
             # 格式化給用戶的訊息
             staff_shifts = schedule_result.get('staff_shifts', [])
+            message = ResponseBuilder()
             if staff_shifts:
-                user_message = f"{schedule_result.get('date', date)} 班表：\n" + "\n".join(staff_shifts)
+                message.add('schedule.list_header', date=schedule_result.get('date', date))
+                message.add_text("\n".join(staff_shifts))
             else:
-                user_message = f"{schedule_result.get('date', date)} 沒有排班記錄"
+                message.add('schedule.no_shifts', date=schedule_result.get('date', date))
             
             return {
                 'should_query': True,
                 'is_schedule_query': True,
                 'schedule_result': schedule_result,
-                'user_message': user_message,
+                'user_message': message.render(),
+                'user_message_template': message.to_list(),
                 'query_type': 'schedule',
                 'success': True
             }
@@ -963,9 +1044,12 @@ def query_appointment_availability_202512(line_key: str, query_data: Dict[str, A
         'count': count
     }
     
-    # 獲取師傅店家分佈（用於後續可能的擴展）
+    # 取得當日資料快照（房間、師傅狀態、師傅店家分佈來自同一版本），黑名單只查詢一次
     storeid = _get_storeid_from_branch(branch)
-    store_distribution = _get_staff_store_distribution(date, storeid)
+    if snapshot is None:
+        snapshot = get_day_snapshot(date, room_status_manager.workday_manager)
+    store_distribution = snapshot.store_distribution or {}
+    blocked_staffs = blacklist_mgr.getBlockedStaffsList(line_key)
     
     print("DEBUG [Query]: 執行可用性查詢")
     print(f"  - 店家: {branch} (ID: {storeid})")
@@ -977,10 +1061,10 @@ def query_appointment_availability_202512(line_key: str, query_data: Dict[str, A
     
     try:
         # 直接調用 core.common 中的現有函數
-        availability_result = room_status_manager.query_available_appointment_202512(query_params)
+        availability_result = room_status_manager.query_available_appointment_202512(query_params, snapshot)
         
         # 應用黑名單過濾
-        availability_result = _filter_block_masseurs(availability_result, line_key)
+        availability_result = _filter_block_masseurs(availability_result, line_key, blocked_staffs)
         
         # 應用師傅店家分佈過濾
         if store_distribution:
@@ -992,6 +1076,14 @@ def query_appointment_availability_202512(line_key: str, query_data: Dict[str, A
                 time  # 傳入查詢時間
             )
         
+        # 指定分店無法預約（無房間或無師傅）時，同一次查詢提供跨店/鄰近時段的替代方案
+        if not availability_result.get('can_book', False) and \
+           availability_result.get('step') in ('complete', 'room_availability_check'):
+            alternatives = _find_cross_store_alternatives(line_key, query_params, storeid, store_distribution,
+                                                          snapshot, blocked_staffs)
+            if alternatives:
+                availability_result['cross_store_alternatives'] = alternatives
+        
         # 添加查詢標記
         availability_result['should_query'] = True
         availability_result['query_params'] = query_params
@@ -8,6 +8,8 @@
 
 from typing import Dict, Any, Optional
 
+from modules.response_templates import ResponseBuilder
+
 
 def _format_time_hm(time_str: str) -> str:
     """
@@ -35,6 +37,59 @@ def _format_time_hm(time_str: str) -> str:
     return time_str
 
 
+def _add_cross_store_alternatives(builder: ResponseBuilder, alternatives: Optional[Dict[str, Any]]):
+    """
+    將跨店替代方案加入回應訊息
+    
+    Args:
+        builder: 回應訊息
+        alternatives: appointment_query 產生的 cross_store_alternatives
+    """
+    if not alternatives:
+        return
+    
+    same_time = alternatives.get('same_time_other_stores', [])
+    nearest_time = alternatives.get('nearest_time_same_store', [])
+    
+    if same_time:
+        builder.add('result.same_time_other_stores')
+        for option in same_time:
+            masseurs = option.get('available_masseurs', [])
+            masseur_info = f"（{', '.join(masseurs)}）" if masseurs else ""
+            builder.add_text(f" • {option.get('store_name', '')} {option.get('time', '')}{masseur_info}")
+    
+    if nearest_time:
+        builder.add('result.same_store_other_times')
+        for option in nearest_time:
+            masseurs = option.get('available_masseurs', [])
+            masseur_info = f"（{', '.join(masseurs)}）" if masseurs else ""
+            builder.add_text(f" • {option.get('store_name', '')} {option.get('time', '')}{masseur_info}")
+
+
+def _add_query_conditions(builder: ResponseBuilder, query_data: Dict[str, Any]):
+    """
+    將查詢條件（店家、日期時間、療程、人數）加入回應訊息，最後加一行空行分隔
+    
+    Args:
+        builder: 回應訊息
+        query_data: 已套用預設值的查詢資料
+    """
+    builder.add('result.conditions')
+    default_mark = {'id': 'result.default_mark'}
+    builder.add('result.branch', branch=query_data.get('branch', ''),
+                default_mark=default_mark if query_data.get('used_default_branch') else '')
+    
+    date = query_data.get('date', '')
+    time = _format_time_hm(query_data.get('time', ''))  # 格式化時間為 HH:MM
+    builder.add('result.datetime', date=date, time=time)
+    
+    builder.add('result.project', project=query_data.get('project', 0),
+                default_mark=default_mark if query_data.get('used_default_project') else '')
+    builder.add('result.count', count=query_data.get('count', 1))
+    
+    builder.add_text("")  # 空行分隔
+
+
 def format_appointment_result(
     analysis_result: Dict[str, Any],
     availability_result: Optional[Dict[str, Any]] = None
@@ -43,6 +98,9 @@ def format_appointment_result(
     整合分析結果和查詢結果，生成完整的預約處理結果
     （基於原始 appointment.py 的邏輯）
     
+    回應訊息以 ResponseBuilder 組成：response_message 為繁體中文，
+    response_message_template 記錄 [訊息 ID, 參數] 列表，文字輸出階段依用戶語系直接套用樣板
+    
     Args:
         analysis_result: 分析模塊的結果
         availability_result: 查詢模塊的結果（可選）
@@ -70,12 +128,15 @@ def format_appointment_result(
         
         # 檢查是否為班表查詢
         if availability_result.get('is_schedule_query', False):
+            builder = ResponseBuilder()
             # 處理班表查詢結果
             if availability_result.get('success'):
                 # 檢查是否有預格式化的用戶訊息
                 user_message = availability_result.get('user_message')
                 if user_message:
                     result['response_message'] = user_message
+                    if availability_result.get('user_message_template'):
+                        result['response_message_template'] = availability_result['user_message_template']
                     result['can_book'] = True
                     result['is_schedule_query'] = True
                     print("DEBUG [Result]: 使用預格式化的班表訊息")
@@ -110,8 +171,7 @@ def format_appointment_result(
                     staff_shifts = filtered_shifts
                 
                 if staff_shifts:
-                    response_parts = []
-                    response_parts.append(f"📅 {query_date} 班表\n")
+                    builder.add('schedule.header', date=query_date)
                     
                     for shift in staff_shifts:
                         # 解析字符串格式 "師傅名稱:(時間區間)"
@@ -132,9 +192,8 @@ def format_appointment_result(
                                 else:
                                     store_info = f" - ({', '.join(store_names)})"
                             
-                            response_parts.append(f"【{staff_name}】{shift_times}{store_info}\n")
+                            builder.add_text(f"【{staff_name}】{shift_times}{store_info}\n")
                     
-                    result['response_message'] = '\n'.join(response_parts)
                     result['can_book'] = True  # 班表查詢成功
                     result['is_schedule_query'] = True
                     
@@ -145,29 +204,32 @@ def format_appointment_result(
                         print(f"  - 查詢師傅: {specified_masseurs}")
                 else:
                     if specified_masseurs:
-                        result['response_message'] = f"📅 {query_date}\n\n查無 {', '.join(specified_masseurs)} 的班表資料"
+                        builder.add('schedule.not_found_staff', date=query_date, staff=', '.join(specified_masseurs))
                     else:
-                        result['response_message'] = f"📅 {query_date}\n\n查無班表資料"
+                        builder.add('schedule.not_found', date=query_date)
                     result['can_book'] = False
                     result['is_schedule_query'] = True
                     
                     print("DEBUG [Result]: 班表查詢無資料")
             else:
-                # 班表查詢失敗
-                error_msg = availability_result.get('error', '未知錯誤')
-                result['response_message'] = f"❌ 班表查詢失敗：{error_msg}"
+                # 班表查詢失敗（錯誤訊息來自例外，不在樣板中）
+                error_msg = availability_result.get('error')
+                builder.add('schedule.failed',
+                            error={'id': 'common.unknown_error'} if error_msg is None else {'translate': error_msg})
                 result['can_book'] = False
                 result['is_schedule_query'] = True
                 
                 print(f"DEBUG [Result]: 班表查詢失敗 - {error_msg}")
             
+            result['response_message'] = builder.render()
+            result['response_message_template'] = builder.to_list()
             return result
         
         # 根據查詢結果生成回應訊息（使用原始邏輯）
         if availability_result.get('success'):
             print("DEBUG [Result]: 進入成功分支，開始生成回應訊息")
             # 構建回應訊息
-            response_parts = []
+            builder = ResponseBuilder()
             
             # 查詢結果
             query_data_from_avail = availability_result.get('query_data', {})
@@ -182,46 +244,21 @@ def format_appointment_result(
                 unavailable = masseur_avail.get('unavailable_masseurs', [])
                 alternative = masseur_avail.get('alternative_masseurs', [])
                 
-                response_parts.append("\n✅ 可預約")
+                builder.add('result.can_book')
                 
                 # 顯示查詢條件
-                response_parts.append("\n📋 查詢條件：")
-                branch = query_data.get('branch', '')
-                if query_data.get('used_default_branch'):
-                    branch += " (預設)"
-                response_parts.append(f"店家：{branch}")
-                
-                date = query_data.get('date', '')
-                time = query_data.get('time', '')
-                time = _format_time_hm(time)  # 格式化時間為 HH:MM
-                response_parts.append(f"日期時間：{date} {time}")
-                
-                project = query_data.get('project', 0)
-                if query_data.get('used_default_project'):
-                    response_parts.append(f"療程：{project} 分鐘 (預設)")
-                else:
-                    response_parts.append(f"療程：{project} 分鐘")
-                
-                count = query_data.get('count', 1)
-                response_parts.append(f"人數：{count} 位")
-                
-                masseur_list = query_data.get('masseur', [])
-                #if masseur_list:
-                #    response_parts.append(f"指定師傅：{', '.join(masseur_list)}")
-                
-                response_parts.append("")  # 空行分隔
+                _add_query_conditions(builder, query_data)
                 
                 if available:
                     # 處理 available 可能是字典列表或字符串列表的情況
                     if available and isinstance(available[0], dict):
                         # 字典列表：提取 name 欄位
                         available_names = [item['name'] for item in available]
-                        response_parts.append(f"可約師傅：{', '.join(available_names)}")
-                        print(f"DEBUG [Result]: 可約師傅: {', '.join(available_names)}")
                     else:
                         # 字符串列表
-                        response_parts.append(f"可約師傅：{', '.join(available)}")
-                        print(f"DEBUG [Result]: 可約師傅: {', '.join(available)}")
+                        available_names = available
+                    builder.add('result.available_staff', names=', '.join(available_names))
+                    print(f"DEBUG [Result]: 可約師傅: {', '.join(available_names)}")
                 
                 # 只顯示 alternative_masseurs（已包含所有其他師傅資訊）
                 # alternative_masseurs 包含：
@@ -243,7 +280,7 @@ def format_appointment_result(
                     
                     # 只有在有需要顯示的師傅時才顯示「其他師傅」區塊
                     if filtered_alternative:
-                        response_parts.append("\n其他師傅：")
+                        builder.add('result.other_staff')
                         for alt in filtered_alternative:
                             if isinstance(alt, dict):
                                 name = alt.get('name', '未知')
@@ -261,23 +298,23 @@ def format_appointment_result(
                                 # 格式化顯示 - 只有當 time 有實際值時才顯示時間
                                 if stores and time and time != 'None' and time is not None:
                                     print(f"DEBUG [Result Format]: 顯示 {name} with store and time")
-                                    response_parts.append(f"  • {name} ({stores}) - {time}")
+                                    builder.add_text(f"  • {name} ({stores}) - {time}")
                                 elif time and time != 'None' and time is not None:
                                     print(f"DEBUG [Result Format]: 顯示 {name} with time only")
-                                    response_parts.append(f"  • {name} - {time}")
+                                    builder.add_text(f"  • {name} - {time}")
                                 elif stores:
                                     print(f"DEBUG [Result Format]: 顯示 {name} with store only")
-                                    response_parts.append(f"  • {name} ({stores})")
+                                    builder.add_text(f"  • {name} ({stores})")
                                 else:
                                     print(f"DEBUG [Result Format]: 顯示 {name} name only")
-                                    response_parts.append(f"  • {name}")
+                                    builder.add_text(f"  • {name}")
                             else:
                                 # 如果是字串格式，直接顯示
-                                response_parts.append(f"  • {alt}")
+                                builder.add_text(f"  • {alt}")
             else:
                 print("DEBUG [Result]: can_book=False，生成無法預約訊息")
                 # 判斷無法預約的原因
-                reason = ""
+                reason = None
                 masseur_avail = availability_result.get('masseur_availability', {})
                 room_avail = availability_result.get('room_availability', {})
                 
@@ -307,56 +344,33 @@ def format_appointment_result(
                         # 單一師傅查詢
                         if has_schedule:
                             # 有排班但此時段不可用
-                            reason = "該時段查詢失敗"
+                            reason = {'id': 'reason.time_slot_failed'}
                         else:
                             # 無排班
-                            reason = "約滿或無排班"
+                            reason = {'id': 'reason.fully_booked'}
                     else:
                         # 多位師傅查詢（無指定或多位指定）
-                        reason = "該時段查詢失敗"
+                        reason = {'id': 'reason.time_slot_failed'}
                 elif not available_masseurs:
                     if is_single_masseur:
-                        reason = "約滿或無排班"
+                        reason = {'id': 'reason.fully_booked'}
                     else:
-                        reason = "該時段查詢失敗"
+                        reason = {'id': 'reason.time_slot_failed'}
                 elif not room_avail.get('available_at_requested_time', False):
-                    reason = "無可用房間"
+                    reason = {'id': 'reason.no_room'}
                 else:
                     # 人數不足或其他原因
                     requested_count = query_data.get('count', 1)
                     if len(available_masseurs) < requested_count:
-                        reason = f"師傅不足(需{requested_count}位/有{len(available_masseurs)}位)"
+                        reason = {'id': 'reason.staff_shortage',
+                                  'params': {'required': requested_count, 'available': len(available_masseurs)}}
                     else:
-                        reason = "其他原因"
+                        reason = {'id': 'reason.other'}
                 
-                response_parts.append(f"\n⚠️請參考建議名單 ({reason})")
+                builder.add('result.suggest_header', reason=reason)
             
                 # 顯示查詢條件
-                response_parts.append("\n📋 查詢條件：")
-                branch = query_data.get('branch', '')
-                if query_data.get('used_default_branch'):
-                    branch += " (預設)"
-                response_parts.append(f"店家：{branch}")
-                
-                date = query_data.get('date', '')
-                time = query_data.get('time', '')
-                time = _format_time_hm(time)  # 格式化時間為 HH:MM
-                response_parts.append(f"日期時間：{date} {time}")
-                
-                project = query_data.get('project', 0)
-                if query_data.get('used_default_project'):
-                    response_parts.append(f"療程：{project} 分鐘 (預設)")
-                else:
-                    response_parts.append(f"療程：{project} 分鐘")
-                
-                count = query_data.get('count', 1)
-                response_parts.append(f"人數：{count} 位")
-                
-                masseur_list = query_data.get('masseur', [])
-                #if masseur_list:
-                #    response_parts.append(f"指定師傅：{', '.join(masseur_list)}")
-                
-                response_parts.append("")  # 空行分隔
+                _add_query_conditions(builder, query_data)
                 
                 # 取得 alternative_masseurs
                 alternative = masseur_avail.get('alternative_masseurs', [])
@@ -379,7 +393,7 @@ def format_appointment_result(
                     
                     # 只有在有可用時段的師傅時才顯示「建議時段」區塊
                     if filtered_alternative:
-                        response_parts.append("\n💡 建議名單：")
+                        builder.add('result.suggestions')
                         for alt in filtered_alternative:
                             if isinstance(alt, dict):
                                 name = alt.get('name', '未知')
@@ -392,16 +406,20 @@ def format_appointment_result(
                                 
                                 # 格式化顯示：師傅-時間 店家
                                 if stores:
-                                    response_parts.append(f" • {name}-{time} {stores}")
+                                    builder.add_text(f" • {name}-{time} {stores}")
                                 else:
-                                    response_parts.append(f" • {name}-{time}")
+                                    builder.add_text(f" • {name}-{time}")
                             else:
                                 # 字串格式的備用處理
-                                response_parts.append(f" • {alt}")
+                                builder.add_text(f" • {alt}")
                 
                 # 房間建議已移除（時間已在查詢條件中顯示）
+                
+                # 跨店/鄰近時段替代方案
+                _add_cross_store_alternatives(builder, availability_result.get('cross_store_alternatives'))
             
-            result['response_message'] = '\n'.join(response_parts)
+            result['response_message'] = builder.render()
+            result['response_message_template'] = builder.to_list()
             result['availability_checked'] = True
             
             print("DEBUG [Result]: 結果生成完成")
@@ -414,59 +432,38 @@ def format_appointment_result(
             # 檢查是否為過期時間
             is_expired = availability_result.get('is_expired', False)
             
-            response_parts = []
+            builder = ResponseBuilder()
             
             if is_expired:
                 # 過期時間的特殊訊息
-                response_parts.append("\n❌ 無法查詢已過期時間")
+                builder.add('result.expired')
             else:
                 # 一般查詢失敗
-                response_parts.append("\n❌ 查詢失敗")
+                builder.add('result.failed')
             
             # 顯示查詢條件
-            response_parts.append("\n📋 查詢條件：")
-            branch = query_data.get('branch', '')
-            if query_data.get('used_default_branch'):
-                branch += " (預設)"
-            response_parts.append(f"店家：{branch}")
-            
-            date = query_data.get('date', '')
-            time = query_data.get('time', '')
-            time = _format_time_hm(time)  # 格式化時間為 HH:MM
-            response_parts.append(f"日期時間：{date} {time}")
-            
-            project = query_data.get('project', 0)
-            if query_data.get('used_default_project'):
-                response_parts.append(f"療程：{project} 分鐘 (預設)")
-            else:
-                response_parts.append(f"療程：{project} 分鐘")
-            
-            count = query_data.get('count', 1)
-            response_parts.append(f"人數：{count} 位")
-            
-            masseur_list = query_data.get('masseur', [])
-            #if masseur_list:
-            #    response_parts.append(f"指定師傅：{', '.join(masseur_list)}")
-            
-            response_parts.append("")  # 空行分隔
+            _add_query_conditions(builder, query_data)
             
             if is_expired:
                 # 過期時間不顯示"無師傅符合查詢條件"
                 pass
             else:
                 # 一般查詢失敗才顯示
-                response_parts.append("無師傅符合查詢條件")
+                builder.add('result.no_staff_match')
+                
+                # 跨店/鄰近時段替代方案
+                _add_cross_store_alternatives(builder, availability_result.get('cross_store_alternatives'))
             
-            # 如果有錯誤訊息，也顯示出來
+            # 如果有錯誤訊息，也顯示出來（錯誤訊息不在樣板中，需要時翻譯）
             error_msg = availability_result.get('error', '')
             if error_msg:
-                response_parts.append(f"\n錯誤訊息：{error_msg}")
+                builder.add('result.error', error={'translate': error_msg})
             
-            result['response_message'] = '\n'.join(response_parts)
+            result['response_message'] = builder.render()
+            result['response_message_template'] = builder.to_list()
             result['availability_checked'] = True
             result['can_book'] = False
             
             print(f"  - 回應訊息: {result.get('response_message', '無')}")
     
     return result
-
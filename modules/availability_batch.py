@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次可用性查詢模塊
+一次處理多筆 (date, time, duration, guest, storeid, lineid) 查詢：
+- 依日期分組，每個日期只載入一次當日資料（房間、師傅工作狀態、師傅店家分佈）
+- 同一日期內的查詢共用 bitmask 與連續視窗計算結果
+- 黑名單每個 lineid 只查詢一次
+- 結果依輸入順序返回
+
+單筆判斷規則與 /rooms/checkRoomCanBook、/rooms/checkStaffCanBook 相同。
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.blacklist import BlacklistManager
+from core.room_engine import BLOCKS_PER_DAY, flags_to_mask, window_mask
+from modules.day_snapshot import get_day_snapshot
+from modules.workday_manager import WorkdayManager
+from utils.async_helpers import executor_pool, POOL_DB
+
+# 房間陣列長度（288 個 block 代表 24 小時，再加 6 個 block 的緩衝）
+ROOM_BLOCK_LEN = BLOCKS_PER_DAY + 6
+
+
+def _parse_instores(instores) -> set:
+    """處理多種 instores 格式：字串 "[1,2,3]"、列表 [1,2,3]、集合或元組"""
+    if isinstance(instores, str):
+        try:
+            instores_list = json.loads(instores)
+            if isinstance(instores_list, list):
+                return set(int(s) for s in instores_list if s)
+        except (json.JSONDecodeError, ValueError, TypeError):
+            pass
+        return set()
+    if isinstance(instores, (list, set, tuple)):
+        return set(int(s) for s in instores if s)
+    return set()
+
+
+class DayAvailability:
+    """單日資料與共用的 bitmask / 視窗快取"""
+
+    def __init__(self, room_status: Optional[Dict], work_status: Optional[Dict], staff_store_map: Optional[Dict]):
+        self.room_status = room_status
+        self.work_status = work_status
+        self.staff_store_map = staff_store_map
+        self._room_windows: Dict[Tuple[str, int, int], int] = {}
+        self._staff_masks: Dict[str, int] = {}
+        self._staff_windows: Dict[Tuple[str, int], int] = {}
+        self._staff_stores: Dict[str, set] = {}
+
+    @classmethod
+    def load(cls, date_str: str, workday_manager: Optional[WorkdayManager] = None) -> 'DayAvailability':
+        """載入單日資料（每個日期只呼叫一次，取自同一份當日快照）"""
+        snapshot = get_day_snapshot(date_str, workday_manager)
+        return cls(snapshot.room_status, snapshot.work_status, snapshot.staff_store_map)
+
+    def room_window(self, store_key: str, guest: int, duration_blocks: int) -> int:
+        """店家在 bit s 開始、連續 duration_blocks 個 block 房間數 >= guest 的 bitmask"""
+        key = (store_key, guest, duration_blocks)
+        window = self._room_windows.get(key)
+        if window is None:
+            free_blocks = self.room_status[store_key].get('free_blocks', [])
+            window = window_mask(flags_to_mask(free >= guest for free in free_blocks), duration_blocks)
+            self._room_windows[key] = window
+        return window
+
+    def staff_window(self, staff_name: str, duration_blocks: int) -> int:
+        """師傅在 bit s 開始可連續服務 duration_blocks 個 block 的 bitmask"""
+        key = (staff_name, duration_blocks)
+        window = self._staff_windows.get(key)
+        if window is None:
+            mask = self._staff_masks.get(staff_name)
+            if mask is None:
+                mask = flags_to_mask(self.work_status[staff_name].get('freeblocks', []))
+                self._staff_masks[staff_name] = mask
+            window = window_mask(mask, duration_blocks)
+            self._staff_windows[key] = window
+        return window
+
+    def staff_stores(self, staff_name: str) -> Optional[set]:
+        """師傅當日所在店家集合，不在店家分佈中時返回 None"""
+        if staff_name not in self._staff_stores:
+            staff_info = self.staff_store_map.get(staff_name)
+            self._staff_stores[staff_name] = None if staff_info is None else _parse_instores(staff_info.get('instores', []))
+        return self._staff_stores[staff_name]
+
+
+def _validate_query(query: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """驗證並轉換日期時間，返回 (date_str, time_str, error)"""
+    try:
+        date_str = datetime.strptime(str(query.get('date', '')).strip(), '%Y-%m-%d').strftime('%Y/%m/%d')
+    except ValueError:
+        return None, None, '日期格式錯誤，應為 YYYY-MM-DD'
+
+    time_str = str(query.get('time', '')).strip()
+    try:
+        datetime.strptime(time_str, '%H:%M')
+    except ValueError:
+        return None, None, '時間格式錯誤，應為 HH:MM'
+
+    if int(query.get('duration') or 0) < 1:
+        return None, None, '預約時長必須大於 0 分鐘'
+    return date_str, time_str, None
+
+
+def _start_block(time_str: str) -> int:
+    hours, minutes = time_str.split(':')
+    return (int(hours) * 60 + int(minutes)) // 5
+
+
+def evaluate_room_query(day: DayAvailability, time_str: str, duration: int, guest: int,
+                        storeid: Optional[str]) -> Dict[str, Any]:
+    """檢查房間是否足夠（與 checkRoomCanBook 相同規則，不檢查進出場時間）"""
+    if guest < 1:
+        return {'result': False, 'error': '客人數量必須大於 0'}
+    if day.room_status is None:
+        return {'result': False, 'error': '無法獲取該日期的房間狀態'}
+
+    duration_blocks = (duration + 4) // 5  # 向上取整
+    start_block = _start_block(time_str)
+    if start_block + duration_blocks > ROOM_BLOCK_LEN:
+        return {'result': False, 'error': '預約時間超過當日營業時間'}
+
+    if storeid is not None:
+        store_key = storeid.strip()
+        if not store_key:
+            return {'result': False, 'error': '店家ID不能為空'}
+        if store_key not in day.room_status:
+            return {'result': False, 'error': f'店家ID {store_key} 不存在'}
+        if (day.room_window(store_key, guest, duration_blocks) >> start_block) & 1:
+            return {'result': True, 'store_id': store_key}
+        return {'result': False, 'error': f'店家 {store_key} 沒有足夠的房間可以預約', 'store_id': store_key}
+
+    for store_key in day.room_status:
+        if (day.room_window(store_key, guest, duration_blocks) >> start_block) & 1:
+            return {'result': True, 'store_id': store_key}
+    return {'result': False, 'error': '沒有足夠的房間可以預約'}
+
+
+def evaluate_staff_query(day: DayAvailability, time_str: str, duration: int, storeid: Optional[str],
+                         blocked_staffs: List[str]) -> Dict[str, Any]:
+    """檢查可連續服務的師傅（與 checkStaffCanBook 相同規則）"""
+    store_id_filter = None
+    if storeid is not None and storeid.strip():
+        try:
+            store_id_filter = int(storeid.strip())
+        except ValueError:
+            return {'result': False, 'error': '店家ID必須為有效的整數', 'available_staffs': []}
+
+    if day.work_status is None:
+        return {'result': False, 'error': '無法獲取該日期的師傅工作狀態', 'available_staffs': []}
+    if day.staff_store_map is None:
+        return {'result': False, 'error': '無法獲取該日期的師傅店家分佈', 'available_staffs': []}
+
+    duration_blocks = (duration + 4) // 5  # 向上取整
+    start_block = _start_block(time_str)
+    if start_block + duration_blocks > BLOCKS_PER_DAY:
+        return {'result': False, 'error': '預約時間超過當日營業時間', 'available_staffs': []}
+
+    available_staffs = []
+    for staff_name in day.work_status:
+        if not (day.staff_window(staff_name, duration_blocks) >> start_block) & 1:
+            continue
+        instores_set = day.staff_stores(staff_name)
+        if instores_set is None:
+            continue
+        if store_id_filter is not None and store_id_filter not in instores_set:
+            continue
+        if staff_name in blocked_staffs:
+            continue
+        available_staffs.append({'name': staff_name, 'stores': sorted(instores_set)})
+
+    if available_staffs:
+        return {'result': True, 'available_staffs': available_staffs, 'count': len(available_staffs)}
+    return {'result': False, 'error': '沒有師傅可以在指定時間提供服務', 'available_staffs': []}
+
+
+@executor_pool(POOL_DB)
+def run_availability_batch(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    批次執行可用性查詢
+
+    Args:
+        queries: [{'date': 'YYYY-MM-DD', 'time': 'HH:MM', 'duration': 90, 'guest': 1,
+                   'storeid': 1、'1' 或 None, 'lineid': 'U...' 或 None}, ...]
+
+    Returns:
+        與輸入順序相同的結果列表，每筆包含 'room'（同 checkRoomCanBook）與 'staff'（同 checkStaffCanBook）
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    by_date: Dict[str, List[Tuple[int, str]]] = {}
+
+    for index, query in enumerate(queries):
+        date_str, time_str, error = _validate_query(query)
+        if error:
+            results[index] = {
+                'index': index,
+                'room': {'result': False, 'error': error},
+                'staff': {'result': False, 'error': error, 'available_staffs': []}
+            }
+            continue
+        by_date.setdefault(date_str, []).append((index, time_str))
+
+    blacklist_manager = BlacklistManager()
+    super_blacklist_cache: Dict[str, bool] = {}
+    blocked_staffs_cache: Dict[str, List[str]] = {}
+    workday_manager = WorkdayManager()
+
+    for date_str, items in by_date.items():
+        print(f"[DEBUG] availability batch - {date_str}: {len(items)} 筆查詢，載入當日資料一次")
+        day = DayAvailability.load(date_str, workday_manager)
+
+        for index, time_str in items:
+            query = queries[index]
+            lineid = query.get('lineid')
+            storeid = query.get('storeid')
+            duration = int(query.get('duration'))
+            guest = int(query.get('guest') or 1)
+
+            if lineid:
+                if lineid not in super_blacklist_cache:
+                    super_blacklist_cache[lineid] = blacklist_manager.is_super_blacklist(lineid)
+                if super_blacklist_cache[lineid]:
+                    results[index] = {
+                        'index': index,
+                        'room': {'result': False},
+                        'staff': {'result': False, 'available_staffs': []}
+                    }
+                    continue
+                if lineid not in blocked_staffs_cache:
+                    blocked_staffs_cache[lineid] = blacklist_manager.getBlockedStaffsList(lineid)
+            blocked_staffs = blocked_staffs_cache.get(lineid, []) if lineid else []
+
+            storeid = str(storeid) if storeid is not None else None
+            results[index] = {
+                'index': index,
+                'room': evaluate_room_query(day, time_str, duration, guest, storeid),
+                'staff': evaluate_staff_query(day, time_str, duration, storeid, blocked_staffs)
+            }
+
+    return results
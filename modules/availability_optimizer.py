@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨店可用性最佳化模塊
+當指定分店在指定時段沒有房間或師傅時，一次評估所有店家，
+直接在同一個回應中提供排序後的替代方案：
+1. 同時段、其他分店
+2. 同分店、最接近的時段
+
+以 bitmask 表示「房間矩陣 × 師傅矩陣 × 師傅店家分佈」，
+每個 bit 代表一個 5 分鐘 block，所有店家與所有候選時段在同一輪整數運算中完成。
+"""
+
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+from core.room_engine import BLOCKS_PER_DAY, TIME_LABELS, flags_to_mask, iter_bits, window_mask
+
+# 替代時段以 15 分鐘（3 個 block）為間隔
+CANDIDATE_STEP_BLOCKS = 3
+DEFAULT_MAX_RESULTS = 3
+
+
+class DayAvailabilityMatrix:
+    """
+    單日所有店家的可用性矩陣
+
+    Args:
+        room_status: WorkdayManager.get_all_room_status 的結果
+            {"1": {"store_name": "西門", "free_blocks": [4, 4, 3, ...]}, ...}
+        work_status: WorkdayManager.get_all_work_day_status 的結果
+            {"師傅名": {"freeblocks": [True, False, ...]}, ...}
+        store_distribution: 師傅店家分佈 {"師傅名": [1, 2], ...}
+    """
+
+    def __init__(self, room_status: Dict[str, Dict], work_status: Dict[str, Dict],
+                 store_distribution: Optional[Dict[str, list]] = None):
+        self.store_names: Dict[int, str] = {}
+        self._room_free_blocks: Dict[int, List[int]] = {}
+        for store_key, store_data in (room_status or {}).items():
+            store_id = int(store_key)
+            self.store_names[store_id] = store_data.get('store_name') or f"店{store_id}"
+            self._room_free_blocks[store_id] = store_data.get('free_blocks', [])
+
+        self.staff_masks: Dict[str, int] = {
+            staff_name: flags_to_mask(staff_info.get('freeblocks', []))
+            for staff_name, staff_info in (work_status or {}).items()
+        }
+
+        # 無店家分佈資訊的師傅視為各店皆可（與 _filter_masseurs_by_store_distribution 的保守處理一致）
+        distribution = store_distribution or {}
+        self.staff_stores: Dict[str, Optional[Set[int]]] = {}
+        for staff_name in self.staff_masks:
+            stores = distribution.get(staff_name)
+            self.staff_stores[staff_name] = {int(s) for s in stores} if stores else None
+
+        self._room_mask_cache: Dict[tuple, int] = {}
+
+    @property
+    def store_ids(self) -> List[int]:
+        return sorted(self._room_free_blocks)
+
+    def room_mask(self, store_id: int, guest_count: int) -> int:
+        """店家房間數 >= guest_count 的 block bitmask"""
+        key = (store_id, guest_count)
+        mask = self._room_mask_cache.get(key)
+        if mask is None:
+            free_blocks = self._room_free_blocks.get(store_id, [])
+            mask = flags_to_mask(free >= guest_count for free in free_blocks)
+            self._room_mask_cache[key] = mask
+        return mask
+
+    def staff_for_store(self, store_id: int, exclude: Iterable[str] = ()) -> List[str]:
+        """當天在該店服務（或無分佈資訊）的師傅"""
+        excluded = set(exclude)
+        return [
+            staff_name for staff_name, stores in self.staff_stores.items()
+            if staff_name not in excluded and (stores is None or store_id in stores)
+        ]
+
+    def feasible_starts(self, store_id: int, total_blocks: int, guest_count: int,
+                        exclude: Iterable[str] = ()) -> int:
+        """
+        可預約開始 block 的 bitmask：房間足夠且至少 guest_count 位師傅可連續服務
+
+        師傅人數門檻以位元計數器計算：at_least[k] 的 bit s 表示至少 k 位師傅在 s 開始可服務
+        """
+        room_ok = window_mask(self.room_mask(store_id, guest_count), total_blocks)
+        if not room_ok:
+            return 0
+
+        at_least = [room_ok] + [0] * guest_count
+        for staff_name in self.staff_for_store(store_id, exclude):
+            staff_window = window_mask(self.staff_masks[staff_name], total_blocks) & room_ok
+            if not staff_window:
+                continue
+            for k in range(guest_count, 0, -1):
+                at_least[k] |= at_least[k - 1] & staff_window
+        return at_least[guest_count]
+
+    def available_staff_at(self, store_id: int, start_block: int, total_blocks: int,
+                           exclude: Iterable[str] = ()) -> List[str]:
+        """在 start_block 開始可連續服務 total_blocks 的該店師傅"""
+        span = ((1 << total_blocks) - 1) << start_block
+        return [
+            staff_name for staff_name in self.staff_for_store(store_id, exclude)
+            if self.staff_masks[staff_name] & span == span
+        ]
+
+
+def _candidate_mask(start_block: int, earliest_block: int) -> int:
+    """與查詢時間對齊、每 15 分鐘一個的候選開始 block（不早於 earliest_block）"""
+    mask = 0
+    first = start_block % CANDIDATE_STEP_BLOCKS
+    for block in range(first, BLOCKS_PER_DAY, CANDIDATE_STEP_BLOCKS):
+        if block >= earliest_block:
+            mask |= 1 << block
+    return mask
+
+
+def _build_option(matrix: DayAvailabilityMatrix, store_id: int, block: int, total_blocks: int,
+                  masseur_names: List[str], blocked: Set[str]) -> Dict[str, Any]:
+    staff = matrix.available_staff_at(store_id, block, total_blocks, blocked)
+    requested_available = [name for name in masseur_names if name in staff]
+    # 指定師傅排在前面
+    ordered_staff = requested_available + [name for name in staff if name not in requested_available]
+    return {
+        'store_id': store_id,
+        'store_name': matrix.store_names.get(store_id, f"店{store_id}"),
+        'time': TIME_LABELS[block],
+        'available_masseurs': ordered_staff,
+        'requested_masseurs_available': requested_available
+    }
+
+
+def find_cross_store_alternatives(
+    matrix: DayAvailabilityMatrix,
+    target_store_id: int,
+    start_block: int,
+    total_blocks: int,
+    guest_count: int,
+    masseur_names: Optional[List[str]] = None,
+    blocked_staffs: Optional[Iterable[str]] = None,
+    earliest_block: int = 0,
+    max_results: int = DEFAULT_MAX_RESULTS
+) -> Dict[str, Any]:
+    """
+    一次評估所有店家，返回排序後的替代方案
+
+    Args:
+        matrix: 單日可用性矩陣
+        target_store_id: 客人指定的分店
+        start_block: 查詢開始 block
+        total_blocks: 所需 block 數（含緩衝時間）
+        guest_count: 客人數量
+        masseur_names: 指定師傅（有指定時優先排序）
+        blocked_staffs: 黑名單師傅
+        earliest_block: 最早可建議的 block（今天查詢時為現在時間）
+        max_results: 每一類最多返回幾筆
+
+    Returns:
+        {
+            'same_time_other_stores': [{'store_id', 'store_name', 'time', 'available_masseurs', ...}, ...],
+            'nearest_time_same_store': [...]
+        }
+    """
+    masseur_names = list(masseur_names or [])
+    blocked = set(blocked_staffs or [])
+    guest_count = max(int(guest_count or 1), 1)
+    candidates = _candidate_mask(start_block, earliest_block)
+
+    feasible = {
+        store_id: matrix.feasible_starts(store_id, total_blocks, guest_count, blocked) & candidates
+        for store_id in matrix.store_ids
+    }
+
+    # 1. 同時段、其他分店
+    same_time = []
+    if start_block >= earliest_block:
+        for store_id, starts in feasible.items():
+            if store_id == target_store_id or not (starts >> start_block) & 1:
+                continue
+            same_time.append(_build_option(matrix, store_id, start_block, total_blocks, masseur_names, blocked))
+    same_time.sort(key=lambda opt: (-len(opt['requested_masseurs_available']),
+                                    -len(opt['available_masseurs']),
+                                    opt['store_id']))
+
+    # 2. 同分店、最接近的時段（距離相同時優先較晚的時段）
+    nearest_blocks = sorted(
+        (block for block in iter_bits(feasible.get(target_store_id, 0)) if block != start_block),
+        key=lambda block: (abs(block - start_block), block < start_block)
+    )[:max_results]
+    nearest_time = [
+        _build_option(matrix, target_store_id, block, total_blocks, masseur_names, blocked)
+        for block in nearest_blocks
+    ]
+
+    return {
+        'same_time_other_stores': same_time[:max_results],
+        'nearest_time_same_store': nearest_time
+    }
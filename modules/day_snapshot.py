@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+單日資料快照模塊
+一次請求（/parse、/rooms/*）中所需的當日資料：
+- 房間狀態 (get_all_room_status)
+- 師傅工作狀態 (get_all_work_day_status)
+- 師傅店家對應 (get_all_staff_store_map) 與店家分佈 (_get_staff_store_distribution)
+- 進出場避開區塊 (get_all_task_avoid_block)
+以及產生這些資料時各表的最後更新時間（版本向量）。
+
+快照建立後不可修改，依 (日期, 版本向量) 保存在行程內，
+同一請求中所有查詢使用同一份快照，確保回應內容一致，也不需重複檢查各快取是否過期。
+"""
+
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+
+from modules.workday_manager import WorkdayManager, build_bookable_slot_masks, select_bookable_slot_mask
+from utils.async_helpers import executor_pool, POOL_DB
+
+# 版本向量包含的資料表（與各 Redis 快取比對的表相同）
+SNAPSHOT_TABLES = ('Store', 'Tasks', 'Staffs', 'sch', 'forcelocation')
+# 行程內最多保存幾個日期的快照
+MAX_CACHED_SNAPSHOTS = 14
+# 載入期間資料表有更新時，最多重新載入的次數
+MAX_LOAD_ATTEMPTS = 2
+
+_snapshot_cache: 'OrderedDict[str, DaySnapshot]' = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+
+def _readonly(data: Optional[Dict]) -> Optional[MappingProxyType]:
+    return MappingProxyType(data) if data is not None else None
+
+
+class DaySnapshot:
+    """單日資料的不可變快照，欄位為唯讀 mapping（內容請勿修改）"""
+
+    __slots__ = ('date', 'version', 'room_status', 'work_status', 'staff_store_map',
+                 'store_distribution', 'avoid_blocks', '_slot_masks')
+
+    def __init__(self, date: str, version: Tuple, room_status: Optional[Dict], work_status: Optional[Dict],
+                 staff_store_map: Optional[Dict], store_distribution: Optional[Dict], avoid_blocks: Optional[Dict]):
+        object.__setattr__(self, 'date', date)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'room_status', _readonly(room_status))
+        object.__setattr__(self, 'work_status', _readonly(work_status))
+        object.__setattr__(self, 'staff_store_map', _readonly(staff_store_map))
+        object.__setattr__(self, 'store_distribution', _readonly(store_distribution))
+        object.__setattr__(self, 'avoid_blocks', _readonly(avoid_blocks))
+        object.__setattr__(self, '_slot_masks', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('DaySnapshot 為唯讀物件')
+
+    def bookable_slot_mask(self, store_id: int, lead_block: Optional[int] = None) -> int:
+        """店家可預約時段 bitmask（由快照的 avoid_blocks 計算，每個快照只計算一次）"""
+        masks = self._slot_masks
+        if masks is None:
+            masks = build_bookable_slot_masks(self.avoid_blocks)
+            object.__setattr__(self, '_slot_masks', masks)
+        return select_bookable_slot_mask(masks, store_id, lead_block)
+
+
+def _normalize_date(date_str: str) -> str:
+    return date_str.strip().replace('-', '/')
+
+
+def _read_version(workday_manager: WorkdayManager) -> Tuple:
+    """讀取版本向量（一次查詢取得所有表的 UPDATE_TIME）"""
+    update_times = workday_manager.get_tables_lastupdate_time(list(SNAPSHOT_TABLES))
+    return tuple(
+        update_times[name].isoformat() if update_times.get(name) else None
+        for name in SNAPSHOT_TABLES
+    )
+
+
+def _load_parts(date_str: str, workday_manager: WorkdayManager) -> Dict[str, Any]:
+    # 延遲導入以避免與 appointment_query 循環導入
+    from modules.appointment_query import _get_staff_store_distribution
+    return {
+        'room_status': workday_manager.get_all_room_status(date_str),
+        'work_status': workday_manager.get_all_work_day_status(date_str),
+        'staff_store_map': workday_manager.get_all_staff_store_map(date_str),
+        'store_distribution': _get_staff_store_distribution(date_str, 1),
+        'avoid_blocks': workday_manager.get_all_task_avoid_block(date_str),
+    }
+
+
+@executor_pool(POOL_DB)
+def get_day_snapshot(date_str: str, workday_manager: Optional[WorkdayManager] = None) -> DaySnapshot:
+    """
+    取得指定日期的快照
+
+    先讀取版本向量，版本相同時直接返回行程內的快照；
+    否則重新載入各項資料，載入後再確認版本未變動（有變動則重新載入），確保所有資料來自同一個版本。
+
+    Args:
+        date_str: 日期，格式如 "2025/11/28" 或 "2025-11-28"
+        workday_manager: 可重用的 WorkdayManager（可選）
+
+    Returns:
+        DaySnapshot
+    """
+    date_key = _normalize_date(date_str)
+    workday_manager = workday_manager or WorkdayManager()
+    version = _read_version(workday_manager)
+
+    with _snapshot_lock:
+        cached = _snapshot_cache.get(date_key)
+        if cached is not None and cached.version == version:
+            _snapshot_cache.move_to_end(date_key)
+            print(f"DEBUG [Snapshot]: {date_key} 使用行程內快照")
+            return cached
+
+    for attempt in range(MAX_LOAD_ATTEMPTS):
+        print(f"DEBUG [Snapshot]: 載入 {date_key} 當日資料（第 {attempt + 1} 次）")
+        parts = _load_parts(date_key, workday_manager)
+        loaded_version = _read_version(workday_manager)
+        if loaded_version == version:
+            break
+        print("DEBUG [Snapshot]: 載入期間資料表有更新，重新載入")
+        version = loaded_version
+
+    snapshot = DaySnapshot(date_key, version, **parts)
+
+    # 無法取得任何版本資訊時不保存，避免永遠使用舊資料
+    if any(version):
+        with _snapshot_lock:
+            _snapshot_cache[date_key] = snapshot
+            _snapshot_cache.move_to_end(date_key)
+            while len(_snapshot_cache) > MAX_CACHED_SNAPSHOTS:
+                _snapshot_cache.popitem(last=False)
+    return snapshot
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional, Dict, Tuple
+from typing import Any, Optional, Dict, List, Tuple
 import redis
 from core.common import update_user_visitdate, get_user_info
+from modules.response_templates import render_lines, template_message
+from utils.async_helpers import executor_pool, POOL_DB
 
 # Redis Configuration
 REDIS_HOST = 'localhost'
@@ -12,6 +14,20 @@ def get_redis_connection():
     """建立 Redis 連接"""
     return redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
+def daily_greeting_template(user_info: Dict, line_user_id: str) -> List[List[Any]]:
+    """
+    問候語的樣板（[訊息 ID, 參數] 列表），供文字輸出階段以用戶語系產生問候語
+    
+    Args:
+        user_info (Dict): check_daily_greeting 返回的用戶資料
+        line_user_id (str): The LINE user ID.
+    """
+    # 沒有暱稱時的稱呼需要翻譯
+    display_name = user_info['display_name'] if 'display_name' in user_info else {'translate': '尊敬的會員'}
+    return template_message('greeting.daily', display_name=display_name,
+                            user_id=user_info.get('id', line_user_id))
+
+@executor_pool(POOL_DB)
 def check_daily_greeting(line_user_id: str) -> Tuple[Optional[str], Optional[Dict]]:
     """
     Check if a daily greeting should be sent to the user.
@@ -54,8 +70,6 @@ def check_daily_greeting(line_user_id: str) -> Tuple[Optional[str], Optional[Dic
     
     if user_info:
         old_visitdate = user_info.get('visitdate')
-        display_name = user_info.get('display_name', '尊敬的會員')
-        user_id = user_info.get('id', line_user_id)
         
         # Handle visitdate format (datetime object or string)
         visitdate_date_str = None
@@ -69,7 +83,7 @@ def check_daily_greeting(line_user_id: str) -> Tuple[Optional[str], Optional[Dic
         
         # If visitdate is None or not today, generate greeting
         if old_visitdate is None or visitdate_date_str != today:
-            greeting_message = f"親愛的會員{display_name}({user_id})您好!"
+            greeting_message = render_lines(daily_greeting_template(user_info, line_user_id))
         
         # 3. 更新 Redis 快取（記錄今天已訪問）
         try:
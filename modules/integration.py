@@ -12,6 +12,7 @@
 
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
+from modules.response_templates import SOURCE_LANGUAGE, render
 
 
 class LineMessageFormatter:
@@ -354,7 +355,8 @@ def prepend_greeting_to_message(message: str, greeting: Optional[str]) -> str:
 
 def integrate_response_messages(
     parsed_data: Dict[str, Any],
-    message_format: str = "text"
+    message_format: str = "text",
+    language: str = SOURCE_LANGUAGE
 ) -> Dict[str, Any]:
     """
     整合所有回應訊息，並加上問候語
@@ -369,6 +371,7 @@ def integrate_response_messages(
     Args:
         parsed_data: 從前五個階段處理後的資料
         message_format: 訊息格式類型 ("text", "buttons", "carousel", "flex")
+        language: 用戶語系（提醒文字以該語系的樣板產生）
         
     Returns:
         包含 line_messages 的整合資料
@@ -389,8 +392,8 @@ def integrate_response_messages(
     
     # 如果是預約查詢，在訊息末尾添加提醒文字
     if parsed_data.get('isReservation', False) and integrated_message:
-        reminder_text = "\n\n*提醒您：以上訊息僅為查詢非確認，您可以使用底部選單進行快速預約，二小時內或深夜時段需由客服人員協助預約"
-        reminder_text = reminder_text + "\n家樂福店位於西門町西寧南路上，離捷運一號出口約步行6分鐘"
+        reminder_text = "\n\n" + render('reminder.not_confirmed', language)
+        reminder_text = reminder_text + "\n" + render('reminder.carrefour_location', language)
         integrated_message = integrated_message + reminder_text
     
     # 根據不同情況格式化主要訊息
@@ -475,7 +478,8 @@ def auto_detect_message_format(parsed_data: Dict[str, Any]) -> str:
 def format_for_line_sdk(
     parsed_data: Dict[str, Any],
     auto_format: bool = True,
-    force_format: Optional[str] = None
+    force_format: Optional[str] = None,
+    language: str = SOURCE_LANGUAGE
 ) -> Dict[str, Any]:
     """
     格式化為 LINE SDK 可用的格式（主要入口函數）
@@ -484,6 +488,7 @@ def format_for_line_sdk(
         parsed_data: 從五階段處理後的資料
         auto_format: 是否自動偵測格式
         force_format: 強制使用指定格式 ("text", "flex", "buttons", "carousel")
+        language: 用戶語系
         
     Returns:
         包含 line_messages 的整合資料
@@ -497,7 +502,7 @@ def format_for_line_sdk(
         message_format = "text"
     
     # 整合訊息
-    return integrate_response_messages(parsed_data, message_format)
+    return integrate_response_messages(parsed_data, message_format, language)
 
 
 # 便利函數：取得 LINE 訊息列表
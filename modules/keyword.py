@@ -1,68 +1,177 @@
 import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
 import mysql.connector
 from core.database import db_config
+from ai_parser.name_matcher import AhoCorasick
+from utils.async_helpers import executor_pool, POOL_CPU
 
-def check_keywords_match(text: str) -> str:
+_MATCH_EXACT = 'exact'
+_MATCH_CONTAINS = 'contains'
+_MATCH_REGEX = 'regex'
+
+
+class KeywordEngine:
     """
-    Check if the text matches any keyword in the database.
-    Returns the response message if matched, else None.
+    Compiled keyword rules, matched with the same priority semantics as scanning the rows in order.
+
+    Rows are (keyword, match_type, response_message) in priority order (priority DESC, id ASC);
+    the first matching row wins:
+    - exact: text.strip() == keyword, looked up in a dict
+    - contains: keyword in text, all keywords found in one Aho-Corasick scan
+    - regex: keyword split on '|', each part searched with IGNORECASE, precompiled
+    A row that the linear scan could not evaluate (NULL keyword, invalid regex) stops the
+    scan with no match once it is reached, as before.
     """
-    try:
-        connection = db_config.get_connection()
-        if not connection:
-            print("Warning: Cannot connect to database")
-            return None
-            
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query all enabled keywords, ordered by priority
-        query = """
-        SELECT keyword, match_type, response_message 
-        FROM keywords 
-        WHERE enabled = 1 
-        ORDER BY priority DESC, id ASC
-        """
-        
-        cursor.execute(query)
-        keywords = cursor.fetchall()
-        
-        # Check each keyword
-        for keyword_data in keywords:
-            keyword = keyword_data['keyword']
-            match_type = keyword_data['match_type']
-            response = keyword_data['response_message']
-            
-            # Match based on type
-            is_match = False
-            if match_type == 'exact':
-                # Exact match
-                if text.strip() == keyword:
-                    is_match = True
-            elif match_type == 'contains':
-                # Contains match
-                if keyword in text:
-                    is_match = True
-            elif match_type == 'regex':
-                # Regex match
-                keywords_list = keyword.split('|')
-                for k in keywords_list:
-                    if k.strip() and re.search(k.strip(), text, re.IGNORECASE):
-                        is_match = True
+
+    def __init__(self, rows: List[Tuple[Optional[str], str, Optional[str]]]):
+        self.size = len(rows)
+        self._responses: List[Optional[str]] = []
+        self._exact: Dict[str, int] = {}
+        self._contains = AhoCorasick()
+        self._has_contains = False
+        self._always_rank: Optional[int] = None
+        self._regex: List[Tuple[int, List[Optional[re.Pattern]]]] = []
+        self._broken_rank: Optional[int] = None
+
+        for rank, (keyword, match_type, response) in enumerate(rows):
+            self._responses.append(response)
+            if match_type == _MATCH_EXACT:
+                if keyword is not None:
+                    self._exact.setdefault(keyword, rank)
+            elif match_type == _MATCH_CONTAINS:
+                if keyword is None:
+                    self._mark_broken(rank)
+                elif keyword == '':
+                    # '' in text is always true
+                    if self._always_rank is None:
+                        self._always_rank = rank
+                else:
+                    self._contains.add(keyword, rank)
+                    self._has_contains = True
+            elif match_type == _MATCH_REGEX:
+                if keyword is None:
+                    self._mark_broken(rank)
+                    continue
+                patterns = []
+                for part in keyword.split('|'):
+                    part = part.strip()
+                    if not part:
+                        continue
+                    try:
+                        patterns.append(re.compile(part, re.IGNORECASE))
+                    except re.error as e:
+                        print(f"Invalid keyword regex '{part}': {e}")
+                        # parts after an invalid one were never reached
+                        patterns.append(None)
                         break
-            
-            # If matched, return response
-            if is_match:
-                cursor.close()
-                connection.close()
-                return response
-                
-        cursor.close()
-        connection.close()
+                self._regex.append((rank, patterns))
+        if self._has_contains:
+            self._contains.build()
+
+    def _mark_broken(self, rank: int):
+        if self._broken_rank is None:
+            self._broken_rank = rank
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the response of the first matching row, or None"""
+        best = self._exact.get(text.strip(), self.size)
+        if self._always_rank is not None and self._always_rank < best:
+            best = self._always_rank
+        if self._has_contains:
+            for _, rank in self._contains.iter_matches(text):
+                if rank < best:
+                    best = rank
+        if self._broken_rank is not None and self._broken_rank < best:
+            best = self._broken_rank
+        for rank, patterns in self._regex:
+            if rank >= best:
+                break
+            for pattern in patterns:
+                if pattern is None:
+                    return None
+                if pattern.search(text):
+                    best = rank
+                    break
+            if best == rank:
+                break
+        if best == self._broken_rank:
+            return None
+        return self._responses[best] if best < self.size else None
+
+
+_engine_lock = threading.Lock()
+_engine_cache: Dict[str, object] = {}
+
+
+def _load_keyword_rows() -> Optional[List[Tuple[Optional[str], str, Optional[str]]]]:
+    """All enabled keywords in priority order, None when the database is unavailable"""
+    connection = db_config.get_connection()
+    if not connection:
+        print("Warning: Cannot connect to database")
         return None
-        
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT keyword, match_type, response_message
+            FROM keywords
+            WHERE enabled = 1
+            ORDER BY priority DESC, id ASC
+        """)
+        return [(row['keyword'], row['match_type'], row['response_message']) for row in cursor.fetchall()]
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
         return None
+    finally:
+        if cursor:
+            cursor.close()
+        if connection.is_connected():
+            connection.close()
+
+
+def _reload_keyword_engine(table: str, version: Optional[str]):
+    """
+    Called by the table version service when the keywords table changes.
+    Raises when the rows cannot be loaded so the service retries on its next poll.
+    """
+    rows = _load_keyword_rows()
+    if rows is None:
+        raise RuntimeError("keywords could not be loaded")
+    _engine_cache['engine'] = KeywordEngine(rows)
+    _engine_cache['version'] = version
+    print(f"DEBUG [Keyword]: compiled {len(rows)} keywords (version {version})")
+
+
+def get_keyword_engine() -> Optional[KeywordEngine]:
+    """
+    Shared engine. Loaded synchronously on first use; afterwards the table version service
+    (modules.table_versions) rebuilds it in the background when the keywords table changes,
+    so matching a message does no database I/O. If the load fails the engine is None
+    (no keyword replies) until the service's next poll loads it.
+    """
+    engine = _engine_cache.get('engine')
+    if engine is None:
+        from modules.table_versions import table_versions
+        with _engine_lock:
+            if _engine_cache.get('engine') is None:
+                table_versions.watch('keywords', _reload_keyword_engine)
+            engine = _engine_cache.get('engine')
+    return engine
+
+
+@executor_pool(POOL_CPU)
+def check_keywords_match(text: str) -> str:
+    """
+    Check if the text matches any keyword in the database.
+    Returns the response message if matched, else None.
+    """
+    try:
+        engine = get_keyword_engine()
+        if engine is None:
+            return None
+        return engine.match(text)
     except Exception as e:
         print(f"Error checking keyword match: {e}")
         return None
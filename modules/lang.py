@@ -1,5 +1,6 @@
 import redis
 from core.database import db_config
+from utils.async_helpers import executor_pool, POOL_DB
 from typing import Optional
 
 # Redis Configuration
@@ -34,6 +35,7 @@ def detect_language(text: str) -> Optional[str]:
             return lang_code
     return None
 
+@executor_pool(POOL_DB)
 def set_user_language(line_user_id: str, language: str) -> bool:
     """
     Set user language in DB and Redis.
@@ -69,6 +71,7 @@ def set_user_language(line_user_id: str, language: str) -> bool:
         return False
     return False
 
+@executor_pool(POOL_DB)
 def get_user_language(line_user_id: str) -> str:
     """
     Get user language from Redis, default to 'zh-TW'.
@@ -83,6 +86,7 @@ def get_user_language(line_user_id: str) -> str:
     
     return 'zh-TW'
 
+@executor_pool(POOL_DB)
 def initialize_user_language_if_needed(line_user_id: str, default_lang: str = 'zh-TW') -> str:
     """
     Check if user language is set in Redis. If not, set it to default_lang.
@@ -11,7 +11,12 @@ import logging
 import re
 import os
 from typing import Optional, List, Dict, Tuple
-from core.database import db_config
+from core.provider_health import ProviderCall
+from core.translation_client import get_http_session, get_translation_client
+from ai_parser.name_matcher import NameMatcher, get_name_matcher
+from modules.translation_cache import PROVIDER_AZURE, PROVIDER_GOOGLE, translate_cached, translate_cached_batch
+from modules.response_templates import render_lines
+from utils.async_helpers import executor_pool, run_in_executor, POOL_CPU, POOL_HTTP
 
 logger = logging.getLogger(__name__)
 
@@ -20,130 +25,57 @@ logger = logging.getLogger(__name__)
 
 def get_staff_name_mapping() -> Dict[str, str]:
     """
-    從資料庫獲取師傅名稱映射（中文名 -> 英文名）
+    師傅名稱映射（中文名 -> 英文名）
+    
+    來自共用的名稱比對器（ai_parser.name_matcher），Staffs 表變動時才重新讀取資料庫
     
     Returns:
-        Dict[str, str]: 中文名到英文名的映射字典
+        Dict[str, str]: 中文名到英文名的映射字典（複本）
     """
-    try:
-        connection = db_config.get_connection()
-        if not connection:
-            logger.error("無法連接資料庫獲取師傅名稱映射")
-            return {}
-        
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT DISTINCT name, staff 
-            FROM Staffs 
-            WHERE enable = 1 AND name != '' AND staff != ''
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # 建立中文名到英文名的映射
-        mapping = {}
-        for row in results:
-            chinese_name = row['name']
-            english_name = row['staff'] or chinese_name  # 如果英文名為空，使用中文名
-            if chinese_name:
-                mapping[chinese_name] = english_name
-        
-        cursor.close()
-        connection.close()
-        
-        logger.info(f"成功載入 {len(mapping)} 位師傅的名稱映射")
-        return mapping
-        
-    except Exception as e:
-        logger.error(f"獲取師傅名稱映射時發生錯誤: {str(e)}")
-        return {}
+    return dict(get_name_matcher().staff_name_mapping)
 
 
 def get_store_name_mapping() -> Dict[str, str]:
-    try:
-        connection = db_config.get_connection()
-        if not connection:
-            logger.error("無法連接資料庫獲取店家名稱映射")
-            return {}
-        
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT name, enname 
-            FROM Store 
-            WHERE name IS NOT NULL AND enname IS NOT NULL
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # 建立中文名到英文名的映射
-        mapping = {}
-        for row in results:
-            chinese_name = row['name']
-            english_name = row['enname'] or chinese_name  # 如果英文名為空，使用中文名
-            if chinese_name:
-                mapping[chinese_name] = english_name
-        
-        cursor.close()
-        connection.close()
-        
-        logger.info(f"成功載入 {len(mapping)} 間店家的名稱映射")
-        return mapping
-        
-    except Exception as e:
-        logger.error(f"獲取店家名稱映射時發生錯誤: {str(e)}")
-        return {}
+    """
+    店家名稱映射（中文名 -> 英文名），來自共用的名稱比對器，Store 表變動時才重新讀取資料庫
+    
+    Returns:
+        Dict[str, str]: 中文名到英文名的映射字典（複本）
+    """
+    return dict(get_name_matcher().store_mapping)
 
 
-def extract_and_replace_names(text: str, staff_mapping: Dict[str, str], store_mapping: Dict[str, str]) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+def extract_and_replace_names(text: str, staff_mapping: Optional[Dict[str, str]] = None,
+                              store_mapping: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, Tuple[str, str]]]:
     """
     從文本中提取師傅名稱和店家名稱，並用佔位符替換
     支援多個師傅和多個店家同時出現
     
+    未提供映射時使用共用的名稱比對器（依 Staffs/Store 表版本建立一次），
+    以單次掃描找出所有名稱；店家優先、較長的名稱優先（例如 "西門店" 在 "西門" 之前）
+    
     Args:
         text: 原始文本
-        staff_mapping: 師傅名稱映射（中文 -> 英文）
-        store_mapping: 店家名稱映射（中文 -> 英文）
+        staff_mapping: 師傅名稱映射（中文 -> 英文，可選）
+        store_mapping: 店家名稱映射（中文 -> 英文，可選）
         
     Returns:
         Tuple[str, Dict]: (替換後的文本, 佔位符映射字典)
-        佔位符映射格式: {"%w1%": ("鞋", "Camper"), "%S1%": ("西門", "Ximen")}
+        佔位符映射格式: {"%W1%": ("鞋", "Camper"), "%S1%": ("西門", "Ximen")}
     """
     if not text:
         return text, {}
     
-    placeholder_map = {}
-    modified_text = text
-    
-    # 步驟 1: 按長度排序，優先替換較長的名稱（避免部分匹配問題）
-    # 例如："西門店" 應該在 "西門" 之前被替換
-    all_store_names = sorted(store_mapping.keys(), key=len, reverse=True)
-    all_staff_names = sorted(staff_mapping.keys(), key=len, reverse=True)
-    
-    # 步驟 2: 替換店家名稱
-    store_counter = 1
-    for chinese_name in all_store_names:
-        if chinese_name in modified_text:
-            # 為每個唯一的店家名稱分配一個佔位符
-            placeholder = f"%S{store_counter}%"
-            english_name = store_mapping[chinese_name]
-            
-            # 替換所有出現的該店家名稱
-            modified_text = modified_text.replace(chinese_name, placeholder)
-            placeholder_map[placeholder] = (chinese_name, english_name)
-            store_counter += 1
-    
-    # 步驟 3: 替換師傅名稱
-    staff_counter = 1
-    for chinese_name in all_staff_names:
-        if chinese_name in modified_text:
-            # 為每個唯一的師傅名稱分配一個佔位符
-            placeholder = f"%W{staff_counter}%"
-            english_name = staff_mapping[chinese_name]
-            
-            # 替換所有出現的該師傅名稱
-            modified_text = modified_text.replace(chinese_name, placeholder)
-            placeholder_map[placeholder] = (chinese_name, english_name)
-            staff_counter += 1
+    if staff_mapping is None and store_mapping is None:
+        matcher = get_name_matcher()
+    else:
+        matcher = NameMatcher(
+            [(chinese_name, english_name) for chinese_name, english_name in (staff_mapping or {}).items()],
+            store_mapping or {},
+            branch_mapping={}
+        )
+    
+    modified_text, placeholder_map = matcher.replace_names(text)
     
     if placeholder_map:
         logger.info(f"提取並替換了 {len(placeholder_map)} 個唯一名稱: {list(placeholder_map.keys())}")
@@ -218,8 +150,8 @@ def convert_staff_names(staff_names: List[str], target_language: str) -> List[st
     if target_language in ['zh-TW', 'zh-tw', 'zh', 'tw']:
         return staff_names
     
-    # 其他語系使用英文名
-    name_mapping = get_staff_name_mapping()
+    # 其他語系使用英文名（共用比對器的映射，不查詢資料庫）
+    name_mapping = get_name_matcher().staff_name_mapping
     converted_names = []
     
     for chinese_name in staff_names:
@@ -243,6 +175,7 @@ class MultiLangTranslator:
     GOOGLE_TRANSLATE_URL = 'https://translate.googleapis.com/translate_a/single'
     
     @classmethod
+    @executor_pool(POOL_HTTP)
     def translate_to_target_language(cls, text: str, target_language: str = "en") -> str:
         """
         使用 Azure Translator API 將繁體中文翻譯成目標語系
@@ -282,13 +215,18 @@ class MultiLangTranslator:
             # 請求主體
             body = [{'text': text}]
             
-            # 發送 POST 請求
-            response = requests.post(constructed_url, headers=headers, json=body, timeout=10)
-            response.raise_for_status()
-            
-            # 解析翻譯結果
-            result = response.json()
-            translated_text = result[0]['translations'][0]['text']
+            # 發送 POST 請求（斷路中或超過翻譯預算時返回原文）
+            with ProviderCall(PROVIDER_AZURE, 10) as call:
+                if not call.allowed:
+                    logger.warning(f"Azure 翻譯暫停使用（斷路中或超過預算），返回原文: {text}")
+                    return text
+                response = get_http_session().post(constructed_url, headers=headers, json=body,
+                                                   timeout=call.timeout)
+                response.raise_for_status()
+
+                # 解析翻譯結果
+                result = response.json()
+                translated_text = result[0]['translations'][0]['text']
             
             logger.info(f"翻譯成功: '{text}' -> '{translated_text}'")
             return translated_text
@@ -307,6 +245,7 @@ class MultiLangTranslator:
             return text
     
     @classmethod
+    @executor_pool(POOL_HTTP)
     def translate_to_google(cls, text: str, target_language: str = "en") -> str:
         """
         使用 Google Translate API 作為備用翻譯方案
@@ -330,17 +269,23 @@ class MultiLangTranslator:
                 'q': text
             }
             
-            response = requests.get(cls.GOOGLE_TRANSLATE_URL, params=params, timeout=5)
-            response.raise_for_status()
-            
-            # 解析 Google 翻譯的響應
-            result = response.json()
-            translated_text = ""
-            
-            if result and len(result) > 0 and result[0]:
-                for segment in result[0]:
-                    if segment and len(segment) > 0:
-                        translated_text += segment[0]
+            with ProviderCall(PROVIDER_GOOGLE, 5) as call:
+                if not call.allowed:
+                    logger.warning(f"Google 翻譯暫停使用（斷路中或超過預算），返回原文: {text}")
+                    return text
+                response = get_http_session().get(cls.GOOGLE_TRANSLATE_URL, params=params, timeout=call.timeout)
+                response.raise_for_status()
+
+                # 解析 Google 翻譯的響應
+                result = response.json()
+                translated_text = ""
+
+                if result and len(result) > 0 and result[0]:
+                    for segment in result[0]:
+                        if segment and len(segment) > 0:
+                            translated_text += segment[0]
+                if not translated_text:
+                    call.fail()
             
             if translated_text:
                 logger.info(f"Google 翻譯成功: '{text}' -> '{translated_text}'")
@@ -354,6 +299,7 @@ class MultiLangTranslator:
             return text
 
 
+@executor_pool(POOL_HTTP)
 def translate_message(message: str, target_language: str) -> str:
     """
     翻譯訊息到目標語系（主要入口函數）
@@ -373,18 +319,13 @@ def translate_message(message: str, target_language: str) -> str:
     if target_language in ['zh-TW', 'zh-tw', 'tw', 'zh']:
         return message
     
-    # 獲取映射
-    staff_mapping = get_staff_name_mapping()
-    store_mapping = get_store_name_mapping()
+    # 步驟 1: 提取並替換名稱為佔位符（使用共用的名稱比對器）
+    text_with_placeholders, placeholder_map = extract_and_replace_names(message)
     
-    # 步驟 1: 提取並替換名稱為佔位符
-    text_with_placeholders, placeholder_map = extract_and_replace_names(
-        message, staff_mapping, store_mapping
-    )
-    
-    # 步驟 2: 翻譯包含佔位符的文本
-    translated_text = MultiLangTranslator.translate_to_target_language(
-        text_with_placeholders, target_language
+    # 步驟 2: 翻譯包含佔位符的文本（相同樣板的翻譯結果由 translation_cache 快取）
+    translated_text = translate_cached(
+        text_with_placeholders, target_language, PROVIDER_AZURE,
+        MultiLangTranslator.translate_to_target_language
     )
     
     # 步驟 3: 將佔位符還原為正確語言的名稱
@@ -393,21 +334,70 @@ def translate_message(message: str, target_language: str) -> str:
     return final_text
 
 
-def translate_response_fields(parsed_data: dict, target_language: str) -> dict:
+def localize_names(text: str, target_language: str) -> str:
     """
-    翻譯 parsed_data 中的文字欄位到目標語系
-    師傅名稱和店家名稱會自動使用正確的語言（不翻譯）
+    將文字中的師傅名稱和店家名稱轉為目標語系使用的名稱（不翻譯其他文字）
     
     Args:
-        parsed_data: 包含回應訊息的字典
+        text: 繁體中文文字（如樣板參數、師傅時段列表）
         target_language: 目標語系代碼
         
     Returns:
-        翻譯後的 parsed_data
+        名稱已轉換的文字
+    """
+    if not text or target_language in ['zh-TW', 'zh-tw', 'tw', 'zh']:
+        return text
+    text_with_placeholders, placeholder_map = extract_and_replace_names(text)
+    return restore_names(text_with_placeholders, placeholder_map, target_language)
+
+
+@executor_pool(POOL_CPU)
+def _replace_names_batch(messages: List[str]) -> List[Tuple[str, Dict[str, Tuple[str, str]]]]:
+    """各訊息的名稱換成佔位符（第一次使用比對器時會讀取資料庫，不在事件迴圈中執行）"""
+    return [extract_and_replace_names(message) if message else ("", {}) for message in messages]
+
+
+async def translate_messages_async(messages: List[str], target_language: str) -> List[str]:
+    """
+    translate_message 的批次非同步版本：名稱換成佔位符後，快取未命中的訊息以一次請求翻譯
+    （core.translation_client，Azure 為主、逾時改用 Google）
+
+    Args:
+        messages: 要翻譯的訊息（繁體中文）
+        target_language: 目標語系代碼
+
+    Returns:
+        與 messages 順序相同的翻譯結果
+    """
+    if target_language in ['zh-TW', 'zh-tw', 'tw', 'zh']:
+        return list(messages)
+
+    prepared = await run_in_executor(_replace_names_batch, messages)
+    pending = [text for text, _ in prepared if text]
+
+    translated_texts = iter(await translate_cached_batch(
+        pending, target_language, PROVIDER_AZURE, get_translation_client().translate_batch
+    ))
+    return [
+        restore_names(next(translated_texts), placeholder_map, target_language) if text else ""
+        for text, placeholder_map in prepared
+    ]
+
+
+RESPONSE_TEXT_FIELDS = ['response_message', 'greeting_message', 'error', 'message']
+
+
+@executor_pool(POOL_HTTP)
+def _apply_response_templates(parsed_data: dict, target_language: str) -> List[str]:
+    """
+    處理師傅名稱與回應樣板，返回仍需翻譯的文字欄位
+
+    欄位有對應的 <欄位>_template（modules.response_templates 的 [訊息 ID, 參數] 列表）時，
+    直接以目標語系的樣板產生訊息，不呼叫翻譯服務；樣板欄位只在此階段使用，處理後移除
+
+    樣板的 {'translate': 文字} 參數、翻譯檔沒有的樣板仍會同步呼叫翻譯服務，
+    比對器第一次使用時也會讀取資料庫，非同步版本在執行緒池中執行
     """
-    if not parsed_data:
-        return parsed_data
-    
     # 處理師傅名稱：直接轉換為對應語言的名稱
     if 'masseur' in parsed_data and parsed_data['masseur']:
         parsed_data['masseur'] = convert_staff_names(
@@ -415,18 +405,70 @@ def translate_response_fields(parsed_data: dict, target_language: str) -> dict:
             target_language
         )
     
+    templates = {field: parsed_data.pop(f"{field}_template", None) for field in RESPONSE_TEXT_FIELDS}
+    
     # 如果是繁體中文，其他欄位也不需要翻譯
     if target_language in ['zh-TW', 'zh-tw', 'tw', 'zh']:
+        return []
+    
+    pending_fields = []
+    for field in RESPONSE_TEXT_FIELDS:
+        if field in parsed_data and parsed_data[field]:
+            if templates[field]:
+                parsed_data[field] = render_lines(
+                    templates[field], target_language,
+                    lambda value: localize_names(value, target_language)
+                )
+            else:
+                pending_fields.append(field)
+    return pending_fields
+
+
+def translate_response_fields(parsed_data: dict, target_language: str) -> dict:
+    """
+    翻譯 parsed_data 中的文字欄位到目標語系
+    師傅名稱和店家名稱會自動使用正確的語言（不翻譯）
+    
+    有樣板的欄位直接套用目標語系的樣板；沒有樣板的欄位（如關鍵字回應）才翻譯
+    
+    Args:
+        parsed_data: 包含回應訊息的字典
+        target_language: 目標語系代碼
+        
+    Returns:
+        翻譯後的 parsed_data
+    """
+    if not parsed_data:
         return parsed_data
     
     # 翻譯文字欄位（translate_message 會自動保護名稱）
-    text_fields = ['response_message', 'greeting_message', 'error', 'message']
+    for field in _apply_response_templates(parsed_data, target_language):
+        parsed_data[field] = translate_message(
+            parsed_data[field], 
+            target_language
+        )
     
-    for field in text_fields:
-        if field in parsed_data and parsed_data[field]:
-            parsed_data[field] = translate_message(
-                parsed_data[field], 
-                target_language
-            )
+    return parsed_data
+
+
+async def translate_response_fields_async(parsed_data: dict, target_language: str) -> dict:
+    """
+    translate_response_fields 的非同步版本（在事件迴圈中使用）：
+    樣板在執行緒池中產生，需要翻譯的欄位以一次批次請求翻譯，不阻塞事件迴圈
+    
+    Args:
+        parsed_data: 包含回應訊息的字典
+        target_language: 目標語系代碼
+        
+    Returns:
+        翻譯後的 parsed_data
+    """
+    if not parsed_data:
+        return parsed_data
+    
+    fields = await run_in_executor(_apply_response_templates, parsed_data, target_language)
+    if fields:
+        translated = await translate_messages_async([parsed_data[field] for field in fields], target_language)
+        parsed_data.update(zip(fields, translated))
     
     return parsed_data
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次解析模塊
+離線重播 LINE 對話紀錄時，大量訊息只需要階段1 的純解析（parse_current_message）：
+- 不讀寫 Redis、不更新 visitdate、不翻譯，不影響任何用戶的對話狀態
+- 訊息分塊後交給行程池（預設與 CPU 核心數相同，最多為 CPU 核心數）平行解析，結果依輸入順序逐筆產生
+- 師傅 / 店家名稱比對器在主行程建立一次，傳給各 worker，worker 不查詢資料庫
+- 可指定參考時間（如紀錄的原始時間），"明天"、"下週三" 等相對日期以該時間計算；
+  只在 worker 行程內替換解析模組的時鐘，API 主行程不受影響
+"""
+
+import contextlib
+import datetime as datetime_module
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ai_parser.name_matcher import NameMatcher, get_name_matcher
+from utils.async_helpers import executor_pool, POOL_CPU
+
+# 每個工作分塊的訊息數量
+PARSE_BATCH_CHUNK_SIZE = 64
+
+# 以 datetime.now() 取得「現在」的解析模組（指定參考時間時替換其時鐘）
+PARSER_CLOCK_MODULES = (
+    'ai_parser.handle_time2025',
+    'ai_parser.handle_time2025_date1',
+    'ai_parser.handle_time2025_date2',
+    'ai_parser.handle_time2025_date3',
+    'ai_parser.handle_time2025_date4',
+    'ai_parser.handle_time2025_time2',
+    'ai_parser.handle_time2025_time3',
+    'modules.appointment_analysis',
+)
+
+
+_clock_module = None
+
+
+class ReferenceDatetime(datetime):
+    """reference 不為 None 時，now() / today() 返回 reference，否則為實際時間"""
+
+    reference: Optional[datetime] = None
+
+    @classmethod
+    def now(cls, tz=None):
+        reference = cls.reference
+        if reference is None:
+            return super().now(tz)
+        return cls.combine(reference.date(), reference.time(), reference.tzinfo)
+
+    @classmethod
+    def today(cls):
+        return cls.now()
+
+
+def install_parser_clock():
+    """
+    將解析模組的 datetime 換成 ReferenceDatetime（之後以 set_reference_time 指定時間）
+
+    只應在 worker 或離線工具的行程中呼叫：替換後同一行程內所有解析都使用相同的參考時間
+    """
+    global _clock_module
+    from modules import appointment_analysis  # noqa: F401  確保解析模組已載入
+
+    # 以 import datetime 使用的模組：換成 datetime 類別為 ReferenceDatetime 的模組副本
+    if _clock_module is None:
+        _clock_module = type(datetime_module)('datetime')
+        _clock_module.__dict__.update(datetime_module.__dict__)
+        _clock_module.datetime = ReferenceDatetime
+
+    for name in PARSER_CLOCK_MODULES:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        current = getattr(module, 'datetime', None)
+        if current is datetime:
+            module.datetime = ReferenceDatetime
+        elif current is datetime_module:
+            module.datetime = _clock_module
+
+
+def set_reference_time(reference: Optional[datetime]):
+    """設定解析時的「現在」，None 表示使用實際時間"""
+    ReferenceDatetime.reference = reference
+
+
+# ==================== worker ====================
+
+_worker_matcher: Optional[NameMatcher] = None
+
+
+def _init_worker(matcher: NameMatcher, quiet: bool):
+    global _worker_matcher
+    _worker_matcher = matcher
+    if quiet:
+        # 解析過程的 DEBUG 輸出量很大，批次時捨棄
+        sys.stdout = open(os.devnull, 'w')
+    install_parser_clock()
+
+
+def _parse_one(message: str, matcher: Optional[NameMatcher]) -> Dict[str, Any]:
+    from modules.appointment_analysis import parse_current_message
+
+    parsed = parse_current_message(message, matcher)
+    parsed.pop('message', None)
+    return parsed
+
+
+def _parse_items(items: List[Tuple[int, str]], reference: Optional[str],
+                 matcher: Optional[NameMatcher]) -> List[Dict[str, Any]]:
+    set_reference_time(datetime.fromisoformat(reference) if reference else None)
+    results = []
+    for index, message in items:
+        text = (message or '').strip()
+        try:
+            results.append({'index': index, 'message': message, 'parsed': _parse_one(text, matcher)})
+        except Exception as e:
+            results.append({'index': index, 'message': message, 'error': str(e)})
+    return results
+
+
+def _parse_chunk(items: List[Tuple[int, str]], reference: Optional[str]) -> List[Dict[str, Any]]:
+    return _parse_items(items, reference, _worker_matcher)
+
+
+# ==================== 行程池 ====================
+
+_pool_lock = threading.Lock()
+_pool: Dict[str, Any] = {}
+
+
+def default_worker_count() -> int:
+    """可使用的 CPU 核心數"""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _get_pool(matcher: NameMatcher, workers: int) -> ProcessPoolExecutor:
+    """
+    取得共用行程池；比對器改變、或需要更多 worker 時重新建立
+    （舊行程池在已送出的工作完成後結束）
+
+    同一個比對器物件、或版本相同的比對器重用行程池；
+    版本未知（UPDATE_TIME 為 NULL 或無法連線）時依比對器物件判斷，比對器重新建立前不會重建行程池。
+    要求的 worker 數量較少時直接使用現有的行程池，重新建立時 worker 數量不會減少
+    """
+    with _pool_lock:
+        current = _pool.get('matcher')
+        same_matcher = current is matcher or (
+            current is not None and matcher.version is not None and current.version == matcher.version
+        )
+        if same_matcher and _pool.get('workers', 0) >= workers:
+            return _pool['executor']
+        workers = max(workers, _pool.get('workers', 0))
+        old_executor = _pool.get('executor')
+        # spawn：API 主行程有多個執行緒與資料庫 / Redis 連線，不以 fork 複製
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(matcher, True)
+        )
+        _pool['matcher'] = matcher
+        _pool['workers'] = workers
+        _pool['executor'] = executor
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+    print(f"DEBUG [ParseBatch]: 已建立解析行程池（{workers} 個 worker）")
+    return executor
+
+
+def _chunks(messages: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk = []
+    for index, message in enumerate(messages):
+        chunk.append((index, message))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@executor_pool(POOL_CPU)
+def parse_messages_batch(messages: Iterable[str],
+                         reference_time: Optional[datetime] = None,
+                         workers: Optional[int] = None,
+                         chunk_size: int = PARSE_BATCH_CHUNK_SIZE,
+                         matcher: Optional[NameMatcher] = None) -> Iterator[Dict[str, Any]]:
+    """
+    以行程池批次解析訊息，依輸入順序逐筆產生結果
+
+    Args:
+        messages: 訊息列表
+        reference_time: 解析時的「現在」（None 表示實際時間）
+        workers: worker 數量（預設與上限皆為 CPU 核心數；行程池已有較多 worker 時沿用）
+        chunk_size: 每個工作分塊的訊息數量
+        matcher: 名稱比對器（預設使用共用比對器）
+
+    Returns:
+        結果迭代器，每筆為 {'index': 序號, 'message': 原始訊息, 'parsed': parse_current_message 的結果}，
+        單筆解析失敗時以 'error' 取代 'parsed'。
+        比對器與行程池在呼叫時即建立、工作即送出，錯誤在此直接拋出，不會延後到迭代時
+    """
+    if matcher is None:
+        matcher = get_name_matcher()
+    max_workers = default_worker_count()
+    executor = _get_pool(matcher, min(workers or max_workers, max_workers))
+    reference = reference_time.isoformat() if reference_time else None
+
+    chunks = list(_chunks(messages, max(1, chunk_size)))
+    chunk_results = executor.map(_parse_chunk, chunks, [reference] * len(chunks))
+    return (result for results in chunk_results for result in results)
+
+
+def parse_messages_inline(messages: Iterable[str],
+                          reference_time: Optional[datetime] = None,
+                          matcher: Optional[NameMatcher] = None) -> Iterator[Dict[str, Any]]:
+    """
+    在目前行程內依序解析（單核心，供小量訊息或無法建立行程池時使用）
+
+    指定 reference_time 時會替換本行程解析模組的時鐘，只適合離線工具
+    """
+    if matcher is None:
+        matcher = get_name_matcher()
+    if reference_time is not None:
+        install_parser_clock()
+    reference = reference_time.isoformat() if reference_time else None
+    for chunk in _chunks(messages, PARSE_BATCH_CHUNK_SIZE):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results = _parse_items(chunk, reference, matcher)
+        yield from results
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預約訊息解析結果快取模塊
+LINE 用戶常重複傳送相同訊息（"今天還有位子嗎"、圖文選單的固定文字），
+階段1 的純解析（日期、時間、師傅、分店、療程、人數、是否預約）只與下列條件有關：
+- 正規化後的訊息
+- 參考日期（"今天"、"明天" 等相對日期跨過午夜後結果不同）
+- 師傅 / 店家名稱版本（Staffs / Store 表的最後更新時間）
+
+因此以 (訊息, 參考日期, 名稱版本) 為 key 保存在行程內的 LRU 中。
+日期為今天且有時間的訊息，過去的時間會依當下時刻調整，這類結果另外記錄計算時的分鐘，
+分鐘不同時視為未命中。
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ai_parser.name_matcher import get_name_matcher
+
+# 行程內最多保存的解析結果數量
+PARSE_MEMO_SIZE = 2048
+
+
+def normalize_message(message: str) -> str:
+    """去除前後空白（解析與快取 key 都使用正規化後的訊息）"""
+    return (message or '').strip()
+
+
+class ParseMemo:
+    """解析結果 LRU，並統計命中率"""
+
+    def __init__(self, max_size: int = PARSE_MEMO_SIZE):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Tuple, Tuple[Optional[str], Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.clock_misses = 0
+        self.uncached = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple, minute: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_minute, result = entry
+            if entry_minute is not None and entry_minute != minute:
+                self.clock_misses += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key: Tuple, result: Dict[str, Any], minute: Optional[str] = None):
+        with self._lock:
+            self._entries[key] = (minute, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_uncached(self):
+        with self._lock:
+            self.uncached += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'clock_misses': self.clock_misses,
+                'uncached': self.uncached,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_parse_memo = ParseMemo()
+
+
+def parse_message_memoized(message: str, parse_func: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    取得訊息的解析結果，相同 (訊息, 參考日期, 名稱版本) 直接返回快取的副本
+
+    Args:
+        message: 用戶訊息
+        parse_func: 實際解析函數 parse_func(message, matcher)，
+                    返回值中 clock_sensitive=True 表示結果與當下時刻有關
+
+    Returns:
+        解析結果（副本，可自由修改）
+    """
+    text = normalize_message(message)
+    now = datetime.now()
+    minute = now.strftime('%H:%M')
+
+    try:
+        matcher = get_name_matcher()
+    except Exception as e:
+        print(f"DEBUG [ParseMemo]: 無法取得名稱比對器，不使用快取: {e}")
+        _parse_memo.record_uncached()
+        return parse_func(text, None)
+
+    # 名稱版本未知時無法判斷師傅/店家是否有異動，不快取
+    if matcher.version is None:
+        _parse_memo.record_uncached()
+        return parse_func(text, matcher)
+
+    key = (text, now.strftime('%Y-%m-%d'), matcher.version)
+    cached = _parse_memo.get(key, minute)
+    if cached is not None:
+        print(f"DEBUG [ParseMemo]: 命中快取 - {text[:50]}")
+        return cached
+
+    result = parse_func(text, matcher)
+    _parse_memo.put(key, result, minute if result.get('clock_sensitive') else None)
+    return result
+
+
+def get_parse_memo_stats() -> Dict[str, Any]:
+    """解析結果快取的命中率等統計"""
+    return _parse_memo.stats()
+
+
+def clear_parse_memo():
+    """清除所有快取的解析結果"""
+    _parse_memo.clear()
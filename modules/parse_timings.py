@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/parse 各階段耗時統計模塊
+每個請求以 StageTimer 記錄各階段（語系、問候語、skip_keywords、翻譯、預約、關鍵字、輸出翻譯、整合）的耗時，
+請求結束時寫入行程內的統計（每個階段保留最近 PARSE_TIMING_SAMPLES 筆），供 GET /parse/stage-stats 查詢。
+
+並行執行的階段各自計時，total 為整個請求的牆鐘時間（小於各階段耗時總和表示並行有效）。
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Optional
+
+# 每個階段保留的最近耗時筆數
+PARSE_TIMING_SAMPLES = 1000
+
+STAGE_TOTAL = 'total'
+
+
+class ParseStageStats:
+    """各階段最近的耗時（秒）與次數"""
+
+    def __init__(self, max_samples: int = PARSE_TIMING_SAMPLES):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float]):
+        with self._lock:
+            for stage, elapsed in timings.items():
+                samples = self._samples.get(stage)
+                if samples is None:
+                    samples = self._samples[stage] = deque(maxlen=self.max_samples)
+                samples.append(elapsed)
+                self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {stage: (sorted(samples), self._counts[stage]) for stage, samples in self._samples.items()}
+        stages = {}
+        for stage, (samples, count) in snapshot.items():
+            size = len(samples)
+            stages[stage] = {
+                'count': count,
+                'samples': size,
+                'avg_ms': round(sum(samples) * 1000 / size, 1),
+                'p50_ms': round(samples[size // 2] * 1000, 1),
+                'p95_ms': round(samples[min(size - 1, int(size * 0.95))] * 1000, 1),
+                'max_ms': round(samples[-1] * 1000, 1),
+            }
+        return {'stages': stages}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+_stage_stats = ParseStageStats()
+
+
+class StageTimer:
+    """
+    單一 /parse 請求的階段計時
+
+        timer = StageTimer()
+        user_language = await timer.run('language', run_in_executor(...))
+        with timer.stage('integration'):
+            ...
+        timer.finish()
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    def add(self, stage: str, elapsed: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+
+    async def run(self, stage: str, awaitable: Awaitable) -> Any:
+        """等待 awaitable 並記錄耗時（可與其他階段一起放進 asyncio.gather 並行）"""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def stage(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def finish(self, path: Optional[str] = None) -> Dict[str, float]:
+        """記錄整個請求的耗時並寫入統計，返回各階段耗時（毫秒）"""
+        self.timings[STAGE_TOTAL] = time.perf_counter() - self.started
+        _stage_stats.record(self.timings)
+        timings_ms = {stage: round(elapsed * 1000, 1) for stage, elapsed in self.timings.items()}
+        print(f"DEBUG [ParseTimings]: {path or ''} {timings_ms}")
+        return timings_ms
+
+
+def get_parse_stage_stats() -> Dict[str, Any]:
+    """各階段的次數、平均、p50、p95 與最大耗時"""
+    return _stage_stats.stats()
+
+
+def clear_parse_stage_stats():
+    """清除階段耗時統計"""
+    _stage_stats.clear()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回應訊息樣板模塊
+常用的回應文字（預約查詢結果、班表、問候語、提醒文字等）以訊息 ID 與參數表示：
+- 原文（繁體中文）在 RESPONSE_TEMPLATES，各語系的翻譯在 modules/resource/response_templates.json
+  （以 scripts/tools/translate_response_templates.py 離線翻譯）
+- 產生回應時記錄 [訊息 ID, 參數] 的列表，文字輸出階段依用戶語系直接套用樣板，不需呼叫翻譯服務
+- 翻譯檔沒有的語系 / 訊息，第一次使用時翻譯樣板本身（參數以佔位符保護），
+  結果由 translation_cache 保存（行程內 + Redis）
+
+參數值可以是：
+- 字串 / 數字：直接代入（師傅、店家名稱由 multilang 轉為對應語系的名稱）
+- {'id': 訊息 ID, 'params': {...}}：巢狀樣板（如無法預約的原因）
+- {'translate': 文字}：樣板以外的文字（如資料庫的錯誤訊息），非繁體中文時以翻譯服務翻譯
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+SOURCE_LANGUAGE = 'zh-TW'
+# 翻譯檔涵蓋的語系（與 modules.lang.LANGUAGE_MAPPING 相同）
+SUPPORTED_LANGUAGES = ('zh-TW', 'en', 'th', 'ja', 'ko')
+CHINESE_LANGUAGES = ('zh-TW', 'zh-tw', 'tw', 'zh')
+
+TEMPLATE_TRANSLATIONS_PATH = os.path.join(os.path.dirname(__file__), 'resource', 'response_templates.json')
+
+# 訊息 ID -> 原文（繁體中文），{名稱} 為參數
+RESPONSE_TEMPLATES: Dict[str, str] = {
+    # 問候語 / 語系設定
+    'greeting.daily': '親愛的會員{display_name}({user_id})您好!',
+    'language.set': '語系已設定為：{language_code}',
+
+    # 班表查詢
+    'schedule.header': '📅 {date} 班表\n',
+    'schedule.list_header': '{date} 班表：',
+    'schedule.no_shifts': '{date} 沒有排班記錄',
+    'schedule.not_found_staff': '📅 {date}\n\n查無 {staff} 的班表資料',
+    'schedule.not_found': '📅 {date}\n\n查無班表資料',
+    'schedule.failed': '❌ 班表查詢失敗：{error}',
+    'common.unknown_error': '未知錯誤',
+
+    # 預約查詢結果
+    'result.can_book': '\n✅ 可預約',
+    'result.suggest_header': '\n⚠️請參考建議名單 ({reason})',
+    'result.expired': '\n❌ 無法查詢已過期時間',
+    'result.failed': '\n❌ 查詢失敗',
+    'result.conditions': '\n📋 查詢條件：',
+    'result.branch': '店家：{branch}{default_mark}',
+    'result.datetime': '日期時間：{date} {time}',
+    'result.project': '療程：{project} 分鐘{default_mark}',
+    'result.count': '人數：{count} 位',
+    'result.default_mark': ' (預設)',
+    'result.available_staff': '可約師傅：{names}',
+    'result.other_staff': '\n其他師傅：',
+    'result.suggestions': '\n💡 建議名單：',
+    'result.same_time_other_stores': '\n🏠 同時段其他分店：',
+    'result.same_store_other_times': '\n🕒 同分店其他時段：',
+    'result.no_staff_match': '無師傅符合查詢條件',
+    'result.error': '\n錯誤訊息：{error}',
+
+    # 無法預約的原因
+    'reason.time_slot_failed': '該時段查詢失敗',
+    'reason.fully_booked': '約滿或無排班',
+    'reason.no_room': '無可用房間',
+    'reason.staff_shortage': '師傅不足(需{required}位/有{available}位)',
+    'reason.other': '其他原因',
+
+    # 預約查詢的提醒文字
+    'reminder.not_confirmed': '*提醒您：以上訊息僅為查詢非確認，您可以使用底部選單進行快速預約，二小時內或深夜時段需由客服人員協助預約',
+    'reminder.carrefour_location': '家樂福店位於西門町西寧南路上，離捷運一號出口約步行6分鐘',
+}
+
+_PARAM_RE = re.compile(r'\{(\w+)\}')
+
+_translations: Optional[Dict[str, Dict[str, str]]] = None
+_translations_lock = threading.Lock()
+
+
+def load_translations(path: str = TEMPLATE_TRANSLATIONS_PATH) -> Dict[str, Dict[str, str]]:
+    """讀取翻譯檔：{語系: {訊息 ID: 樣板}}，檔案不存在時返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _get_translations() -> Dict[str, Dict[str, str]]:
+    global _translations
+    if _translations is None:
+        with _translations_lock:
+            if _translations is None:
+                try:
+                    _translations = load_translations()
+                except (OSError, ValueError) as e:
+                    print(f"DEBUG [ResponseTemplates]: 讀取翻譯檔失敗，使用翻譯服務: {e}")
+                    _translations = {}
+    return _translations
+
+
+def translate_template(template: str, language: str) -> str:
+    """翻譯檔沒有的樣板：參數換成佔位符後翻譯（結果由 translation_cache 保存）"""
+    from modules.multilang import MultiLangTranslator
+    from modules.translation_cache import PROVIDER_AZURE, translate_cached
+
+    names = []
+
+    def to_placeholder(match):
+        names.append(match.group(1))
+        return f"%P{len(names)}%"
+
+    # 前後的換行、空白不送翻譯
+    body = template.strip()
+    if not body:
+        return template
+    leading = template[:len(template) - len(template.lstrip())]
+    trailing = template[len(template.rstrip()):]
+    translated = translate_cached(_PARAM_RE.sub(to_placeholder, body), language, PROVIDER_AZURE,
+                                  MultiLangTranslator.translate_to_target_language)
+    for index, name in enumerate(names, 1):
+        translated = re.sub(f"(?i)%\\s*P\\s*{index}\\s*%", lambda _: '{' + name + '}', translated)
+    # 佔位符遺失時使用原文，避免缺少參數
+    if any('{' + name + '}' not in translated for name in names):
+        return template
+    return leading + translated + trailing
+
+
+def get_template(message_id: str, language: str = SOURCE_LANGUAGE) -> str:
+    """訊息在指定語系的樣板"""
+    source = RESPONSE_TEMPLATES[message_id]
+    if not language or language in CHINESE_LANGUAGES:
+        return source
+    translated = _get_translations().get(language, {}).get(message_id)
+    if translated is not None:
+        return translated
+    return translate_template(source, language)
+
+
+def render(message_id: str, language: str = SOURCE_LANGUAGE,
+           value_filter: Optional[Callable[[str], str]] = None, **params) -> str:
+    """
+    以指定語系的樣板產生訊息
+
+    Args:
+        message_id: 訊息 ID
+        language: 語系代碼
+        value_filter: 代入前處理字串參數的函數（如將師傅名稱轉為英文名）
+        **params: 樣板參數
+    """
+    values = {name: _render_value(value, language, value_filter) for name, value in params.items()}
+    return _PARAM_RE.sub(lambda match: values.get(match.group(1), match.group(0)),
+                         get_template(message_id, language))
+
+
+def _render_value(value: Any, language: str, value_filter: Optional[Callable[[str], str]]) -> str:
+    if isinstance(value, dict):
+        if 'id' in value:
+            return render(value['id'], language, value_filter, **value.get('params', {}))
+        text = str(value.get('translate', ''))
+        if text and language and language not in CHINESE_LANGUAGES:
+            from modules.multilang import translate_message
+            return translate_message(text, language)
+        return text
+    text = str(value)
+    return value_filter(text) if value_filter else text
+
+
+class ResponseBuilder:
+    """
+    逐行組成回應訊息，記錄每行的 [訊息 ID, 參數]（不需翻譯的文字為 [None, {'text': 文字}]），
+    以便文字輸出階段依用戶語系重新產生
+    """
+
+    def __init__(self):
+        self.lines: List[List[Any]] = []
+
+    def add(self, message_id: str, **params) -> 'ResponseBuilder':
+        self.lines.append([message_id, params])
+        return self
+
+    def add_text(self, text: str) -> 'ResponseBuilder':
+        """加入不需翻譯的文字（師傅名稱、時間等），名稱仍會轉為對應語系"""
+        self.lines.append([None, {'text': text}])
+        return self
+
+    def extend(self, lines: List[List[Any]]) -> 'ResponseBuilder':
+        self.lines.extend(lines)
+        return self
+
+    def to_list(self) -> List[List[Any]]:
+        return [list(line) for line in self.lines]
+
+    def render(self, language: str = SOURCE_LANGUAGE) -> str:
+        return render_lines(self.lines, language)
+
+
+def render_lines(lines: List[List[Any]], language: str = SOURCE_LANGUAGE,
+                 value_filter: Optional[Callable[[str], str]] = None) -> str:
+    """將 [訊息 ID, 參數] 列表以指定語系產生訊息（各行以換行連接）"""
+    rendered = []
+    for message_id, params in lines:
+        if message_id is None:
+            text = str(params.get('text', ''))
+            rendered.append(value_filter(text) if value_filter else text)
+        else:
+            rendered.append(render(message_id, language, value_filter, **params))
+    return '\n'.join(rendered)
+
+
+def template_message(message_id: str, **params) -> List[List[Any]]:
+    """單一訊息的樣板列表（如問候語），供 parsed_data 的 <欄位>_template 使用"""
+    return [[message_id, params]]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+資料表版本服務
+keywords、skip_keywords 等表的最後更新時間（information_schema 的 UPDATE_TIME）
+由背景執行緒每 TABLE_VERSION_POLL_SECONDS 秒以單一查詢讀取一次：
+- 請求中只讀取行程內保存的版本（get），不需每則訊息查詢資料庫
+- 版本變動時在背景執行緒呼叫登記的 listener(table, version)，各快取在請求路徑之外重新載入
+- UPDATE_TIME 為 NULL（如 InnoDB）的表無法判斷是否變動，每 UNKNOWN_VERSION_REFRESH_SECONDS 秒視為變動一次
+- listener 載入失敗時應拋出例外：該版本不記為已通知，下次輪詢時重新通知
+
+第一次 watch 某張表時會同步讀取一次版本並呼叫 listener，返回時資料已載入。
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from modules.workday_manager import WorkdayManager
+
+# 背景輪詢間隔（秒）
+TABLE_VERSION_POLL_SECONDS = 5
+# 版本未知的表，重新載入的間隔（秒）
+UNKNOWN_VERSION_REFRESH_SECONDS = 60
+
+VersionListener = Callable[[str, Optional[str]], None]
+
+
+class TableVersionService:
+    """追蹤資料表版本，版本變動時通知 listener"""
+
+    def __init__(self, poll_seconds: float = TABLE_VERSION_POLL_SECONDS,
+                 unknown_refresh_seconds: float = UNKNOWN_VERSION_REFRESH_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.unknown_refresh_seconds = unknown_refresh_seconds
+        self._versions: Dict[str, Optional[str]] = {}
+        self._listeners: Dict[str, List[VersionListener]] = {}
+        # 表名 -> (已通知的版本, 通知時間)
+        self._notified: Dict[str, Tuple[Optional[str], float]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._workday_manager: Optional[WorkdayManager] = None
+
+    def watch(self, table: str, listener: Optional[VersionListener] = None):
+        """
+        登記要追蹤的表（可附 listener），並確保背景執行緒已啟動
+
+        新登記的表會立即同步讀取版本並通知 listener
+        """
+        with self._lock:
+            listeners = self._listeners.setdefault(table, [])
+            is_new = listener is not None and listener not in listeners
+            if is_new:
+                listeners.append(listener)
+                # 讓下次 refresh 一定通知（含新 listener）
+                self._notified.pop(table, None)
+            needs_refresh = is_new or table not in self._versions
+        if needs_refresh:
+            self.refresh()
+        self._ensure_started()
+
+    def get(self, table: str) -> Optional[str]:
+        """行程內保存的版本（不查詢資料庫），未知時為 None"""
+        return self._versions.get(table)
+
+    def refresh(self) -> Dict[str, Optional[str]]:
+        """以單一查詢讀取所有追蹤中的表的版本，並通知版本有變動的 listener"""
+        with self._refresh_lock:
+            with self._lock:
+                tables = list(self._listeners)
+            if not tables:
+                return {}
+            if self._workday_manager is None:
+                self._workday_manager = WorkdayManager()
+            update_times = self._workday_manager.get_tables_lastupdate_time(tables)
+            versions = {
+                table: update_times[table].isoformat() if update_times.get(table) else None
+                for table in tables
+            }
+
+            now = time.monotonic()
+            to_notify = []
+            with self._lock:
+                self._versions.update(versions)
+                for table, version in versions.items():
+                    notified = self._notified.get(table)
+                    changed = notified is None or notified[0] != version
+                    stale = version is None and notified is not None and now - notified[1] >= self.unknown_refresh_seconds
+                    if changed or stale:
+                        to_notify.append((table, version, list(self._listeners[table])))
+
+            for table, version, listeners in to_notify:
+                succeeded = True
+                for listener in listeners:
+                    try:
+                        listener(table, version)
+                    except Exception as e:
+                        succeeded = False
+                        print(f"DEBUG [TableVersions]: {table} 重新載入錯誤，下次輪詢時重試: {e}")
+                # 所有 listener 都載入成功才記為已通知
+                if succeeded:
+                    with self._lock:
+                        self._notified[table] = (version, now)
+            return versions
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='table-versions', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"DEBUG [TableVersions]: 讀取表版本錯誤: {e}")
+
+    def stop(self):
+        """停止背景執行緒"""
+        self._stop.set()
+
+
+# 行程內共用的版本服務
+table_versions = TableVersionService()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回應訊息翻譯快取模塊
+回應訊息大多來自少數固定樣板，師傅 / 店家名稱在翻譯前已換成佔位符（%W1%、%S1%），
+因此相同樣板翻成相同語系的結果可以重複使用：
+- key 為 (佔位符文字的 SHA-1, 目標語系, 翻譯服務)；查詢時先找指定的翻譯服務，
+  再找其他翻譯服務的結果（主要服務逾時、失敗或未設定時由 Google 翻譯的結果也會命中）
+- 第一層：行程內 LRU（TRANSLATION_LOCAL_TTL 秒後過期）
+- 第二層：Redis（TRANSLATION_REDIS_TTL 秒後過期），多個 worker 行程共用
+Redis 無法連線時只使用行程內快取，並在 TRANSLATION_REDIS_RETRY_SECONDS 秒後再嘗試。
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from utils.async_helpers import run_in_executor, POOL_DB
+
+REDIS_HOST = 'localhost'
+REDIS_PORT = 6379
+REDIS_DB = 0
+
+# 行程內最多保存的翻譯數量
+TRANSLATION_LOCAL_SIZE = 2048
+# 行程內快取的有效時間（秒）
+TRANSLATION_LOCAL_TTL = 3600
+# Redis 快取的有效時間（秒）
+TRANSLATION_REDIS_TTL = 7 * 24 * 3600
+# Redis 發生錯誤後暫停使用的時間（秒）
+TRANSLATION_REDIS_RETRY_SECONDS = 30
+
+REDIS_KEY_PREFIX = 'translation'
+
+PROVIDER_AZURE = 'azure'
+PROVIDER_GOOGLE = 'google'
+# 查詢快取時依序嘗試的翻譯服務（指定的服務優先）
+CACHE_PROVIDERS = (PROVIDER_AZURE, PROVIDER_GOOGLE)
+
+
+def lookup_providers(provider: str) -> Tuple[str, ...]:
+    """查詢快取的翻譯服務順序：指定的服務，其次為其他翻譯服務"""
+    return (provider,) + tuple(other for other in CACHE_PROVIDERS if other != provider)
+
+
+def translation_key(text: str, target_language: str, provider: str) -> Tuple[str, str, str]:
+    """(佔位符文字的 SHA-1, 目標語系, 翻譯服務)"""
+    digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    return digest, target_language, provider
+
+
+class TranslationCache:
+    """行程內 LRU + Redis 的兩層翻譯快取，並統計命中率"""
+
+    def __init__(self, max_size: int = TRANSLATION_LOCAL_SIZE,
+                 local_ttl: float = TRANSLATION_LOCAL_TTL,
+                 redis_ttl: int = TRANSLATION_REDIS_TTL):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self._entries: 'OrderedDict[Tuple[str, str, str], Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.redis_errors = 0
+
+    # ---------- Redis ----------
+
+    def _get_redis(self):
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        with self._lock:
+            self.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + TRANSLATION_REDIS_RETRY_SECONDS
+        print(f"DEBUG [TranslationCache]: Redis 錯誤，{TRANSLATION_REDIS_RETRY_SECONDS} 秒內只使用行程內快取: {e}")
+
+    @staticmethod
+    def _redis_key(key: Tuple[str, str, str]) -> str:
+        digest, target_language, provider = key
+        return f"{REDIS_KEY_PREFIX}:{provider}:{target_language}:{digest}"
+
+    # ---------- 行程內 LRU ----------
+
+    def _put_local(self, key: Tuple[str, str, str], translated: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.local_ttl, translated)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, text: str, target_language: str, provider: str, local_only: bool = False) -> Optional[str]:
+        """
+        快取的翻譯結果，沒有時返回 None
+
+        local_only=True 時只查詢行程內快取（不連線 Redis、不計入未命中），供事件迴圈中使用
+        """
+        return self.get_any(text, target_language, (provider,), local_only)
+
+    def get_any(self, text: str, target_language: str, providers: Tuple[str, ...],
+                local_only: bool = False) -> Optional[str]:
+        """依序查詢多個翻譯服務的快取結果（Redis 以一次 MGET 查詢），都沒有時返回 None"""
+        keys = [translation_key(text, target_language, provider) for provider in providers]
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, translated = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.local_hits += 1
+                    return translated
+                del self._entries[key]
+
+        if local_only:
+            return None
+        client = self._get_redis()
+        if client is not None:
+            try:
+                found = client.mget([self._redis_key(key) for key in keys])
+            except Exception as e:
+                self._redis_failed(e)
+                found = []
+            for key, translated in zip(keys, found):
+                if translated is not None:
+                    self._put_local(key, translated)
+                    with self._lock:
+                        self.redis_hits += 1
+                    return translated
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text: str, target_language: str, provider: str, translated: str):
+        """保存翻譯結果（兩層都寫入）"""
+        key = translation_key(text, target_language, provider)
+        self._put_local(key, translated)
+        with self._lock:
+            self.stores += 1
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.setex(self._redis_key(key), self.redis_ttl, translated)
+            except Exception as e:
+                self._redis_failed(e)
+
+    def clear(self):
+        """清除行程內快取（Redis 中的翻譯依 TTL 過期）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'local_hits': self.local_hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'redis_errors': self.redis_errors,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_translation_cache = TranslationCache()
+
+
+def translate_cached(text: str, target_language: str, provider: str,
+                     translate_func: Callable[[str, str], str]) -> str:
+    """
+    取得翻譯結果，相同 (文字, 目標語系) 已有快取時直接返回（指定的翻譯服務優先）
+
+    Args:
+        text: 要翻譯的文字（名稱已換成佔位符）
+        target_language: 目標語系代碼
+        provider: 翻譯服務（PROVIDER_AZURE / PROVIDER_GOOGLE）
+        translate_func: 實際翻譯函數 translate_func(text, target_language)，失敗時返回原文
+
+    Returns:
+        翻譯後的文字
+    """
+    cached = _translation_cache.get_any(text, target_language, lookup_providers(provider))
+    if cached is not None:
+        return cached
+
+    translated = translate_func(text, target_language)
+    # 翻譯失敗時 translate_func 返回原文，不快取
+    if translated and translated != text:
+        _translation_cache.put(text, target_language, provider, translated)
+    return translated
+
+
+async def translate_cached_batch(texts: List[str], target_language: str, provider: str,
+                                 translate_batch_func: Callable[[List[str], str],
+                                                                Awaitable[Tuple[List[str], Optional[str]]]]) -> List[str]:
+    """
+    translate_cached 的批次（非同步）版本：快取未命中的文字去除重複後以一次請求翻譯
+
+    Args:
+        texts: 要翻譯的文字列表（名稱已換成佔位符）
+        target_language: 目標語系代碼
+        provider: 主要翻譯服務（查詢快取時優先，其次為其他翻譯服務的結果）
+        translate_batch_func: 非同步批次翻譯函數 translate_batch_func(texts, target_language)，
+            返回 (與 texts 順序相同的翻譯結果, 實際提供結果的翻譯服務)，失敗的項目返回原文；
+            結果快取在實際提供結果的翻譯服務之下（如主要服務逾時改用 Google 時為 Google），服務為 None 時不快取
+
+    Returns:
+        與 texts 順序相同的翻譯結果
+    """
+    providers = lookup_providers(provider)
+    results: Dict[str, Optional[str]] = {}
+    for text in texts:
+        if text not in results:
+            results[text] = _translation_cache.get_any(text, target_language, providers, local_only=True)
+
+    # 行程內快取未命中的文字在執行緒中查詢 Redis，不阻塞事件迴圈
+    remote = [text for text, translated in results.items() if translated is None]
+    if remote:
+        found = await run_in_executor(
+            lambda: [_translation_cache.get_any(text, target_language, providers) for text in remote], pool=POOL_DB
+        )
+        results.update(zip(remote, found))
+
+    misses = [text for text, translated in results.items() if translated is None]
+    if misses:
+        translated_misses, answered_by = await translate_batch_func(misses, target_language)
+        # 翻譯失敗時返回原文，不快取
+        new_entries = [(text, translated) for text, translated in zip(misses, translated_misses)
+                       if translated and translated != text]
+        results.update(zip(misses, translated_misses))
+        if new_entries and answered_by:
+            await run_in_executor(lambda: [
+                _translation_cache.put(text, target_language, answered_by, translated)
+                for text, translated in new_entries
+            ], pool=POOL_DB)
+
+    return [results[text] for text in texts]
+
+
+def get_translation_cache_stats() -> Dict[str, Any]:
+    """翻譯快取的命中率等統計"""
+    return _translation_cache.stats()
+
+
+def clear_translation_cache():
+    """清除行程內快取的翻譯"""
+    _translation_cache.clear()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同一 LINE 用戶的訊息依序處理模塊
+用戶常在短時間內連續傳送多則訊息，同時處理會互相覆寫 Redis 上的對話資料
+（appointment_analysis 的預約資料、{line_user_id}_lang、{line_user_id}_lastest），且每則都做完整查詢。
+
+- 行程內：每個用戶一個 asyncio.Lock（先到先處理），同一用戶的訊息依到達順序執行
+- 多個 worker 行程：另以 Redis 租約（{line_user_id}_parse_lease，SET NX PX）互斥，
+  租約在 USER_LEASE_SECONDS 秒後自動過期，worker 異常結束也不會卡住用戶；
+  等待超過 USER_LEASE_WAIT_SECONDS 秒時不再等待，直接處理；Redis 無法連線時只使用行程內的鎖
+- 合併連續訊息：輪到處理時若同一用戶已有較新的訊息在排隊（本行程的序號，或 Redis 的
+  {line_user_id}_parse_latest 為其他 worker 的訊息），這則訊息只更新對話資料、不查詢可預約狀況，
+  由最後一則訊息查詢並回覆；略過查詢時在本行程（_UserLane.query_owed）與 Redis
+  （{line_user_id}_parse_owed）記錄仍欠一次查詢，最後一則訊息即使不是預約訊息，也以累積的對話資料查詢；
+  最後一則訊息不查詢時（含 skip_keywords），記錄保留給之後的訊息（行程內與 Redis 相同 TTL）
+- 背壓：行程內排隊（含處理中）的訊息超過 USER_QUEUE_MAX_PENDING 則，或同一用戶超過
+  USER_QUEUE_MAX_PER_USER 則時，拋出 UserQueueFull，由路由返回 503
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import redis
+
+from utils.async_helpers import run_in_executor, POOL_DB
+
+REDIS_HOST = 'localhost'
+REDIS_PORT = 6379
+REDIS_DB = 0
+
+# 行程內排隊（含處理中）的訊息上限
+USER_QUEUE_MAX_PENDING = int(os.getenv('USER_QUEUE_MAX_PENDING', '200'))
+# 同一用戶排隊（含處理中）的訊息上限
+USER_QUEUE_MAX_PER_USER = int(os.getenv('USER_QUEUE_MAX_PER_USER', '10'))
+# Redis 租約的有效時間（秒），需大於單則訊息的最長處理時間
+USER_LEASE_SECONDS = 30
+# 等待其他 worker 釋放租約的最長時間（秒）
+USER_LEASE_WAIT_SECONDS = 20
+# 等待租約時的輪詢間隔（秒）
+USER_LEASE_POLL_SECONDS = 0.05
+# Redis 發生錯誤後暫停使用的時間（秒）
+USER_QUEUE_REDIS_RETRY_SECONDS = 30
+
+# 本行程的識別碼（{line_user_id}_parse_latest 的前綴，用來判斷最新的訊息是否在其他 worker）
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# 只刪除自己持有的租約
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class UserQueueFull(Exception):
+    """排隊的訊息過多（背壓）"""
+
+
+class _UserLane:
+    """單一用戶在本行程中的排隊狀態"""
+
+    __slots__ = ('lock', 'pending', 'latest_seq', 'query_owed')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+        self.latest_seq = 0
+        # 較早的訊息略過了查詢，尚未由較新的訊息查詢
+        self.query_owed = False
+
+
+class UserTurn:
+    """輪到處理的一則訊息"""
+
+    def __init__(self, queue: 'UserMessageQueue', line_user_id: str, lane: _UserLane, seq: int):
+        self.queue = queue
+        self.line_user_id = line_user_id
+        self.lane = lane
+        self.seq = seq
+        # 是否已在 Redis 登記為最新的訊息（Redis 無法使用時為 False）
+        self.registered = False
+        self.lease_token: Optional[str] = None
+        self.waited = 0.0
+
+    async def is_superseded(self) -> bool:
+        """同一用戶是否已有較新的訊息（在本行程或其他 worker）等待處理"""
+        if self.lane.latest_seq != self.seq:
+            return True
+        if not self.registered:
+            return False
+        # 本行程的訊息依序號判斷（Redis 寫入順序可能與到達順序不同），只看其他 worker 的訊息
+        latest = await self.queue._run_redis(self.queue._get_latest, self.line_user_id)
+        return bool(latest) and not latest.startswith(f"{self.queue.worker_id}:")
+
+    async def mark_query_owed(self):
+        """這則訊息被合併（略過查詢），由較新的訊息查詢"""
+        self.lane.query_owed = True
+        if self.registered:
+            await self.queue._run_redis(self.queue._set_owed, self.line_user_id)
+
+    async def take_query_owed(self) -> bool:
+        """是否有較早的訊息略過了查詢（在本行程或其他 worker），並清除記錄"""
+        owed = self.lane.query_owed
+        self.lane.query_owed = False
+        if self.registered:
+            owed = bool(await self.queue._run_redis(self.queue._take_owed, self.line_user_id)) or owed
+        return owed
+
+
+class UserMessageQueue:
+    """同一用戶的訊息依序處理，並統計等待時間與合併、拒絕次數"""
+
+    def __init__(self, max_pending: int = USER_QUEUE_MAX_PENDING,
+                 max_per_user: int = USER_QUEUE_MAX_PER_USER,
+                 lease_seconds: float = USER_LEASE_SECONDS,
+                 lease_wait_seconds: float = USER_LEASE_WAIT_SECONDS):
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self.lease_seconds = lease_seconds
+        self.lease_wait_seconds = lease_wait_seconds
+        self.worker_id = WORKER_ID
+        self._lanes: Dict[str, _UserLane] = {}
+        # 排隊結束時仍欠查詢的用戶 -> 記錄的到期時間（與 Redis 的 {line_user_id}_parse_owed 相同 TTL）
+        self._owed_until: Dict[str, float] = {}
+        self._pending = 0
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'processed': 0, 'coalesced': 0, 'rejected': 0,
+            'lease_waits': 0, 'lease_timeouts': 0, 'redis_errors': 0,
+            'wait_total': 0.0, 'wait_max': 0.0,
+        }
+
+    # ---------- Redis ----------
+
+    def _get_redis(self):
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        self._count('redis_errors')
+        self._redis_retry_at = time.monotonic() + USER_QUEUE_REDIS_RETRY_SECONDS
+        print(f"DEBUG [UserQueue]: Redis 錯誤，{USER_QUEUE_REDIS_RETRY_SECONDS} 秒內只使用行程內的鎖: {e}")
+
+    async def _run_redis(self, func, *args):
+        """在執行緒中執行 Redis 操作（不阻塞事件迴圈），Redis 無法使用時返回 None"""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            return await run_in_executor(func, *args, pool=POOL_DB)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _register_latest(self, line_user_id: str, seq: int) -> Optional[bool]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        client.set(f"{line_user_id}_parse_latest", f"{self.worker_id}:{seq}", ex=int(self.lease_seconds * 2))
+        return True
+
+    def _get_latest(self, line_user_id: str) -> Optional[str]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        return client.get(f"{line_user_id}_parse_latest")
+
+    def _set_owed(self, line_user_id: str) -> Optional[bool]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        client.set(f"{line_user_id}_parse_owed", '1', ex=int(self.lease_seconds * 2))
+        return True
+
+    def _take_owed(self, line_user_id: str) -> Optional[bool]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        pipe = client.pipeline()
+        pipe.get(f"{line_user_id}_parse_owed")
+        pipe.delete(f"{line_user_id}_parse_owed")
+        owed, _ = pipe.execute()
+        return bool(owed)
+
+    def _try_acquire_lease(self, line_user_id: str, token: str) -> Optional[bool]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        return bool(client.set(f"{line_user_id}_parse_lease", token, nx=True, px=int(self.lease_seconds * 1000)))
+
+    def _release_lease(self, line_user_id: str, token: str):
+        client = self._get_redis()
+        if client is not None:
+            client.eval(_RELEASE_LEASE_SCRIPT, 1, f"{line_user_id}_parse_lease", token)
+
+    async def _acquire_lease(self, turn: UserTurn):
+        """取得 Redis 租約（其他 worker 正在處理同一用戶時等待），Redis 無法使用或等待逾時時不持有租約"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lease_wait_seconds
+        waited = False
+        while True:
+            acquired = await self._run_redis(self._try_acquire_lease, turn.line_user_id, token)
+            if acquired is None:
+                return
+            if acquired:
+                turn.lease_token = token
+                if waited:
+                    self._count('lease_waits')
+                return
+            if time.monotonic() >= deadline:
+                self._count('lease_timeouts')
+                print(f"DEBUG [UserQueue]: {turn.line_user_id} 等待租約逾時，直接處理")
+                return
+            waited = True
+            await asyncio.sleep(USER_LEASE_POLL_SECONDS)
+
+    # ---------- 排隊 ----------
+
+    def _count(self, key: str, value: float = 1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    @asynccontextmanager
+    async def turn(self, line_user_id: str):
+        """
+        等待輪到這則訊息（同一用戶依到達順序），區塊結束時讓下一則訊息處理
+
+            async with user_turn(request.key) as turn:
+                if await turn.is_superseded():
+                    ...  # 只更新對話資料，不查詢
+                    await turn.mark_query_owed()
+                elif await turn.take_query_owed():
+                    ...  # 以累積的對話資料查詢
+
+        Raises:
+            UserQueueFull: 排隊的訊息過多
+        """
+        lane = self._lanes.get(line_user_id)
+        if self._pending >= self.max_pending or (lane is not None and lane.pending >= self.max_per_user):
+            self._count('rejected')
+            raise UserQueueFull(f"排隊訊息過多（全部 {self._pending}，用戶 {lane.pending if lane else 0}）")
+        if lane is None:
+            lane = self._lanes[line_user_id] = _UserLane()
+            lane.query_owed = self._owed_until.pop(line_user_id, 0.0) > time.monotonic()
+
+        lane.pending += 1
+        lane.latest_seq += 1
+        self._pending += 1
+        turn = UserTurn(self, line_user_id, lane, lane.latest_seq)
+        started = time.monotonic()
+        try:
+            turn.registered = bool(await self._run_redis(self._register_latest, line_user_id, turn.seq))
+            async with lane.lock:
+                await self._acquire_lease(turn)
+                turn.waited = time.monotonic() - started
+                with self._stats_lock:
+                    self._stats['wait_total'] += turn.waited
+                    self._stats['wait_max'] = max(self._stats['wait_max'], turn.waited)
+                try:
+                    yield turn
+                finally:
+                    if turn.lease_token:
+                        await self._run_redis(self._release_lease, line_user_id, turn.lease_token)
+                    self._count('processed')
+        finally:
+            lane.pending -= 1
+            self._pending -= 1
+            if lane.pending == 0 and self._lanes.get(line_user_id) is lane:
+                del self._lanes[line_user_id]
+                if lane.query_owed:
+                    # 最後一則訊息沒有查詢（如含 skip_keywords），記錄保留給下一則訊息
+                    self._keep_owed(line_user_id)
+
+    def _keep_owed(self, line_user_id: str):
+        now = time.monotonic()
+        for user_id, until in list(self._owed_until.items()):
+            if until <= now:
+                del self._owed_until[user_id]
+        self._owed_until[line_user_id] = now + self.lease_seconds * 2
+
+    def record_coalesced(self):
+        self._count('coalesced')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        processed = stats['processed']
+        return {
+            'pending': self._pending,
+            'active_users': len(self._lanes),
+            'max_pending': self.max_pending,
+            'max_per_user': self.max_per_user,
+            'processed': processed,
+            'coalesced': stats['coalesced'],
+            'rejected': stats['rejected'],
+            'lease_waits': stats['lease_waits'],
+            'lease_timeouts': stats['lease_timeouts'],
+            'redis_errors': stats['redis_errors'],
+            'avg_wait_ms': round(stats['wait_total'] * 1000 / processed, 1) if processed else 0.0,
+            'max_wait_ms': round(stats['wait_max'] * 1000, 1),
+        }
+
+
+# 行程內共用的用戶訊息佇列
+_user_queue = UserMessageQueue()
+
+
+def user_turn(line_user_id: str):
+    """等待輪到同一用戶的這則訊息（async with），見 UserMessageQueue.turn"""
+    return _user_queue.turn(line_user_id)
+
+
+def record_coalesced():
+    """記錄一則被合併（略過查詢）的訊息"""
+    _user_queue.record_coalesced()
+
+
+def get_user_queue_stats() -> Dict[str, Any]:
+    """排隊中的訊息數、合併 / 拒絕次數與等待時間"""
+    return _user_queue.stats()
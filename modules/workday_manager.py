@@ -14,6 +14,58 @@ from datetime import datetime, date
 import redis
 import json
 import re
+import threading
+from collections import OrderedDict
+from core.room_engine import BLOCKS_PER_DAY, TIME_LABELS
+
+# 可預約時段：每15分鐘一個（3個block），非今日由 09:00 開始，最晚 22:30
+SLOT_STEP_BLOCKS = 3
+SLOT_FIRST_BLOCK = TIME_LABELS.index("09:00")
+SLOT_LAST_BLOCK = TIME_LABELS.index("22:30")
+_ALL_DAY_SLOT_MASK = sum(1 << b for b in range(0, SLOT_LAST_BLOCK + 1, SLOT_STEP_BLOCKS))
+_OPENING_SLOT_MASK = sum(1 << b for b in range(SLOT_FIRST_BLOCK, SLOT_LAST_BLOCK + 1, SLOT_STEP_BLOCKS))
+
+# avoid_block 資料來源的表
+AVOID_BLOCK_TABLES = ('Store', 'Tasks')
+# 行程內最多保存幾個日期的可預約時段 bitmask
+MAX_CACHED_SLOT_DATES = 14
+
+# 可預約時段 bitmask 的行程內快取 {query_date: (Store/Tasks 版本, avoid_block update_time, {store_key: mask})}
+# 先以版本服務在行程內保存的表版本判斷（不讀取 Redis）；版本未知時與 avoid_block 的 Redis 快取比對 update_time
+_bookable_slot_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+_bookable_slot_lock = threading.Lock()
+
+
+def _avoid_block_tables_version() -> Optional[tuple]:
+    """Store、Tasks 表的版本（版本服務保存在行程內，不查詢資料庫），任一表版本未知時為 None"""
+    # 延遲導入：table_versions 依賴 WorkdayManager
+    from modules.table_versions import table_versions
+    versions = []
+    for table in AVOID_BLOCK_TABLES:
+        table_versions.watch(table)
+        versions.append(table_versions.get(table))
+    return tuple(versions) if all(versions) else None
+
+
+def build_bookable_slot_masks(avoid_data: Optional[Dict[str, list]]) -> Dict[str, int]:
+    """由 avoid_block 資料 {store_key: [bool]*294} 建立各店家可預約時段 bitmask"""
+    masks = {}
+    for store_key, store_avoid_block in (avoid_data or {}).items():
+        avoid_mask = 0
+        for i, is_free in enumerate(store_avoid_block[:BLOCKS_PER_DAY]):
+            if is_free == False:
+                avoid_mask |= 1 << i
+        masks[store_key] = _ALL_DAY_SLOT_MASK & ~avoid_mask
+    return masks
+
+
+def select_bookable_slot_mask(masks: Dict[str, int], store_id: int, lead_block: Optional[int] = None) -> int:
+    """套用最早可預約 block（None 表示非今日，由 09:00 開始）"""
+    # 無 avoid_block 資料時不排除任何時段
+    mask = masks.get(str(store_id), _ALL_DAY_SLOT_MASK)
+    if lead_block is None:
+        return mask & _OPENING_SLOT_MASK
+    return mask & ~((1 << lead_block) - 1)
 
 class WorkdayManager:
     """工作日管理器"""
@@ -74,6 +126,42 @@ class WorkdayManager:
 
         return
 
+    def get_tables_lastupdate_time(self, tablenames: List[str]) -> Dict[str, Optional[datetime]]:
+        """以單一查詢取得多個表的最後更新時間 {表名: datetime 或 None}"""
+        result = {name: None for name in tablenames}
+        connection = self.db_config.get_connection()
+        if not connection:
+            return result
+
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            placeholders = ', '.join(['%s'] * len(tablenames))
+            query = f"""
+                SELECT TABLE_NAME, UPDATE_TIME
+                FROM information_schema.tables
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME IN ({placeholders})
+                """
+            cursor.execute(query, tuple(tablenames))
+            for row in cursor.fetchall():
+                update_time = row.get('UPDATE_TIME')
+                if isinstance(update_time, str):
+                    try:
+                        update_time = datetime.fromisoformat(update_time)
+                    except ValueError:
+                        update_time = datetime.strptime(update_time, '%Y-%m-%d %H:%M:%S')
+                result[row.get('TABLE_NAME')] = update_time
+            return result
+        except Exception as e:
+            print(f"獲取表最後更新時間錯誤: {e}")
+            return result
+        finally:
+            if cursor:
+                cursor.close()
+            if connection.is_connected():
+                connection.close()
+
     def get_all_forcelocations(self, date_str: Optional[str] = None) -> List[Dict[str, Any]]:
         """取得 forcelocation 表的所有資料，返回 [{'staff_name': str, 'instores': [int,...]}, ...]"""
         if not date_str:
@@ -127,6 +215,11 @@ class WorkdayManager:
             connection.close()
 
     def get_all_task_avoid_block(self, check_date:str):
+        cached_info = self._get_task_avoid_block_info(check_date)
+        return cached_info.get('data') if cached_info else None
+
+    def _get_task_avoid_block_info(self, check_date:str) -> Optional[Dict]:
+        """取得 avoid_block 快取內容（含 update_time），必要時由資料庫重建"""
         try:
 
             redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
@@ -141,6 +234,7 @@ class WorkdayManager:
                 if cached_update_time:
                     cached_update_time = datetime.fromisoformat(cached_update_time)
             else:
+                cached_info = None
                 cached_data = None
                 cached_update_time = None
             
@@ -162,7 +256,7 @@ class WorkdayManager:
             #不需更新資料，直接返回緩存數據
             if not need_update:
                 print("✅ avoid_block 資料，使用緩存資料")
-                return cached_data
+                return cached_info
             
             print("🔄 avoid_block 資料，重新從資料庫重新獲取")
             block_len= 288 +6  
@@ -220,12 +314,63 @@ class WorkdayManager:
             # 將資料存放在 redis 上
             redis_client.set('avoid_block_' + query_date, json.dumps(result, ensure_ascii=False))
             
-            return result['data']
+            return result
 
         except Exception as e:
             print(f"獲取avoid_block狀態錯誤: {e}")
             return None
 
+    def get_bookable_slot_masks(self, check_date: str) -> Dict[str, int]:
+        """
+        取得當日各店家可預約時段的 bitmask（bit n = 第 n 個 block 的時段可預約）
+        
+        由 00:00 到 22:30 每15分鐘一個時段，扣除 avoid_block 中有其它客人進出的時間。
+        結果保存在行程內：Store、Tasks 表的版本（版本服務每 TABLE_VERSION_POLL_SECONDS 秒更新）未變動時
+        直接返回，不讀取 avoid_block 的 Redis 快取；版本未知或已變動時才讀取 avoid_block，
+        其 update_time 未變動時不需重新計算。
+        
+        Returns:
+            {store_key: mask}，無 avoid_block 資料時返回空字典
+        """
+        query_date = re.sub('/', '-', check_date)
+        tables_version = _avoid_block_tables_version()
+        if tables_version is not None:
+            with _bookable_slot_lock:
+                cached = _bookable_slot_cache.get(query_date)
+                if cached and cached[0] == tables_version:
+                    _bookable_slot_cache.move_to_end(query_date)
+                    return cached[2]
+        
+        avoid_info = self._get_task_avoid_block_info(check_date)
+        if not avoid_info:
+            return {}
+        
+        update_time = avoid_info.get('update_time')
+        with _bookable_slot_lock:
+            cached = _bookable_slot_cache.get(query_date)
+        if cached and cached[1] == update_time:
+            masks = cached[2]
+        else:
+            masks = build_bookable_slot_masks(avoid_info.get('data'))
+        
+        with _bookable_slot_lock:
+            _bookable_slot_cache[query_date] = (tables_version, update_time, masks)
+            _bookable_slot_cache.move_to_end(query_date)
+            while len(_bookable_slot_cache) > MAX_CACHED_SLOT_DATES:
+                _bookable_slot_cache.popitem(last=False)
+        return masks
+
+    def get_bookable_slot_mask(self, store_id: int, check_date: str, lead_block: Optional[int] = None) -> int:
+        """
+        取得指定店家可預約時段的 bitmask
+        
+        Args:
+            store_id: 店家ID
+            check_date: 日期
+            lead_block: 最早可預約的 block（今日為現在時間+2小時），None 表示非今日，由 09:00 開始
+        """
+        return select_bookable_slot_mask(self.get_bookable_slot_masks(check_date), store_id, lead_block)
+
     def get_all_avoid_block_by_storeid(self, store_id: int, check_date: str):
         all_task_avoid_block=self.get_all_task_avoid_block(check_date)
         #找出符合storeid的avoid_block
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+由 OpenCC 的字典產生 core/resource/s2tw.txt（簡體 -> 繁體（台灣）對照表）
+
+- 單字：STCharacters 的第一個候選字，再套用 TWVariants（如 裏 -> 裡、爲 -> 為、着 -> 著），只保留有變化的字
+- 詞組：STPhrases 中逐字轉換會出錯的詞（如 头发 -> 頭髮、以后 -> 以後），逐字轉換已正確的詞不收錄
+
+OpenCC 以 Apache License 2.0 授權（https://github.com/BYVoid/OpenCC）；
+字典在其原始碼套件的 data/dictionary 目錄（pip download opencc --no-binary :all: 可取得）。
+
+用法：
+    python scripts/tools/build_s2t_table.py /path/to/OpenCC/data/dictionary
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_OUTPUT = os.path.join(ROOT, 'core', 'resource', 's2tw.txt')
+
+HEADER = """# 簡體 -> 繁體（台灣）對照表，由 scripts/tools/build_s2t_table.py 產生，請勿手動修改
+# 資料來源：OpenCC（https://github.com/BYVoid/OpenCC），Apache License 2.0
+# 格式：簡體<TAB>繁體，單字在前、詞組在後
+"""
+
+
+def load_dictionary(path):
+    """OpenCC 字典：每行 key<TAB>候選（以空白分隔），只取第一個候選"""
+    mapping = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            key, values = line.rstrip('\n').split('\t', 1)
+            mapping.setdefault(key, values.split(' ')[0])
+    return mapping
+
+
+def build_table(dictionary_dir):
+    characters = load_dictionary(os.path.join(dictionary_dir, 'STCharacters.txt'))
+    phrases = load_dictionary(os.path.join(dictionary_dir, 'STPhrases.txt'))
+    variants = load_dictionary(os.path.join(dictionary_dir, 'TWVariants.txt'))
+
+    def to_taiwan(text):
+        return ''.join(variants.get(ch, ch) for ch in text)
+
+    char_table = {}
+    for key, value in characters.items():
+        value = to_taiwan(value)
+        if value != key:
+            char_table[key] = value
+    # 簡繁相同、但台灣用字不同的字（如 着 -> 著）
+    for key, value in variants.items():
+        if key not in characters and value != key:
+            char_table[key] = value
+
+    phrase_table = {}
+    for key, value in phrases.items():
+        if len(key) < 2:
+            continue
+        value = to_taiwan(value)
+        if value != ''.join(char_table.get(ch, ch) for ch in key):
+            phrase_table[key] = value
+    return char_table, phrase_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='由 OpenCC 字典產生簡繁對照表')
+    parser.add_argument('dictionary_dir', help='OpenCC 的 data/dictionary 目錄')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='輸出檔')
+    args = parser.parse_args()
+
+    char_table, phrase_table = build_table(args.dictionary_dir)
+    with open(args.output, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(HEADER)
+        for table in (char_table, phrase_table):
+            for key in sorted(table):
+                f.write(f"{key}\t{table[key]}\n")
+    print(f"單字 {len(char_table)} 個，詞組 {len(phrase_table)} 個 -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同一用戶連續訊息的合併檢查（modules/user_queue.py 與 POST /parse）
+
+以 POST /parse 的處理流程模擬用戶在短時間內連續傳送的訊息，確認：
+- 較早的預約訊息略過查詢，由最後一則訊息查詢並回覆一次
+- 最後一則不是預約訊息（如「謝謝」）時，仍以累積的對話資料查詢並回覆
+- 最後一則含 skip_keywords 時不查詢，由之後的訊息查詢
+- 沒有略過的查詢時，非預約訊息不查詢
+
+資料庫、Redis、翻譯服務與可預約查詢以行程內的替代函數取代，只檢查排隊與合併的行為。
+
+用法：
+    python scripts/tools/check_user_queue.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+# 視為含 skip_keywords 的訊息
+SKIP_KEYWORD_MESSAGE = '我要找真人客服'
+
+# 翻譯成繁體中文與查詢各需的時間（秒），讓同一批訊息在第一則處理期間全部到達
+PROCESS_SECONDS = 0.2
+
+
+def install_fakes():
+    """以行程內的替代函數取代資料庫、Redis 與翻譯服務，返回 (對話資料, 查詢紀錄)"""
+    import api.routes.parse as parse_route
+    from modules import appointment, appointment_analysis, greeting, keyword, lang, multilang, user_queue
+    from core.multilanguage import MultiLanguage
+
+    saved = {}
+    queries = []
+
+    # 用戶佇列只使用行程內的鎖
+    user_queue._user_queue._redis_retry_at = float('inf')
+
+    lang.initialize_user_language_if_needed = lambda *args: 'zh-TW'
+    lang.get_user_language = lambda *args: 'zh-TW'
+    greeting.check_daily_greeting = lambda *args: (None, {})
+    keyword.check_keywords_match = lambda message: None
+    parse_route.check_has_skip_keyword = lambda message: message == SKIP_KEYWORD_MESSAGE
+
+    async def to_traditional(message):
+        await asyncio.sleep(PROCESS_SECONDS)
+        return message, 'zh-TW'
+
+    async def translate_fields(parsed_data, target_language):
+        return parsed_data
+
+    MultiLanguage.translate_to_traditional_chinese_async = staticmethod(to_traditional)
+    multilang.translate_response_fields_async = translate_fields
+
+    appointment_analysis._get_data_from_redis = lambda line_key: dict(saved[line_key]) if line_key in saved else None
+    appointment_analysis._save_data_to_redis = lambda line_key, data: saved.__setitem__(line_key, dict(data)) or True
+
+    def query(line_key, query_data):
+        time.sleep(PROCESS_SECONDS)
+        queries.append((line_key, query_data.get('date'), query_data.get('time'), query_data.get('project')))
+        return {'should_query': True, 'success': True, 'can_book': True}
+
+    def format_result(analysis_result, availability_result):
+        query_data = analysis_result['query_data']
+        return {
+            'isReservation': True,
+            'response_message': f"可預約 {query_data.get('date')} {query_data.get('time')} {query_data.get('project')} 分鐘"
+        }
+
+    appointment.query_appointment_availability_202512 = query
+    appointment.format_appointment_result = format_result
+    return saved, queries
+
+
+async def send_burst(line_user_id, messages):
+    """同時送出多則訊息（依序到達），返回各則訊息的回覆文字"""
+    from api.models import NaturalLanguageRequest
+    from api.routes.parse import parse_natural_text
+
+    async def send(message, delay):
+        await asyncio.sleep(delay)
+        result = await parse_natural_text(NaturalLanguageRequest(key=line_user_id, message=message))
+        return [item.get('text', '') for item in result.get('line_messages', [])]
+
+    return await asyncio.gather(*[send(message, index * 0.02) for index, message in enumerate(messages)])
+
+
+async def run_checks():
+    saved, queries = install_fakes()
+    failures = []
+
+    def check(name, condition, detail):
+        print(f"{'PASS' if condition else 'FAIL'}  {name}: {detail}")
+        if not condition:
+            failures.append(name)
+
+    # 1. 預約訊息後接非預約訊息：最後一則以累積的對話資料查詢並回覆
+    queries.clear()
+    replies = await send_burst('U_burst_thanks', ['明天晚上8點 鞋老師 90分', '謝謝'])
+    check('burst ending with a non-booking message',
+          len(queries) == 1 and queries[0][2] == '20:00' and queries[0][3] == 90
+          and not replies[0] and any('可預約' in text for text in replies[1]),
+          f"queries={queries} replies={replies}")
+
+    # 2. 連續的預約訊息：合併後只查詢一次（使用合併後的對話資料）
+    queries.clear()
+    replies = await send_burst('U_burst_booking', ['明天晚上8點', '改120分鐘'])
+    check('burst of booking messages',
+          len(queries) == 1 and queries[0][2] == '20:00' and queries[0][3] == 120 and not replies[0],
+          f"queries={queries} replies={replies}")
+
+    # 3. 最後一則含 skip_keywords：不查詢，由之後的訊息以累積的對話資料查詢
+    queries.clear()
+    replies = await send_burst('U_burst_skip', ['明天晚上8點 鞋老師', SKIP_KEYWORD_MESSAGE])
+    skipped = list(queries)
+    later = await send_burst('U_burst_skip', ['謝謝'])
+    check('burst ending with a skip-keyword message',
+          not skipped and len(queries) == 1 and queries[0][2] == '20:00'
+          and any('可預約' in text for text in later[0]),
+          f"queries={queries} replies={replies + later}")
+
+    # 4. 已查詢過後的非預約訊息：不再查詢
+    queries.clear()
+    replies = await send_burst('U_burst_thanks', ['謝謝'])
+    check('non-booking message with nothing owed',
+          not queries and 'U_burst_thanks' in saved,
+          f"queries={queries} replies={replies}")
+
+    return failures
+
+
+def main():
+    failures = asyncio.run(run_checks())
+    if failures:
+        print(f"\n{len(failures)} 項檢查失敗")
+        sys.exit(1)
+    print("\n全部檢查通過")
+
+
+if __name__ == "__main__":
+    main()
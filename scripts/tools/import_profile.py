@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+啟動時間分析：各模組的 import 時間
+
+以 python -X importtime 在子行程中導入指定模組（預設 app，即完整的 API 啟動），
+彙整每個模組的自身時間與累計時間，找出拖慢 worker 啟動的模組。
+
+用法：
+    python scripts/tools/import_profile.py                      # import app
+    python scripts/tools/import_profile.py ai_parser.booking_lexer --top 20
+    python scripts/tools/import_profile.py app --project-only   # 只列出專案內的模組
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 專案內的頂層套件
+PROJECT_PACKAGES = ('ai_parser', 'api', 'core', 'modules', 'utils', 'app')
+
+# import time:       123 |       4567 |   package.module
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def profile_imports(module: str):
+    """返回 [(模組名稱, 自身 us, 累計 us, 層級), ...]（依導入完成的順序）及子行程結束代碼"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    if completed.returncode != 0:
+        print(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else '導入失敗')
+    return rows, completed.returncode
+
+
+def is_project_module(name: str) -> bool:
+    return name.split('.', 1)[0] in PROJECT_PACKAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description='各模組的 import 時間')
+    parser.add_argument('module', nargs='?', default='app', help='要導入的模組（預設 app）')
+    parser.add_argument('--top', type=int, default=30, help='列出前幾名')
+    parser.add_argument('--project-only', action='store_true', help='只列出專案內的模組')
+    args = parser.parse_args()
+
+    rows, returncode = profile_imports(args.module)
+    if not rows:
+        return returncode or 1
+
+    # 頂層（level 0）的累計時間加總即為整體 import 時間
+    total_us = sum(cumulative for _, _, cumulative, level in rows if level == 0)
+    project_self_us = sum(self_us for name, self_us, _, _ in rows if is_project_module(name))
+    listed = [row for row in rows if is_project_module(row[0])] if args.project_only else rows
+
+    print(f"import {args.module}: 共 {total_us / 1000:.1f} ms，{len(rows)} 個模組；"
+          f"專案模組自身時間 {project_self_us / 1000:.1f} ms")
+
+    print(f"\n累計時間前 {args.top} 名（含其導入的模組）:")
+    print(f"{'cumulative(ms)':>15}{'self(ms)':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted(listed, key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>15.1f}{self_us / 1000:>10.1f}  {name}")
+
+    print(f"\n自身時間前 {args.top} 名:")
+    print(f"{'self(ms)':>15}  module")
+    for name, self_us, _, _ in sorted(listed, key=lambda row: -row[1])[:args.top]:
+        print(f"{self_us / 1000:>15.1f}  {name}")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
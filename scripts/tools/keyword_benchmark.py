@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+關鍵字回應比對基準測試
+
+以隨機產生的關鍵字表（exact / contains / regex 混合）與訊息，比較：
+- 逐筆掃描（原本 check_keywords_match 的做法：依優先順序逐筆比對、regex 每次 re.search）
+- 編譯後的 KeywordEngine（exact 字典、contains 自動機、預先編譯的 regex）
+確認兩者結果完全相同，並輸出每則訊息的平均比對時間。不需要資料庫。
+
+用法：
+    python scripts/tools/keyword_benchmark.py
+    python scripts/tools/keyword_benchmark.py --keywords 500 --messages 5000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from modules.keyword import KeywordEngine
+
+WORDS = ['價錢', '價格', '地址', '營業時間', '停車', '刷卡', '發票', '優惠', '會員', '儲值',
+         '西門', '延吉', '家樂福', '預約', '取消', '改期', '師傅', '按摩', '腳底', '精油',
+         'price', 'address', 'parking', 'hours', 'card', 'coupon', 'menu', 'wifi']
+
+
+def linear_match(rows, text):
+    """原本的逐筆掃描"""
+    for keyword, match_type, response in rows:
+        if match_type == 'exact':
+            if text.strip() == keyword:
+                return response
+        elif match_type == 'contains':
+            if keyword in text:
+                return response
+        elif match_type == 'regex':
+            for k in keyword.split('|'):
+                if k.strip() and re.search(k.strip(), text, re.IGNORECASE):
+                    return response
+    return None
+
+
+def make_rows(count, rng):
+    rows = []
+    for i in range(count):
+        match_type = rng.choice(['exact', 'contains', 'contains', 'regex'])
+        if match_type == 'regex':
+            keyword = '|'.join(
+                rng.choice(WORDS) + rng.choice(['', '.*?' + rng.choice(WORDS), r'\d+', '[嗎呢]?'])
+                for _ in range(rng.randint(1, 3))
+            )
+        else:
+            keyword = ''.join(rng.choice(WORDS) for _ in range(rng.randint(1, 2))) + f'{i:03d}' * (rng.random() < 0.5)
+        rows.append((keyword, match_type, f'response-{i}'))
+    return rows
+
+
+def make_messages(count, rng):
+    fillers = ['請問', '你好', '我想問', '', '一下', '謝謝', '？', '明天', '兩位', '嗎']
+    return [''.join(rng.choice(WORDS + fillers) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='關鍵字回應比對基準測試')
+    parser.add_argument('--keywords', type=int, default=300, help='關鍵字數量')
+    parser.add_argument('--messages', type=int, default=3000, help='訊息數量')
+    parser.add_argument('--seed', type=int, default=38)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_rows(args.keywords, rng)
+    messages = make_messages(args.messages, rng)
+
+    started = time.perf_counter()
+    engine = KeywordEngine(rows)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    expected = [linear_match(rows, message) for message in messages]
+    linear_us = (time.perf_counter() - started) / len(messages) * 1e6
+
+    started = time.perf_counter()
+    actual = [engine.match(message) for message in messages]
+    engine_us = (time.perf_counter() - started) / len(messages) * 1e6
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    matched = sum(1 for response in actual if response is not None)
+    print(f"關鍵字 {len(rows)} 筆，訊息 {len(messages)} 則（命中 {matched} 則），編譯 {compile_ms:.1f} ms")
+    print(f"逐筆掃描:      {linear_us:8.1f} us/則")
+    print(f"KeywordEngine: {engine_us:8.1f} us/則（{linear_us / engine_us:.1f}x）")
+    print(f"結果不一致: {mismatches} 則")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,237 @@
-import sys
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預約訊息解析基準測試與準確度檢查
+
+以 scripts/tools/parse_corpus.jsonl（匿名化的預約訊息與預期結果）執行階段1 的解析
+（modules.appointment_analysis.parse_current_message）：
+- 固定「現在」時間（語料第一行 meta.now），相對日期、時間的結果可重現
+- 師傅 / 店家名單使用語料中的記憶體名單，不需要資料庫
+- 報告各階段（names、date_time、cues、duration、count、is_reservation）與整體的
+  p50 / p99 延遲，以及每核心吞吐量（以 CPU 時間計算）
+- 與預期結果比對，列出不一致的欄位；有不一致時結束代碼為 1
+
+用法：
+    python scripts/tools/parse_1000_sentences.py
+    python scripts/tools/parse_1000_sentences.py --repeat 5 --report /tmp/parse_bench.json
+    python scripts/tools/parse_1000_sentences.py --update-golden       # 確認解析變更正確後更新預期結果
+    python scripts/tools/parse_1000_sentences.py --sentences test_1000_output.txt   # 逐句輸出 parser_date_time 結果
+"""
+
+import argparse
+import contextlib
+import json
+import os
 import re
-sys.path.append('/Volumes/aiserver2/ai_parser')
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / 'parse_corpus.jsonl'
+
+# 與預期結果比對的欄位
+RESULT_FIELDS = ('date', 'time', 'masseur', 'branch', 'project', 'count', 'is_reservation')
+STAGES = ('names', 'date_time', 'cues', 'duration', 'count', 'is_reservation')
+# 順序不影響結果的欄位（「不指定」時 masseur 為全部師傅，順序隨集合而定）
+UNORDERED_FIELDS = ('masseur',)
+
+def load_corpus(path: Path):
+    """返回 (meta, cases)，cases 為 [{'message': ..., 'expected': {...}}, ...]"""
+    meta = {}
+    cases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if 'meta' in item:
+                meta = item['meta']
+            else:
+                cases.append(item)
+    return meta, cases
+
+
+def save_corpus(path: Path, meta, cases):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'meta': meta}, ensure_ascii=False) + '\n')
+        for case in cases:
+            f.write(json.dumps(case, ensure_ascii=False) + '\n')
+
+
+def percentile(values, fraction):
+    """nearest-rank 百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def comparable_result(parsed):
+    """取出比對欄位，順序無關的列表先排序"""
+    result = {field: parsed.get(field) for field in RESULT_FIELDS}
+    for field in UNORDERED_FIELDS:
+        if isinstance(result[field], list):
+            result[field] = sorted(result[field])
+    return result
+
+
+def run_benchmark(cases, matcher, repeat):
+    from modules.appointment_analysis import parse_current_message
+
+    results = []
+    stage_samples = {stage: [] for stage in STAGES}
+    total_samples = []
+    cpu_seconds = 0.0
+    wall_seconds = 0.0
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        # 預熱一次（不計時），同時取得比對用的結果
+        for case in cases:
+            parsed = parse_current_message(case['message'], matcher)
+            results.append(comparable_result(parsed))
+
+        for _ in range(repeat):
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            for case in cases:
+                timings = {}
+                started = time.perf_counter()
+                parse_current_message(case['message'], matcher, timings)
+                total_samples.append(time.perf_counter() - started)
+                for stage in STAGES:
+                    stage_samples[stage].append(timings.get(stage, 0.0))
+            cpu_seconds += time.process_time() - cpu_started
+            wall_seconds += time.perf_counter() - wall_started
+
+    parsed_count = len(cases) * repeat
+    report = {
+        'messages': len(cases),
+        'repeat': repeat,
+        'stages': {
+            stage: {
+                'p50_us': round(percentile(samples, 0.50) * 1e6, 1),
+                'p99_us': round(percentile(samples, 0.99) * 1e6, 1),
+                'mean_us': round(sum(samples) / len(samples) * 1e6, 1) if samples else 0.0,
+            }
+            for stage, samples in list(stage_samples.items()) + [('total', total_samples)]
+        },
+        'throughput_per_core': round(parsed_count / cpu_seconds, 1) if cpu_seconds else 0.0,
+        'throughput_wall': round(parsed_count / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+    return results, report
 
-from handle_time2025 import parser_date_time
 
-# 讀取 test_1000_output.txt 並解析每句
-def parse_sentences():
-    with open('/Volumes/aiserver2/test_1000_output.txt', 'r') as f:
+def compare_results(cases, results):
+    """返回 (各欄位正確數, 不一致列表)"""
+    correct = {field: 0 for field in RESULT_FIELDS}
+    diffs = []
+    for case, actual in zip(cases, results):
+        expected = case.get('expected', {})
+        for field in RESULT_FIELDS:
+            if expected.get(field) == actual.get(field):
+                correct[field] += 1
+            else:
+                diffs.append({'message': case['message'], 'field': field,
+                              'expected': expected.get(field), 'actual': actual.get(field)})
+    return correct, diffs
+
+
+def print_report(report, correct, diffs, total, show_diffs):
+    print(f"語料: {report['messages']} 則 × {report['repeat']} 次")
+    print(f"{'階段':<16}{'p50(us)':>10}{'p99(us)':>10}{'mean(us)':>10}")
+    for stage, values in report['stages'].items():
+        print(f"{stage:<16}{values['p50_us']:>10}{values['p99_us']:>10}{values['mean_us']:>10}")
+    print(f"吞吐量: {report['throughput_per_core']} 則/秒/核心（CPU 時間），{report['throughput_wall']} 則/秒（牆鐘時間）")
+
+    print("\n準確度（與預期結果相同的比例）:")
+    for field in RESULT_FIELDS:
+        print(f"  {field:<16}{correct[field]}/{total}")
+    if diffs:
+        print(f"\n不一致 {len(diffs)} 筆（顯示前 {min(show_diffs, len(diffs))} 筆）:")
+        for diff in diffs[:show_diffs]:
+            print(f"  {diff['message']!r} [{diff['field']}] 預期 {diff['expected']!r}，實際 {diff['actual']!r}")
+
+
+def benchmark_corpus(args):
+    from ai_parser.name_matcher import NameMatcher
+    from modules.parse_batch import install_parser_clock, set_reference_time
+
+    corpus_path = Path(args.corpus)
+    meta, cases = load_corpus(corpus_path)
+    now = datetime.fromisoformat(meta['now'])
+
+    install_parser_clock()
+    set_reference_time(now)
+
+    matcher = NameMatcher([tuple(row) for row in meta.get('staff', [])], meta.get('stores', {}))
+    matcher.version = ('corpus',)
+
+    results, report = run_benchmark(cases, matcher, args.repeat)
+
+    if args.update_golden:
+        for case, actual in zip(cases, results):
+            case['expected'] = actual
+        save_corpus(corpus_path, meta, cases)
+        print(f"已更新預期結果: {corpus_path}（{len(cases)} 則）")
+
+    correct, diffs = compare_results(cases, results)
+    report['now'] = meta['now']
+    report['accuracy'] = {field: round(correct[field] / len(cases), 4) if cases else 0.0 for field in RESULT_FIELDS}
+    report['diff_count'] = len(diffs)
+    print_report(report, correct, diffs, len(cases), args.show_diffs)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(dict(report, diffs=diffs), f, ensure_ascii=False, indent=2)
+        print(f"\n報告已寫入 {args.report}")
+    return 1 if diffs else 0
+
+
+def parse_sentences(path):
+    """讀取 test_1000_output.txt 格式（每句以空行分隔，第一行為「句子: ...」），逐句輸出 parser_date_time 結果"""
+    from ai_parser.handle_time2025 import parser_date_time
+
+    with open(path, 'r', encoding='utf-8') as f:
         content = f.read()
 
     # 分割成每句的塊
-    blocks = re.split(r'\n\n', content.strip())
-
-    for block in blocks:
+    for block in re.split(r'\n\n', content.strip()):
         lines = block.split('\n')
-        if len(lines) >= 3:
-            sentence_line = lines[0]
-            date_line = lines[1]
-            time_line = lines[2]
-
-            # 提取句子
-            sentence_match = re.search(r'句子: (.+)', sentence_line)
-            if sentence_match:
-                sentence = sentence_match.group(1)
-                print(f"句子: {sentence}")
-
-                # 調用 parser_date_time
-                try:
-                    result = parser_date_time(sentence)
-                    print(f"解析結果: {result}")
-                except Exception as e:
-                    print(f"解析錯誤: {e}")
-
-                print()
+        if len(lines) < 3:
+            continue
+        sentence_match = re.search(r'句子: (.+)', lines[0])
+        if not sentence_match:
+            continue
+        sentence = sentence_match.group(1)
+        print(f"句子: {sentence}")
+        try:
+            print(f"解析結果: {parser_date_time(sentence)}")
+        except Exception as e:
+            print(f"解析錯誤: {e}")
+        print()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='預約訊息解析基準測試與準確度檢查')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='語料檔（JSON Lines）')
+    parser.add_argument('--repeat', type=int, default=3, help='計時的重複次數')
+    parser.add_argument('--show-diffs', type=int, default=20, help='最多顯示幾筆不一致')
+    parser.add_argument('--report', help='將報告（含所有不一致）寫入 JSON 檔')
+    parser.add_argument('--update-golden', action='store_true', help='以目前的解析結果更新預期結果')
+    parser.add_argument('--sentences', help='舊版模式：逐句輸出 test_1000_output.txt 的 parser_date_time 結果')
+    args = parser.parse_args()
+
+    if args.sentences:
+        return parse_sentences(args.sentences)
+    return benchmark_corpus(args)
+
 
 if __name__ == "__main__":
-    parse_sentences()
\ No newline at end of file
+    sys.exit(main())
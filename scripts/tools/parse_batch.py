@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次解析離線對話紀錄（與 POST /parse/batch 相同）
+
+只執行階段1 的純解析，不讀寫 Redis、不影響用戶的對話狀態；
+訊息以行程池平行解析（預設與 CPU 核心數相同），結果以 NDJSON 逐行輸出，順序與輸入相同。
+
+輸入檔每行一則訊息；以 { 開頭的行視為 JSON，取其 message 欄位。
+
+用法：
+    python scripts/tools/parse_batch.py chat_log.txt > parsed.ndjson
+    cat chat_log.jsonl | python scripts/tools/parse_batch.py - --reference-time "2025-12-01 10:00"
+    python scripts/tools/parse_batch.py chat_log.txt --workers 1 --output parsed.ndjson
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+
+def read_messages(path):
+    """讀取訊息（- 表示標準輸入），略過空行"""
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        messages = []
+        for line in stream:
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            if line.lstrip().startswith('{'):
+                try:
+                    messages.append(str(json.loads(line).get('message', '')))
+                    continue
+                except (ValueError, AttributeError):
+                    pass
+            messages.append(line)
+        return messages
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批次解析離線對話紀錄，輸出 NDJSON')
+    parser.add_argument('input', help='訊息檔（每行一則，- 表示標準輸入）')
+    parser.add_argument('--output', help='輸出檔（預設為標準輸出）')
+    parser.add_argument('--workers', type=int, help='worker 行程數量（預設與上限皆為 CPU 核心數，1 表示不使用行程池）')
+    parser.add_argument('--chunk-size', type=int, default=None, help='每個工作分塊的訊息數量')
+    parser.add_argument('--reference-time', help='解析時的「現在」，如 "2025-12-01 10:00"（預設為實際時間）')
+    args = parser.parse_args()
+
+    from modules.parse_batch import (
+        PARSE_BATCH_CHUNK_SIZE, default_worker_count, parse_messages_batch, parse_messages_inline
+    )
+
+    reference_time = datetime.fromisoformat(args.reference_time) if args.reference_time else None
+    messages = read_messages(args.input)
+    workers = min(args.workers or default_worker_count(), default_worker_count())
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = parse_messages_inline(messages, reference_time)
+    else:
+        results = parse_messages_batch(messages, reference_time, workers,
+                                       args.chunk_size or PARSE_BATCH_CHUNK_SIZE)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    errors = 0
+    try:
+        for result in results:
+            if 'error' in result:
+                errors += 1
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    rate = len(messages) / elapsed if elapsed else 0.0
+    print(f"已解析 {len(messages)} 則（{workers} 個 worker，失敗 {errors} 則），"
+          f"耗時 {elapsed:.2f} 秒，{rate:.0f} 則/秒", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
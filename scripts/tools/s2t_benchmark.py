@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地簡轉繁基準測試
+
+以解析語料（scripts/tools/parse_corpus.jsonl）的訊息逐字轉成簡體（反查對照表的單字部分），
+再以 core/zh_convert.py 轉回繁體，輸出：
+- 對照表載入時間
+- 轉換吞吐量（則/秒、字/秒）與每則平均時間
+- 語系判斷結果（簡體訊息應判斷為 zh-CN）與轉回後與原文不一致的訊息數
+不需要資料庫或網路。
+
+用法：
+    python scripts/tools/s2t_benchmark.py
+    python scripts/tools/s2t_benchmark.py --repeat 20 --show-diffs
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from core.language_detect import detect_text_language, ZH_CN  # noqa: E402
+from core.zh_convert import SimplifiedToTraditional, load_table  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(ROOT, 'scripts', 'tools', 'parse_corpus.jsonl')
+
+
+def load_messages(path):
+    messages = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            item = json.loads(line)
+            if 'message' in item:
+                messages.append(item['message'])
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地簡轉繁基準測試')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='訊息語料（JSONL，取 message 欄位）')
+    parser.add_argument('--repeat', type=int, default=10, help='重複轉換次數')
+    parser.add_argument('--show-diffs', action='store_true', help='列出轉回後與原文不一致的訊息')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pairs = load_table()
+    converter = SimplifiedToTraditional(pairs)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    # 繁 -> 簡（只用單字，一對多時取第一個）
+    to_simplified = {}
+    for simplified, traditional in pairs:
+        if len(simplified) == 1 and len(traditional) == 1:
+            to_simplified.setdefault(traditional, simplified)
+    originals = load_messages(args.corpus)
+    simplified_messages = [''.join(to_simplified.get(ch, ch) for ch in message) for message in originals]
+
+    detected_cn = sum(1 for message in simplified_messages if detect_text_language(message) == ZH_CN)
+    changed = sum(1 for a, b in zip(originals, simplified_messages) if a != b)
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        converted = [converter.convert(message) for message in simplified_messages]
+    elapsed = time.perf_counter() - started
+
+    count = len(simplified_messages) * args.repeat
+    chars = sum(len(message) for message in simplified_messages) * args.repeat
+    diffs = [(a, s, c) for a, s, c in zip(originals, simplified_messages, converted) if a != c]
+
+    print(f"對照表 {len(converter)} 筆，載入 {load_ms:.1f} ms")
+    print(f"訊息 {len(originals)} 則（含簡體字 {changed} 則，判斷為 zh-CN {detected_cn} 則）")
+    print(f"轉換: {count / elapsed:,.0f} 則/秒，{chars / elapsed:,.0f} 字/秒，{elapsed / count * 1e6:.1f} us/則")
+    print(f"轉回後與原文不一致: {len(diffs)} 則")
+    if args.show_diffs:
+        for original, simplified, converted_message in diffs:
+            print(f"  {original} -> {simplified} -> {converted_message}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
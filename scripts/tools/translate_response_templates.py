@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+補齊 modules/resource/response_templates.json（回應訊息樣板的各語系翻譯）
+
+- 新增或修改 modules/response_templates.RESPONSE_TEMPLATES 的訊息後執行，
+  以 Azure Translator 翻譯缺少的訊息（參數以佔位符保護），已有的翻譯不變
+- 翻譯結果建議人工檢查後再提交（特別是 th、ko 的語氣與用詞）
+- 需要設定 AZURE_TRANSLATOR_KEY
+
+用法：
+    python scripts/tools/translate_response_templates.py --check     # 只列出缺少 / 多餘的翻譯
+    python scripts/tools/translate_response_templates.py             # 翻譯所有語系缺少的訊息
+    python scripts/tools/translate_response_templates.py --language ja --force   # 重新翻譯日文
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from modules.response_templates import (RESPONSE_TEMPLATES, SOURCE_LANGUAGE, SUPPORTED_LANGUAGES,
+                                        TEMPLATE_TRANSLATIONS_PATH, load_translations, translate_template)
+
+_PARAM_RE = re.compile(r'\{(\w+)\}')
+
+
+def check_language(translations, language):
+    """(缺少的訊息, 多餘的訊息, 參數不一致的訊息)"""
+    existing = translations.get(language, {})
+    missing = [message_id for message_id in RESPONSE_TEMPLATES if message_id not in existing]
+    extra = [message_id for message_id in existing if message_id not in RESPONSE_TEMPLATES]
+    mismatched = [
+        message_id for message_id, text in existing.items()
+        if message_id in RESPONSE_TEMPLATES
+        and set(_PARAM_RE.findall(text)) != set(_PARAM_RE.findall(RESPONSE_TEMPLATES[message_id]))
+    ]
+    return missing, extra, mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='補齊回應訊息樣板的各語系翻譯')
+    parser.add_argument('--language', action='append', help='只處理指定語系（可重複）')
+    parser.add_argument('--check', action='store_true', help='只檢查，不翻譯')
+    parser.add_argument('--force', action='store_true', help='重新翻譯所有訊息')
+    args = parser.parse_args()
+
+    languages = args.language or [language for language in SUPPORTED_LANGUAGES if language != SOURCE_LANGUAGE]
+    translations = load_translations()
+
+    if args.check:
+        ok = True
+        for language in languages:
+            missing, extra, mismatched = check_language(translations, language)
+            print(f"{language}: 缺少 {len(missing)}，多餘 {len(extra)}，參數不一致 {len(mismatched)}")
+            for label, message_ids in (('缺少', missing), ('多餘', extra), ('參數不一致', mismatched)):
+                for message_id in message_ids:
+                    print(f"  {label}: {message_id}")
+            ok = ok and not (missing or extra or mismatched)
+        return 0 if ok else 1
+
+    for language in languages:
+        existing = {} if args.force else translations.get(language, {})
+        _, _, mismatched = check_language({language: existing}, language)
+        updated = {}
+        for message_id in RESPONSE_TEMPLATES:
+            if message_id in existing and message_id not in mismatched:
+                updated[message_id] = existing[message_id]
+                continue
+            translated = translate_template(RESPONSE_TEMPLATES[message_id], language)
+            if translated == RESPONSE_TEMPLATES[message_id]:
+                print(f"{language}: {message_id} 翻譯失敗，略過")
+                continue
+            updated[message_id] = translated
+            print(f"{language}: {message_id} -> {translated!r}")
+        translations[language] = updated
+
+    with open(TEMPLATE_TRANSLATIONS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(translations, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"已寫入 {TEMPLATE_TRANSLATIONS_PATH}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本機的翻譯服務模擬伺服器（測試 core/translation_client.py 的批次、連線重複使用、對沖、斷路器與翻譯預算）
+
+模擬兩個端點，翻譯結果為 "[語系] 原文"：
+- Azure：POST /translate?api-version=3.0&to=en，body 為 [{"text": ...}, ...]
+- Google：GET /translate_a/single?client=gtx&tl=en&q=...
+
+用法：
+    python scripts/tools/translation_stub_server.py --port 8901 --azure-delay 1.5 --google-delay 0.1
+    AZURE_TRANSLATOR_KEY=stub AZURE_TRANSLATOR_ENDPOINT=http://127.0.0.1:8901 \\
+    GOOGLE_TRANSLATE_URL=http://127.0.0.1:8901/translate_a/single TRANSLATION_HEDGE_DELAY=0.5 \\
+    python start_server.py
+
+    python scripts/tools/translation_stub_server.py --selftest   # 啟動模擬伺服器並以 TranslationClient 測試
+
+每個請求會輸出路徑、段數與連線編號（同一編號表示連線被重複使用）。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubTranslationHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    azure_delay = 0.0
+    google_delay = 0.0
+    fail = set()
+    _connections = 0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubTranslationHandler._lock:
+            StubTranslationHandler._connections += 1
+            self.connection_id = StubTranslationHandler._connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # 用戶端已取消（對沖或超過預算）
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/translate':
+            return self._send_json(404, {'error': 'not found'})
+        target = parse_qs(url.query).get('to', ['en'])[0]
+        items = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'[]')
+        print(f"[stub] azure  conn#{self.connection_id} to={target} texts={len(items)}")
+        time.sleep(self.azure_delay)
+        if 'azure' in self.fail:
+            return self._send_json(500, {'error': 'stub failure'})
+        self._send_json(200, [{'translations': [{'text': f"[{target}] {item['text']}", 'to': target}]}
+                              for item in items])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/translate_a/single':
+            return self._send_json(404, {'error': 'not found'})
+        query = parse_qs(url.query)
+        target = query.get('tl', ['en'])[0]
+        text = query.get('q', [''])[0]
+        print(f"[stub] google conn#{self.connection_id} tl={target}")
+        time.sleep(self.google_delay)
+        if 'google' in self.fail:
+            return self._send_json(500, {'error': 'stub failure'})
+        self._send_json(200, [[[f"[{target}] {text}", text, None, None]], None, 'zh-TW'])
+
+
+def start_server(port, azure_delay=0.0, google_delay=0.0, fail=()):
+    StubTranslationHandler.azure_delay = azure_delay
+    StubTranslationHandler.google_delay = google_delay
+    StubTranslationHandler.fail = set(fail)
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubTranslationHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def selftest(port):
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('AZURE_TRANSLATOR_KEY', 'stub')
+    os.environ['AZURE_TRANSLATOR_ENDPOINT'] = f'http://127.0.0.1:{port}'
+    os.environ['GOOGLE_TRANSLATE_URL'] = f'http://127.0.0.1:{port}/translate_a/single'
+    from core import provider_health
+    from core.translation_client import PROVIDER_AZURE, PROVIDER_GOOGLE, TranslationClient
+
+    cases = [
+        ('批次（Azure 一次請求）', 0.0, 0.0, (), PROVIDER_AZURE),
+        ('Azure 太慢，對沖改用 Google', 1.0, 0.0, (), PROVIDER_GOOGLE),
+        ('Azure 失敗，改用 Google', 0.0, 0.0, ('azure',), PROVIDER_GOOGLE),
+        ('兩者都失敗，返回原文', 0.0, 0.0, ('azure', 'google'), None),
+    ]
+    ok = True
+    for title, azure_delay, google_delay, fail, expected in cases:
+        StubTranslationHandler.azure_delay = azure_delay
+        StubTranslationHandler.google_delay = google_delay
+        StubTranslationHandler.fail = set(fail)
+        provider_health._breakers.clear()
+        client = TranslationClient(hedge_delay=0.2)
+        texts = ['可約師傅：%W1%', '人數：2 位', '提醒您']
+        started = time.monotonic()
+        translated, provider = await client.translate_batch(texts, 'en')
+        elapsed = time.monotonic() - started
+        # 同一用戶端的第二次請求應重複使用連線
+        await client.translate_batch(texts, 'ja')
+        await client.close()
+        passed = provider == expected and (translated == texts if expected is None else
+                                           all(t.endswith(s) for t, s in zip(translated, texts)))
+        ok = ok and passed
+        print(f"{'OK ' if passed else 'NG '} {title}: provider={provider} {elapsed * 1000:.0f}ms {translated}")
+        print(f"    stats={client.stats()}")
+
+    ok = await selftest_health() and ok
+    return ok
+
+
+async def selftest_health():
+    """斷路器與翻譯時間預算（core.provider_health）"""
+    from core import provider_health
+    from core.provider_health import STATE_OPEN, get_breaker, start_translation_budget
+    from core.translation_client import PROVIDER_AZURE, TranslationClient
+
+    texts = ['可約師傅：%W1%', '人數：2 位']
+    ok = True
+
+    # Azure 持續失敗：斷路後直接使用 Google，不再送出 Azure 請求
+    provider_health._breakers.clear()
+    StubTranslationHandler.azure_delay = StubTranslationHandler.google_delay = 0.0
+    StubTranslationHandler.fail = {'azure'}
+    client = TranslationClient(hedge_delay=0.2)
+    for _ in range(3):
+        await client.translate_batch(texts, 'en')
+    client._stats.clear()
+    for _ in range(3):
+        await client.translate_batch(texts, 'en')
+    stats = client.stats()
+    await client.close()
+    passed = (get_breaker(PROVIDER_AZURE).state == STATE_OPEN
+              and stats[f'{PROVIDER_AZURE}_requests'] == 0 and stats['fallbacks'] == 0)
+    ok = ok and passed
+    print(f"{'OK ' if passed else 'NG '} Azure 斷路: {get_breaker(PROVIDER_AZURE).snapshot()}")
+
+    # 兩者都很慢：超過翻譯預算時返回原文，之後的翻譯不再送出
+    provider_health._breakers.clear()
+    StubTranslationHandler.azure_delay = StubTranslationHandler.google_delay = 1.0
+    StubTranslationHandler.fail = set()
+    client = TranslationClient(hedge_delay=0.1)
+    start_translation_budget(0.3)
+    started = time.monotonic()
+    first, first_provider = await client.translate_batch(texts, 'en')
+    second, second_provider = await client.translate_batch(texts, 'ja')
+    elapsed = time.monotonic() - started
+    stats = client.stats()
+    await client.close()
+    passed = (first == texts and second == texts and first_provider is None and second_provider is None
+              and elapsed < 0.6 and stats['budget_exceeded'] == 2)
+    ok = ok and passed
+    print(f"{'OK ' if passed else 'NG '} 翻譯預算 0.3 秒: {elapsed * 1000:.0f}ms "
+          f"budget_exceeded={stats['budget_exceeded']} {provider_health.health_snapshot()['budget']}")
+    provider_health._breakers.clear()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本機翻譯服務模擬伺服器')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--azure-delay', type=float, default=0.0, help='Azure 回應延遲（秒）')
+    parser.add_argument('--google-delay', type=float, default=0.0, help='Google 回應延遲（秒）')
+    parser.add_argument('--fail', action='append', default=[], choices=['azure', 'google'], help='模擬失敗的服務')
+    parser.add_argument('--selftest', action='store_true', help='以 TranslationClient 測試後結束')
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.azure_delay, args.google_delay, args.fail)
+    if args.selftest:
+        ok = asyncio.run(selftest(args.port))
+        server.shutdown()
+        return 0 if ok else 1
+
+    print(f"翻譯模擬伺服器: http://127.0.0.1:{args.port}（Ctrl+C 結束）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,17 @@
 from .validators import validate_date_format, validate_datetime_format
-from .async_helpers import run_in_executor
+from .async_helpers import (
+    run_in_executor, executor_pool, get_executor_stats, shutdown_executors,
+    POOL_DB, POOL_CPU, POOL_HTTP,
+)
 
 __all__ = [
     "validate_date_format",
     "validate_datetime_format", 
-    "run_in_executor"
+    "run_in_executor",
+    "executor_pool",
+    "get_executor_stats",
+    "shutdown_executors",
+    "POOL_DB",
+    "POOL_CPU",
+    "POOL_HTTP",
 ]
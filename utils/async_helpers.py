@@ -1,6 +1,186 @@
+"""
+在執行緒池中執行同步（阻塞）函數
+
+依工作性質使用各自的執行緒池，避免一種工作佔滿所有執行緒（如翻譯服務緩慢時拖慢可預約查詢）：
+- db：資料庫 / Redis 查詢（各 Manager 類別、預約查詢）
+- cpu：純計算（訊息解析、關鍵字比對）
+- http：對外 HTTP 請求（翻譯服務）
+- default：未標示的函數
+
+以 @executor_pool(POOL_DB) 標示函數、方法或類別（類別內所有方法）所屬的執行緒池，
+run_in_executor 依標示選擇執行緒池；各池的大小可用環境變數 EXECUTOR_<名稱>_WORKERS 設定。
+"""
+
 import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+POOL_DB = 'db'
+POOL_CPU = 'cpu'
+POOL_HTTP = 'http'
+POOL_DEFAULT = 'default'
+
+_CPU_COUNT = os.cpu_count() or 4
+
+# 各執行緒池的預設大小
+EXECUTOR_POOL_SIZES = {
+    POOL_DB: 16,
+    POOL_CPU: _CPU_COUNT,
+    POOL_HTTP: 16,
+    POOL_DEFAULT: min(32, _CPU_COUNT + 4),
+}
+
+EXECUTOR_POOL_ATTR = '__executor_pool__'
+
+
+def executor_pool(name: str):
+    """
+    標示函數、方法或類別所屬的執行緒池
+
+        @executor_pool(POOL_DB)
+        class StaffManager: ...
+
+        class MultiLanguage:
+            @classmethod
+            @executor_pool(POOL_HTTP)     # 放在 @classmethod 之下
+            def translate_to_target_language(cls, ...): ...
+    """
+    def decorator(target):
+        setattr(target, EXECUTOR_POOL_ATTR, name)
+        return target
+    return decorator
+
+
+def pool_of(func: Callable) -> str:
+    """函數所屬的執行緒池：函數本身的標示，其次為方法所屬物件 / 類別的標示，都沒有時為 default"""
+    name = getattr(func, EXECUTOR_POOL_ATTR, None)
+    if name is None:
+        owner = getattr(func, '__self__', None)
+        if owner is not None:
+            name = getattr(owner, EXECUTOR_POOL_ATTR, None)
+    return name or POOL_DEFAULT
+
+
+class ExecutorPool:
+    """具名的執行緒池，統計排隊數、執行中數量與排隊等待時間"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-pool')
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+
+    def submit(self, func: Callable, *args) -> Future:
+        submitted = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def task():
+            started = time.monotonic()
+            waited = started - submitted
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            try:
+                return func(*args)
+            except BaseException:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.run_total += time.monotonic() - started
+
+        future = self._executor.submit(task)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        # 開始執行前就被取消（如請求已中斷）的工作不會執行 task，在此扣除排隊數
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed
+            return {
+                'max_workers': self.max_workers,
+                'queued': self.queued,
+                'active': self.active,
+                'max_queued': self.max_queued,
+                'completed': completed,
+                'errors': self.errors,
+                'cancelled': self.cancelled,
+                'avg_wait_ms': round(self.wait_total * 1000 / completed, 1) if completed else 0.0,
+                'max_wait_ms': round(self.wait_max * 1000, 1),
+                'avg_run_ms': round(self.run_total * 1000 / completed, 1) if completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pools: Dict[str, ExecutorPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_executor_pool(name: str) -> ExecutorPool:
+    """具名的執行緒池（第一次使用時建立，大小為 EXECUTOR_<名稱>_WORKERS 或預設值）"""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                default_size = EXECUTOR_POOL_SIZES.get(name, EXECUTOR_POOL_SIZES[POOL_DEFAULT])
+                size = int(os.getenv(f'EXECUTOR_{name.upper()}_WORKERS', default_size))
+                pool = _pools[name] = ExecutorPool(name, max(1, size))
+    return pool
+
+
+async def run_in_executor(func, *args, pool: Optional[str] = None):
+    """
+    在執行緒池中運行同步函數
+
+    pool 未指定時依函數的 @executor_pool 標示選擇執行緒池；
+    目前的 contextvars（如翻譯時間預算）會一併帶到執行緒中
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    future = get_executor_pool(pool or pool_of(func)).submit(context.run, func, *args)
+    return await asyncio.wrap_future(future, loop=loop)
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    """各執行緒池的大小、排隊數、執行中數量、等待與執行時間"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
+
 
-async def run_in_executor(func, *args):
-    """在執行器中運行同步函數"""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, func, *args)
+def shutdown_executors():
+    """關閉所有執行緒池（取消尚未開始的工作）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()